@@ -0,0 +1,94 @@
+"""
+Alembic Environment
+
+Runs migrations against DATABASE_URL from the application settings,
+using the synchronous driver. Run from the ecommerce-api directory:
+    
+    alembic upgrade head
+"""
+
+from logging.config import fileConfig
+
+from sqlalchemy import create_engine, pool
+
+from alembic import context
+
+from app.config import settings
+from app.database import Base
+import app.models  # noqa: F401  (registers the models on Base.metadata)
+
+
+# Alembic Config object, giving access to values in alembic.ini
+config = context.config
+
+# Set up Python logging from alembic.ini
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+# Model metadata, used by `alembic revision --autogenerate`
+target_metadata = Base.metadata
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Leave the search tables and indexes (managed by app.utils.search) out of autogenerate."""
+    if type_ == "table":
+        return not name.startswith(("products_fts", "product_trigram"))
+    if type_ == "index":
+        return name not in ("ix_products_search", "ix_products_name_trgm")
+    return True
+
+
+def run_migrations_offline() -> None:
+    """
+    Emit the migration SQL as a script instead of running it.
+    
+    Used by `alembic upgrade head --sql`.
+    """
+    context.configure(
+        url=settings.DATABASE_URL,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=settings.DATABASE_URL.startswith("sqlite"),
+    )
+    
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """
+    Run migrations on a live connection.
+    
+    Uses the connection in config.attributes["connection"] when the
+    caller passes one (the tests migrate their own databases that way).
+    """
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        run_migrations(connection)
+        return
+    
+    connectable = create_engine(settings.DATABASE_URL, poolclass=pool.NullPool)
+    with connectable.connect() as connection:
+        run_migrations(connection)
+
+
+def run_migrations(connection) -> None:
+    """Run the migrations in a transaction on `connection`."""
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        # SQLite cannot ALTER most things; batch mode recreates the table
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+    
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
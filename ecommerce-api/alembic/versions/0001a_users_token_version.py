@@ -0,0 +1,34 @@
+"""Token version stamp on users
+
+Revision ID: 0001a_users_token_version
+Revises: 0001_initial_schema
+Create Date: 2026-10-18 09:30:00.000000
+
+Adds users.token_version, the version embedded in access tokens and
+bumped to revoke them. Existing users start at 0; tokens issued
+before it carry no version and are refused, so users sign in again.
+Releases that created their tables at startup may have added the
+column already; it is then left as is.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001a_users_token_version"
+down_revision: Union[str, None] = "0001_initial_schema"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("users")}
+    if "token_version" not in columns:
+        op.add_column("users", sa.Column("token_version", sa.Integer(), server_default="0", nullable=False))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.drop_column("token_version")
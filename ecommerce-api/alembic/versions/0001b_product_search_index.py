@@ -0,0 +1,104 @@
+"""Full-text search index on products
+
+Revision ID: 0001b_product_search_index
+Revises: 0001a_users_token_version
+Create Date: 2026-10-18 09:45:00.000000
+
+SQLite: the products_fts FTS5 table over active products and the
+triggers that keep it in sync, filled from the existing products.
+PostgreSQL: a partial GIN index over a weighted tsvector expression.
+
+Releases that created their tables at startup also created these; such
+databases keep theirs and are not filled again.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001b_product_search_index"
+down_revision: Union[str, None] = "0001a_users_token_version"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Frozen copy of the full-text index in app/utils/search.py as of this
+# revision
+SQLITE_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, description,
+        content='products', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products
+    WHEN new.is_active BEGIN
+        INSERT INTO products_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products
+    WHEN old.is_active BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_update
+    AFTER UPDATE OF name, description, is_active ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description)
+        SELECT 'delete', old.id, old.name, old.description WHERE old.is_active;
+        INSERT INTO products_fts(rowid, name, description)
+        SELECT new.id, new.name, new.description WHERE new.is_active;
+    END
+    """,
+]
+
+PG_SEARCH_DDL = [
+    """
+    CREATE INDEX IF NOT EXISTS ix_products_search
+    ON products USING GIN ((
+        setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ))
+    WHERE is_active
+    """,
+]
+
+
+# Only active products are indexed, so an external-content 'rebuild'
+# (which would index every row) cannot be used for the initial fill
+SQLITE_BACKFILL = """
+    INSERT INTO products_fts(rowid, name, description)
+    SELECT id, name, description FROM products WHERE is_active
+"""
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "sqlite":
+        exists = bind.execute(
+            sa.text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'")
+        ).first()
+        for statement in SQLITE_SEARCH_DDL:
+            op.execute(statement)
+        if not exists:
+            op.execute(SQLITE_BACKFILL)
+    elif bind.dialect.name == "postgresql":
+        for statement in PG_SEARCH_DDL:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "sqlite":
+        for trigger in ("products_fts_insert", "products_fts_delete", "products_fts_update"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS products_fts")
+    elif bind.dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_products_search")
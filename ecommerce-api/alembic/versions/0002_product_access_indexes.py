@@ -0,0 +1,55 @@
+"""Partial composite indexes for the product list access paths
+
+Revision ID: 0002_product_access_indexes
+Revises: 0001b_product_search_index
+Create Date: 2026-10-18 10:00:00.000000
+
+Every list, count and category query filters on is_active = true, then
+optionally on category and price, and orders by (created_at, id) or
+(price, id). The keyset indexes are replaced by partial indexes over
+active rows only, one per sort order with and without a leading
+category column. owner_id gets the index its foreign key lacked.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002_product_access_indexes"
+down_revision: Union[str, None] = "0001b_product_search_index"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Must match the predicate the queries use (`is_active = 1` on SQLite),
+# or the planner cannot prove that the partial index applies
+ACTIVE_ONLY = {
+    "sqlite_where": sa.text("is_active = 1"),
+    "postgresql_where": sa.text("is_active"),
+}
+
+ACTIVE_INDEXES = {
+    "ix_products_active_created_at_id": ["created_at", "id"],
+    "ix_products_active_price_id": ["price", "id"],
+    "ix_products_active_category_created_at_id": ["category", "created_at", "id"],
+    "ix_products_active_category_price_id": ["category", "price", "id"],
+}
+
+
+def upgrade() -> None:
+    for name, columns in ACTIVE_INDEXES.items():
+        op.create_index(name, "products", columns, if_not_exists=True, **ACTIVE_ONLY)
+    op.create_index("ix_products_owner_id", "products", ["owner_id"], if_not_exists=True)
+    
+    # Superseded by the partial indexes above (made at startup by
+    # releases before migrations, never by a migration)
+    op.drop_index("ix_products_created_at_id", table_name="products", if_exists=True)
+    op.drop_index("ix_products_price_id", table_name="products", if_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_products_owner_id", table_name="products")
+    for name in ACTIVE_INDEXES:
+        op.drop_index(name, table_name="products")
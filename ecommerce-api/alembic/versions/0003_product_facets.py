@@ -0,0 +1,130 @@
+"""Product facet counts maintained by triggers
+
+Revision ID: 0003_product_facets
+Revises: 0002_product_access_indexes
+Create Date: 2026-10-18 11:00:00.000000
+
+Adds the product_facets summary table (active products per category and
+price bucket) and the triggers that keep it current, then fills it from
+the existing products.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003_product_facets"
+down_revision: Union[str, None] = "0002_product_access_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Frozen copy of app/utils/facets.py as of this revision: new price
+# buckets need a migration that recreates the triggers and recounts
+PRICE_BUCKETS = (0.0, 10.0, 25.0, 50.0, 100.0, 250.0, 500.0, 1000.0, 2500.0, 5000.0)
+
+
+def price_bucket_sql(price: str) -> str:
+    """SQL expression mapping a price column to its bucket's lower bound."""
+    cases = " ".join(
+        f"WHEN {price} >= {bound!r} THEN {bound!r}" for bound in reversed(PRICE_BUCKETS[1:])
+    )
+    return f"CASE {cases} ELSE {PRICE_BUCKETS[0]!r} END"
+
+
+SQLITE_DDL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS product_facets_insert AFTER INSERT ON products
+    WHEN new.is_active BEGIN
+        INSERT INTO product_facets(category, price_from, product_count)
+        VALUES (coalesce(new.category, ''), {price_bucket_sql("new.price")}, 1)
+        ON CONFLICT(category, price_from) DO UPDATE SET product_count = product_count + 1;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS product_facets_delete AFTER DELETE ON products
+    WHEN old.is_active BEGIN
+        UPDATE product_facets SET product_count = product_count - 1
+        WHERE category = coalesce(old.category, '') AND price_from = {price_bucket_sql("old.price")};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS product_facets_update
+    AFTER UPDATE OF category, price, is_active ON products
+    WHEN old.category IS NOT new.category OR old.price IS NOT new.price
+        OR old.is_active IS NOT new.is_active BEGIN
+        UPDATE product_facets SET product_count = product_count - 1
+        WHERE category = coalesce(old.category, '') AND price_from = {price_bucket_sql("old.price")}
+            AND old.is_active;
+        INSERT INTO product_facets(category, price_from, product_count)
+        SELECT coalesce(new.category, ''), {price_bucket_sql("new.price")}, 1 WHERE new.is_active
+        ON CONFLICT(category, price_from) DO UPDATE SET product_count = product_count + 1;
+    END
+    """,
+]
+
+PG_DDL = [
+    f"""
+    CREATE OR REPLACE FUNCTION product_facets_apply() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            IF OLD.is_active THEN
+                UPDATE product_facets SET product_count = product_count - 1
+                WHERE category = coalesce(OLD.category, '')
+                    AND price_from = {price_bucket_sql("OLD.price")};
+            END IF;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            IF NEW.is_active THEN
+                INSERT INTO product_facets AS f (category, price_from, product_count)
+                VALUES (coalesce(NEW.category, ''), {price_bucket_sql("NEW.price")}, 1)
+                ON CONFLICT (category, price_from) DO UPDATE SET product_count = f.product_count + 1;
+            END IF;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER product_facets_sync
+    AFTER INSERT OR DELETE OR UPDATE OF category, price, is_active ON products
+    FOR EACH ROW EXECUTE FUNCTION product_facets_apply()
+    """,
+]
+
+BACKFILL = f"""
+    INSERT INTO product_facets(category, price_from, product_count)
+    SELECT coalesce(category, ''), {price_bucket_sql("price")}, count(*)
+    FROM products WHERE is_active
+    GROUP BY 1, 2
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "product_facets",
+        sa.Column("category", sa.String(length=100), nullable=False),
+        sa.Column("price_from", sa.Float(), nullable=False),
+        sa.Column("product_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("category", "price_from"),
+    )
+    
+    # Triggers on products, plus the initial counts
+    statements = {"sqlite": SQLITE_DDL, "postgresql": PG_DDL}.get(op.get_bind().dialect.name)
+    if statements:
+        for statement in statements + [BACKFILL]:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "sqlite":
+        for trigger in ("product_facets_insert", "product_facets_delete", "product_facets_update"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    elif bind.dialect.name == "postgresql":
+        op.execute("DROP TRIGGER IF EXISTS product_facets_sync ON products")
+        op.execute("DROP FUNCTION IF EXISTS product_facets_apply()")
+    
+    op.drop_table("product_facets")
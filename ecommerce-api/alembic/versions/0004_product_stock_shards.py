@@ -0,0 +1,42 @@
+"""Sharded stock counters for high-contention products
+
+Revision ID: 0004_product_stock_shards
+Revises: 0003_product_facets
+Create Date: 2026-10-18 12:00:00.000000
+
+Adds products.stock_shards and the product_stock_shards table holding
+the stock of products whose counter is split across several rows.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004_product_stock_shards"
+down_revision: Union[str, None] = "0003_product_facets"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # A plain ALTER TABLE: batch mode would rebuild products and drop the
+    # search and facet triggers defined on it
+    op.add_column(
+        "products",
+        sa.Column("stock_shards", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.create_table(
+        "product_stock_shards",
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("shard", sa.Integer(), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["product_id"], ["products.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("product_id", "shard"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("product_stock_shards")
+    op.drop_column("products", "stock_shards")
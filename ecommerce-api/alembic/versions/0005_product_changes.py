@@ -0,0 +1,39 @@
+"""Append-only product change log for the change feed
+
+Revision ID: 0005_product_changes
+Revises: 0004_product_stock_shards
+Create Date: 2026-10-18 13:00:00.000000
+
+Adds the product_changes table read by GET /products/changes. The log
+starts empty: clients take a full copy of the catalog first, then follow
+the feed from its current end.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005_product_changes"
+down_revision: Union[str, None] = "0004_product_stock_shards"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "product_changes",
+        sa.Column("seq", sa.Integer(), nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("deleted", sa.Boolean(), nullable=False),
+        sa.Column("changed_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint("seq"),
+        sqlite_autoincrement=True,
+    )
+    op.create_index("ix_product_changes_product_id_seq", "product_changes", ["product_id", "seq"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_product_changes_product_id_seq", table_name="product_changes")
+    op.drop_table("product_changes")
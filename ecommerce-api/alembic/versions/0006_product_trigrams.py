@@ -0,0 +1,137 @@
+"""Trigram index for fuzzy product name search
+
+Revision ID: 0006_product_trigrams
+Revises: 0005_product_changes
+Create Date: 2026-10-18 14:00:00.000000
+
+SQLite: adds the product_trigrams side table, the table of character
+positions its triggers cut names with, and the triggers themselves,
+then fills it from the active products. PostgreSQL: enables pg_trgm and
+adds a partial GIN trigram index on products.name.
+
+Databases whose application created these objects at startup already
+have them; they are left as they are and not filled again.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006_product_trigrams"
+down_revision: Union[str, None] = "0005_product_changes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Frozen copy of app/utils/search.py as of this revision: a later change
+# to the trigram rules needs a migration of its own
+TRIGRAM_SEPARATORS = "-_,./&+()"
+TRIGRAM_MAX_POSITION = 2 + 3 * 255 + 1
+
+
+def trigram_source_sql(name: str) -> str:
+    """Lowercased name with every word padded as pg_trgm does."""
+    expression = f"lower({name})"
+    for separator in TRIGRAM_SEPARATORS:
+        expression = f"replace({expression}, '{separator}', ' ')"
+    return f"('  ' || replace({expression}, ' ', '   ') || ' ')"
+
+
+def trigram_select_sql(name: str) -> str:
+    """Select of the distinct trigrams of a name, one row each."""
+    return (
+        f"SELECT DISTINCT substr(source, n, 3) AS trigram "
+        f"FROM (SELECT {trigram_source_sql(name)} AS source LIMIT 1) "
+        f"JOIN product_trigram_positions ON n <= length(source) - 2 "
+        f"WHERE substr(source, n + 1, 2) != '  '"
+    )
+
+
+SQLITE_DDL = [
+    "CREATE TABLE IF NOT EXISTS product_trigram_positions (n INTEGER PRIMARY KEY)",
+    """
+    CREATE TABLE IF NOT EXISTS product_trigrams (
+        trigram TEXT NOT NULL,
+        product_id INTEGER NOT NULL,
+        trigram_count INTEGER NOT NULL,
+        PRIMARY KEY (trigram, product_id)
+    ) WITHOUT ROWID
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS product_trigrams_insert AFTER INSERT ON products
+    WHEN new.is_active BEGIN
+        INSERT INTO product_trigrams(trigram, product_id, trigram_count)
+        SELECT trigram, new.id, count(*) OVER () FROM ({trigram_select_sql("new.name")});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS product_trigrams_delete AFTER DELETE ON products
+    WHEN old.is_active BEGIN
+        DELETE FROM product_trigrams
+        WHERE product_id = old.id AND trigram IN ({trigram_select_sql("old.name")});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS product_trigrams_update
+    AFTER UPDATE OF name, is_active ON products
+    WHEN old.name IS NOT new.name OR old.is_active IS NOT new.is_active BEGIN
+        DELETE FROM product_trigrams
+        WHERE old.is_active AND product_id = old.id AND trigram IN ({trigram_select_sql("old.name")});
+        INSERT INTO product_trigrams(trigram, product_id, trigram_count)
+        SELECT trigram, new.id, count(*) OVER () FROM ({trigram_select_sql("new.name")})
+        WHERE new.is_active;
+    END
+    """,
+]
+
+SQLITE_BACKFILL = f"""
+    INSERT INTO product_trigrams(trigram, product_id, trigram_count)
+    SELECT trigram, id, count(*) OVER (PARTITION BY id) FROM (
+        SELECT DISTINCT id, substr(source, n, 3) AS trigram
+        FROM (SELECT id, {trigram_source_sql("name")} AS source FROM products WHERE is_active LIMIT -1)
+        JOIN product_trigram_positions ON n <= length(source) - 2
+        WHERE substr(source, n + 1, 2) != '  '
+    )
+"""
+
+PG_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE INDEX IF NOT EXISTS ix_products_name_trgm
+    ON products USING GIN (name gin_trgm_ops)
+    WHERE is_active
+    """,
+]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "sqlite":
+        exists = bind.execute(
+            sa.text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'product_trigrams'")
+        ).first()
+        for statement in SQLITE_DDL:
+            op.execute(statement)
+        if not exists:
+            bind.execute(
+                sa.text("INSERT OR IGNORE INTO product_trigram_positions(n) VALUES (:n)"),
+                [{"n": n} for n in range(1, TRIGRAM_MAX_POSITION + 1)]
+            )
+            op.execute(SQLITE_BACKFILL)
+    elif bind.dialect.name == "postgresql":
+        for statement in PG_DDL:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "sqlite":
+        for trigger in ("product_trigrams_insert", "product_trigrams_delete", "product_trigrams_update"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS product_trigrams")
+        op.execute("DROP TABLE IF EXISTS product_trigram_positions")
+    elif bind.dialect.name == "postgresql":
+        # pg_trgm stays: other objects in the database may use it
+        op.execute("DROP INDEX IF EXISTS ix_products_name_trgm")
@@ -1 +1,6 @@
 # App package init
+
+import time
+
+# When the first app module started importing, for the startup report
+IMPORT_STARTED = time.perf_counter()
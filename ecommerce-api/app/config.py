@@ -7,6 +7,7 @@ Uses Pydantic Settings for type-safe configuration management.
 
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
 
 
 class Settings(BaseSettings):
@@ -15,27 +16,151 @@ class Settings(BaseSettings):
     
     Attributes:
         DATABASE_URL: Connection string for the database
+        AUTO_MIGRATE: Run `alembic upgrade head` at startup when the
+            schema is behind (otherwise startup fails)
+        DB_POOL_SIZE: Connections kept open per engine
+        DB_MAX_OVERFLOW: Extra connections opened under load, beyond DB_POOL_SIZE
+        DB_POOL_TIMEOUT: Seconds to wait for a free connection before failing
+        DB_POOL_RECYCLE: Seconds after which a connection is replaced
+        DB_POOL_PRE_PING: Test connections on checkout and replace dead ones
+        READ_DATABASE_URLS: Comma-separated connection strings of read
+            replicas for the read-only product routes (empty: none)
+        READ_REPLICA_BALANCING: How reads are spread over the replicas
+            ("round_robin" or "least_loaded")
+        READ_REPLICA_RETRY_SECONDS: How long a failed replica is skipped
+        READ_YOUR_WRITES_SECONDS: How long a client's reads go to the
+            primary after it writes (0 disables pinning)
+        SQLITE_JOURNAL_MODE: SQLite journal mode (WAL allows reads during writes)
+        SQLITE_SYNCHRONOUS: SQLite fsync level (NORMAL is safe with WAL)
+        SQLITE_BUSY_TIMEOUT_MS: How long a SQLite writer waits for the lock
+        SQLITE_MMAP_SIZE: Bytes of the SQLite file read through mmap
+        SQLITE_CACHE_SIZE_KB: SQLite page cache per connection, in KiB
         SECRET_KEY: Secret key for JWT token signing
         ALGORITHM: Algorithm used for JWT encoding
         ACCESS_TOKEN_EXPIRE_MINUTES: Token expiration time in minutes
+        TOKEN_CACHE_MAX_ENTRIES: Maximum verified tokens cached per process
+        TOKEN_CACHE_TTL_SECONDS: How long a verified token is trusted
+            without re-checking the user row
+        BCRYPT_ROUNDS: bcrypt cost for new password hashes; existing
+            hashes are upgraded on the user's next login
+        PASSWORD_HASH_WORKERS: Processes in the password hashing pool
+            (defaults to the CPU count)
+        PASSWORD_HASH_QUEUE_LIMIT: Maximum hashing jobs queued or running
+            before register/login answer 503
         DEBUG: Enable debug mode
         APP_NAME: Application name shown in docs
         APP_VERSION: Current API version
+        PRODUCT_COUNT_CACHE_SECONDS: How long product list totals are cached
+        CACHE_BACKEND: Product cache backend ("memory", "redis" or "none");
+            without one, list-style ETags are digests of the response body
+        REDIS_URL: Redis connection URL for the redis cache backend
+        CACHE_TTL_SECONDS: Lifetime of cached product responses
+        CACHE_MAX_ENTRIES: Maximum entries held by the memory cache backend
+        SINGLE_FLIGHT_MAX_WAITERS: Most requests waiting on one in-flight
+            product read; more run their own query (0 disables coalescing)
+        SINGLE_FLIGHT_TIMEOUT_SECONDS: How long a request waits on another's
+            read before running its own
+        FAST_JSON_RESPONSES: Serialize list and search responses from plain
+            rows with orjson (requires the orjson package)
+        METRICS_ENABLED: Record request metrics and serve them at /metrics
+        HTTP_CACHE_MAX_AGE: Seconds clients and CDNs may reuse a product
+            response before revalidating it with its ETag
+        PRODUCT_BATCH_MAX_IDS: Most product IDs one /products/batch request
+            may ask for
+        BULK_IMPORT_BATCH_SIZE: Rows per INSERT batch and transaction in
+            POST /products/bulk
+        BULK_IMPORT_MAX_ERRORS: Row errors listed in a bulk import report
+        STOCK_REFRESH_SECONDS: How often the displayed stock of products
+            with sharded stock is refreshed from their shards (0: never)
+        FUZZY_SEARCH_THRESHOLD: Least similarity (0-1) of a fuzzy search
+            match, unless the request sets its own
+        CHANGE_LOG_COMPACT_SECONDS: How often superseded change log
+            entries are deleted (0: never)
+        SUGGEST_ENABLED: Keep the in-memory prefix index behind
+            GET /products/suggest
+        SUGGEST_REFRESH_SECONDS: How often the index is reloaded from the
+            database to pick up other workers' writes (0: only at startup)
     """
     
     # Database settings
     DATABASE_URL: str = "sqlite:///./ecommerce.db"
+    AUTO_MIGRATE: bool = False
+    
+    # Connection pool settings
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    
+    # Read replica settings
+    READ_DATABASE_URLS: str = ""
+    READ_REPLICA_BALANCING: str = "round_robin"
+    READ_REPLICA_RETRY_SECONDS: float = 30.0
+    READ_YOUR_WRITES_SECONDS: float = 5.0
+    
+    # SQLite settings (ignored for other databases)
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 268435456
+    SQLITE_CACHE_SIZE_KB: int = 16384
     
     # JWT settings
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    TOKEN_CACHE_MAX_ENTRIES: int = 10000
+    TOKEN_CACHE_TTL_SECONDS: int = 60
+    
+    # Password hashing settings
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: Optional[int] = None
+    PASSWORD_HASH_QUEUE_LIMIT: int = 64
     
     # Application settings
     DEBUG: bool = True
     APP_NAME: str = "E-commerce API"
     APP_VERSION: str = "1.0.0"
     
+    # Pagination settings
+    PRODUCT_COUNT_CACHE_SECONDS: int = 30
+    
+    # Cache settings
+    CACHE_BACKEND: str = "memory"
+    REDIS_URL: Optional[str] = None
+    CACHE_TTL_SECONDS: int = 60
+    CACHE_MAX_ENTRIES: int = 10000
+    HTTP_CACHE_MAX_AGE: int = 0
+    SINGLE_FLIGHT_MAX_WAITERS: int = 1000
+    SINGLE_FLIGHT_TIMEOUT_SECONDS: float = 5.0
+    
+    # Monitoring settings
+    METRICS_ENABLED: bool = True
+    
+    # Serialization settings
+    FAST_JSON_RESPONSES: bool = False
+    
+    # Batch fetch settings
+    PRODUCT_BATCH_MAX_IDS: int = 500
+    
+    # Bulk import settings
+    BULK_IMPORT_BATCH_SIZE: int = 1000
+    BULK_IMPORT_MAX_ERRORS: int = 100
+    
+    # Inventory settings
+    STOCK_REFRESH_SECONDS: float = 5.0
+    
+    # Search settings
+    FUZZY_SEARCH_THRESHOLD: float = 0.5
+    
+    # Change feed settings
+    CHANGE_LOG_COMPACT_SECONDS: int = 3600
+    
+    # Autocomplete settings
+    SUGGEST_ENABLED: bool = True
+    SUGGEST_REFRESH_SECONDS: int = 300
+    
     class Config:
         # Load from .env file if it exists
         env_file = ".env"
@@ -1,28 +1,195 @@
 """
 Database Configuration
 
-Sets up SQLAlchemy engine, session, and base model.
+Sets up SQLAlchemy engines, sessions, and base model.
 Provides dependency injection for database sessions.
+
+Two engines share the same DATABASE_URL:
+- `engine` / `SessionLocal` - synchronous, for scripts and migrations
+- `async_engine` / `AsyncSessionLocal` - asynchronous, used by the API routes
+  so that queries never block the event loop
+
+Both use a queue pool sized from the DB_POOL_* settings, instrumented so
+checkout counts and wait times can be reported by /health. SQLite
+connections are switched to WAL with the SQLITE_* pragmas as they open.
+
+Read replicas (READ_DATABASE_URLS) get async engines of their own, and
+read-only routes take their session from `get_read_db`, which balances
+over the replicas (see ReadReplicas) and falls back to the primary.
 """
 
-from sqlalchemy import create_engine
+import itertools
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from http.cookies import SimpleCookie
+from typing import Any, AsyncGenerator, AsyncIterator, Generator, Optional
+
+from sqlalchemy import create_engine, event, exc, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
 
 from app.config import settings
 
 
-# Create SQLAlchemy engine
-# For SQLite, we need connect_args to allow multi-threading
-if settings.DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(
-        settings.DATABASE_URL,
-        connect_args={"check_same_thread": False}  # SQLite specific
+# Async drivers used for each sync URL scheme
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+
+def get_async_database_url(url: str) -> str:
+    """
+    Convert a sync database URL into its async driver equivalent.
+    
+    Example:
+        sqlite:///./ecommerce.db       -> sqlite+aiosqlite:///./ecommerce.db
+        postgresql://user@host/db      -> postgresql+asyncpg://user@host/db
+    
+    URLs that already name an async driver are returned unchanged.
+    """
+    scheme, separator, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{separator}{rest}"
+
+
+class PoolStats:
+    """
+    Checkout counters for one connection pool.
+    
+    Wait time is measured from asking the pool for a connection to
+    getting one, so it includes queueing for a free connection and
+    opening (or pre-pinging) it.
+    """
+    
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+    
+    def record(self, waited: float) -> None:
+        self.checkouts += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+    
+    def as_dict(self, pool: Pool) -> dict[str, Any]:
+        """Counters plus the pool's current occupancy."""
+        return {
+            "pool": type(pool).__name__,
+            "size": pool.size() if hasattr(pool, "size") else None,
+            "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+            "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+        }
+
+
+def timed_pool_class(base: type[Pool]) -> type[Pool]:
+    """
+    Subclass a pool class so every checkout is timed.
+    
+    The counters live on the class, so they survive the pool being
+    recreated by engine.dispose().
+    """
+    stats = PoolStats()
+    
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return base.connect(self)
+        except exc.TimeoutError:
+            stats.timeouts += 1
+            raise
+        finally:
+            stats.record(time.perf_counter() - started)
+    
+    return type(f"Timed{base.__name__}", (base,), {"connect": connect, "stats": stats})
+
+
+def engine_options(url: str, asynchronous: bool = False) -> dict[str, Any]:
+    """
+    Keyword arguments for create_engine / create_async_engine.
+    
+    File databases (and any server database) get an instrumented queue
+    pool sized from settings. In-memory SQLite keeps SQLAlchemy's
+    default single-connection pool, since every new connection would be
+    a new, empty database.
+    """
+    parsed = make_url(url)
+    options: dict[str, Any] = {}
+    
+    if parsed.get_backend_name() == "sqlite":
+        if not asynchronous:
+            # Sessions may be used from threads other than the creating one
+            options["connect_args"] = {"check_same_thread": False}
+        if parsed.database in (None, "", ":memory:"):
+            return options
+    
+    options.update(
+        poolclass=timed_pool_class(AsyncAdaptedQueuePool if asynchronous else QueuePool),
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
     )
-else:
-    # PostgreSQL or other databases
-    engine = create_engine(settings.DATABASE_URL)
+    return options
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """
+    Configure each new SQLite connection.
+    
+    WAL lets readers proceed while a write is in progress, and
+    busy_timeout makes writers wait for the lock instead of failing
+    with "database is locked". synchronous=NORMAL is durable under WAL
+    except for the last transactions before a power loss.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        # A negative cache_size is in KiB rather than pages
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+    finally:
+        cursor.close()
+
+
+# Create SQLAlchemy engine
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
+
+
+# Create async engine (aiosqlite for SQLite, asyncpg for PostgreSQL)
+ASYNC_DATABASE_URL = get_async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL, asynchronous=True))
+
+
+if engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", set_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", set_sqlite_pragmas)
+
+
+def pool_stats(pool: Pool) -> dict[str, Any]:
+    """Checkout statistics of a pool, if it is instrumented."""
+    if hasattr(pool, "stats"):
+        return pool.stats.as_dict(pool)
+    return {"pool": type(pool).__name__}
+
+
+def pool_status() -> dict[str, Any]:
+    """Checkout statistics of every engine's pool, for /health."""
+    status = {"sync": pool_stats(engine.pool), "async": pool_stats(async_engine.pool)}
+    status.update(read_replicas.status())
+    return status
 
 
 # Create SessionLocal class
@@ -33,6 +200,15 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
+# Async session factory
+# expire_on_commit=False keeps loaded attributes usable after commit,
+# since lazy loading is not available on an AsyncSession
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 
 # Create Base class for declarative models
 # All our models will inherit from this
@@ -56,3 +232,230 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency that provides an async database session.
+    
+    Use this from `async def` routes so database I/O does not
+    block the event loop.
+    
+    Example:
+        @app.get("/items")
+        async def get_items(db: AsyncSession = Depends(get_async_db)):
+            result = await db.execute(select(Item))
+            return result.scalars().all()
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+class ReadRouting:
+    """Read routing state of one request, set by ReadYourWritesMiddleware."""
+    
+    __slots__ = ("pinned", "wrote")
+    
+    def __init__(self, pinned: bool = False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+# Routing state of the request being handled
+current_routing: ContextVar[Optional[ReadRouting]] = ContextVar("current_routing", default=None)
+
+def reads_pinned() -> bool:
+    """Whether the current request's reads must go to the primary."""
+    routing = current_routing.get()
+    return routing is not None and routing.pinned
+
+
+# Cookie holding the time until which a client's reads go to the primary
+READ_PIN_COOKIE = "read_primary_until"
+
+
+class ReadReplicas:
+    """
+    Read-only sessions balanced over the read replicas.
+    
+    - round_robin: replicas take turns
+    - least_loaded: the replica with the fewest sessions open in this
+      process, ties taken in turn
+    
+    A replica that cannot be connected to, or whose connection breaks
+    during a request, is skipped for READ_REPLICA_RETRY_SECONDS. When no
+    replica is usable, or the request is pinned to the primary after a
+    write (read-your-writes), the session uses the primary instead.
+    
+    Replicas apply the primary's writes with some lag, so only routes
+    that can serve slightly stale data should read from them.
+    """
+    
+    def __init__(self, urls: list[str], balancing: str = "round_robin", retry_seconds: float = 30.0):
+        if balancing not in ("round_robin", "least_loaded"):
+            raise ValueError(f"Unknown READ_REPLICA_BALANCING {balancing!r}")
+        self.engines = [create_async_engine(url, **engine_options(url, asynchronous=True)) for url in urls]
+        self.balancing = balancing
+        self.retry_seconds = retry_seconds
+        self.open_sessions = [0] * len(urls)
+        self.sessions = [0] * len(urls)
+        self.failures = [0] * len(urls)
+        self.down_until = [0.0] * len(urls)
+        self.primary_reads = 0
+        self._turn = itertools.count()
+        
+        for replica in self.engines:
+            if replica.dialect.name == "sqlite":
+                event.listen(replica.sync_engine, "connect", set_sqlite_pragmas)
+    
+    def candidates(self) -> list[int]:
+        """Indexes of the replicas that are up, in the order to try them."""
+        now = time.monotonic()
+        start = next(self._turn)
+        order = [
+            (start + offset) % len(self.engines) for offset in range(len(self.engines))
+        ]
+        order = [index for index in order if self.down_until[index] <= now]
+        if self.balancing == "least_loaded":
+            # sort is stable, so equally loaded replicas keep their turn order
+            order.sort(key=lambda index: self.open_sessions[index])
+        return order
+    
+    def mark_down(self, index: int) -> None:
+        """Skip a failed replica until READ_REPLICA_RETRY_SECONDS have passed."""
+        self.failures[index] += 1
+        self.down_until[index] = time.monotonic() + self.retry_seconds
+    
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[AsyncSession]:
+        """
+        Open a read-only session on a replica, or on the primary.
+        
+        The replica's connection is checked out up front, so a replica
+        that is down is skipped before the caller runs any query.
+        """
+        if self.engines and not reads_pinned():
+            for index in self.candidates():
+                db = AsyncSessionLocal(bind=self.engines[index])
+                try:
+                    await db.connection()
+                except (exc.SQLAlchemyError, OSError):
+                    await db.close()
+                    self.mark_down(index)
+                    continue
+                
+                self.sessions[index] += 1
+                self.open_sessions[index] += 1
+                try:
+                    yield db
+                except exc.DBAPIError as error:
+                    if error.connection_invalidated:
+                        self.mark_down(index)
+                    raise
+                finally:
+                    self.open_sessions[index] -= 1
+                    await db.close()
+                return
+        
+        self.primary_reads += 1
+        async with AsyncSessionLocal() as db:
+            yield db
+    
+    def status(self) -> dict[str, Any]:
+        """Pool statistics and routing counters per replica, for /health."""
+        now = time.monotonic()
+        return {
+            f"replica_{index}": {
+                **pool_stats(replica.pool),
+                "sessions": self.sessions[index],
+                "open_sessions": self.open_sessions[index],
+                "failures": self.failures[index],
+                "up": self.down_until[index] <= now,
+            }
+            for index, replica in enumerate(self.engines)
+        }
+    
+    async def dispose(self) -> None:
+        for replica in self.engines:
+            await replica.dispose()
+
+
+read_replicas = ReadReplicas(
+    [get_async_database_url(url.strip()) for url in settings.READ_DATABASE_URLS.split(",") if url.strip()],
+    settings.READ_REPLICA_BALANCING,
+    settings.READ_REPLICA_RETRY_SECONDS
+)
+
+
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency that provides a session for read-only routes.
+    
+    Reads from a read replica when READ_DATABASE_URLS is set, otherwise
+    (and when no replica is usable, or the client wrote recently) from
+    the primary. Never write through this session.
+    
+    Example:
+        @app.get("/items")
+        async def get_items(db: AsyncSession = Depends(get_read_db)):
+            result = await db.execute(select(Item))
+            return result.scalars().all()
+    """
+    async with read_replicas.session() as db:
+        yield db
+
+
+def record_write(conn) -> None:
+    """Commit listener marking the current request as having written."""
+    routing = current_routing.get()
+    if routing is not None:
+        routing.wrote = True
+
+
+class ReadYourWritesMiddleware:
+    """
+    ASGI middleware pinning a client's reads to the primary after it writes.
+    
+    A request that commits a transaction on the primary gets a cookie
+    valid for READ_YOUR_WRITES_SECONDS. While a client presents it, its
+    reads skip the replicas, so it sees its own writes however far the
+    replicas lag. The cookie travels with the client, so this works
+    across workers; clients that drop cookies read from the replicas.
+    Needs record_write listening for commits on the primary engine.
+    Without read replicas, requests pass through untouched.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not read_replicas.engines:
+            await self.app(scope, receive, send)
+            return
+        
+        pinned = False
+        for name, value in scope["headers"]:
+            if name == b"cookie":
+                morsel = SimpleCookie(value.decode("latin-1")).get(READ_PIN_COOKIE)
+                try:
+                    pinned = morsel is not None and float(morsel.value) > time.time()
+                except ValueError:
+                    pass
+        
+        routing = ReadRouting(pinned)
+        
+        async def send_with_pin(message):
+            if message["type"] == "http.response.start" and routing.wrote:
+                seconds = settings.READ_YOUR_WRITES_SECONDS
+                cookie = (
+                    f"{READ_PIN_COOKIE}={time.time() + seconds:.3f}; "
+                    f"Max-Age={int(seconds) or 1}; Path=/; HttpOnly; SameSite=Lax"
+                )
+                message["headers"] = [*message.get("headers", []), (b"set-cookie", cookie.encode("latin-1"))]
+            await send(message)
+        
+        token = current_routing.set(routing)
+        try:
+            await self.app(scope, receive, send_with_pin)
+        finally:
+            current_routing.reset(token)
@@ -8,27 +8,98 @@ Author: Ehtisham Ashraf
 Email: kingehtsham0@gmail.com
 """
 
+import asyncio
+import time
+
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
+from sqlalchemy import event, text
+from sqlalchemy.exc import SQLAlchemyError
 
+from app import IMPORT_STARTED
 from app.config import settings
-from app.database import engine, Base
+from app.database import (
+    async_engine, engine, AsyncSessionLocal, ReadYourWritesMiddleware, pool_status, read_replicas, record_write
+)
 from app.routers import auth, products
-
-
-# Create database tables on startup
+from app.utils.cache import product_cache
+from app.utils.changes import compact_change_log
+from app.utils.inventory import maintain_stock_totals
+from app.utils.metrics import MetricsMiddleware, instrument_engine, render_metrics
+from app.utils.migrations import SchemaOutOfDate, check_schema_revision, upgrade_schema
+from app.utils.passwords import password_hasher
+from app.utils.serialization import product_rows, require_orjson, search_rows
+from app.utils.startup import startup_report
+from app.utils.suggest import maintain_suggest_index, suggest_index
+
+
+# Check the database schema on startup
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Lifespan context manager for startup and shutdown events.
-    Creates database tables when the application starts.
+    
+    Checks that the database schema is at the migrations' head revision
+    (upgrading it first when AUTO_MIGRATE is set) instead of creating
+    tables or indexes, and prints how long each startup phase took.
     """
-    # Startup: Create database tables
-    Base.metadata.create_all(bind=engine)
-    print("✅ Database tables created successfully")
+    # Startup: Fail fast if an optional dependency of a setting is missing
+    if settings.FAST_JSON_RESPONSES:
+        require_orjson()
+        # Compile the row validators now rather than on the first request
+        with startup_report.phase("serializers"):
+            product_rows()
+            search_rows()
+    
+    try:
+        # Compare the schema revision with the migrations
+        with startup_report.phase("schema check"):
+            async with async_engine.connect() as conn:
+                schema = await conn.run_sync(check_schema_revision)
+        if schema == "behind":
+            if not settings.AUTO_MIGRATE:
+                raise SchemaOutOfDate(
+                    "The database schema is older than this release: "
+                    "run `alembic upgrade head` or set AUTO_MIGRATE=true"
+                )
+            with startup_report.phase("migrations"):
+                await asyncio.to_thread(upgrade_schema)
+        elif schema == "ahead":
+            print("⚠️ Database schema is newer than this release")
+    except BaseException:
+        # Pooled connections would keep the failed process alive
+        await async_engine.dispose()
+        raise
+    
+    # Background work: build the autocomplete index (/products/suggest
+    # answers 503 until it is ready), compact the change log and refresh
+    # the displayed stock of sharded products
+    background = []
+    if settings.SUGGEST_ENABLED:
+        background.append(asyncio.create_task(
+            maintain_suggest_index(suggest_index, AsyncSessionLocal, settings.SUGGEST_REFRESH_SECONDS)
+        ))
+    if settings.CHANGE_LOG_COMPACT_SECONDS > 0:
+        background.append(asyncio.create_task(
+            compact_change_log(async_engine, settings.CHANGE_LOG_COMPACT_SECONDS)
+        ))
+    if settings.STOCK_REFRESH_SECONDS > 0:
+        background.append(asyncio.create_task(
+            maintain_stock_totals(async_engine, settings.STOCK_REFRESH_SECONDS)
+        ))
+    
+    print(f"✅ Started in {startup_report.summary()}")
     yield
-    # Shutdown: Clean up resources if needed
+    # Shutdown: Stop the background work, release pooled connections
+    for task in background:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await async_engine.dispose()
+    await read_replicas.dispose()
+    password_hasher.shutdown()
     print("👋 Application shutting down")
 
 
@@ -65,6 +136,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Read-your-writes: after a client commits a write, its reads skip the
+# replicas for READ_YOUR_WRITES_SECONDS (a no-op without replicas)
+if settings.READ_YOUR_WRITES_SECONDS > 0:
+    app.add_middleware(ReadYourWritesMiddleware)
+    event.listen(async_engine.sync_engine, "commit", record_write)
+
+# Request metrics, served at /metrics. Added last so it wraps every
+# other middleware and times the whole request.
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    instrument_engine(engine)
+    instrument_engine(async_engine.sync_engine)
+    for replica in read_replicas.engines:
+        instrument_engine(replica.sync_engine)
+
 
 # Include routers
 # Each router handles a specific group of endpoints
@@ -100,8 +186,38 @@ async def root():
 async def health_check():
     """
     Health check endpoint for monitoring services.
+    
+    Runs a trivial query; answers 503 if the database cannot be reached.
     """
-    return {
-        "status": "healthy",
-        "database": "connected"
-    }
+    try:
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        database = "connected"
+    except (SQLAlchemyError, OSError):
+        database = "unavailable"
+    
+    healthy = database == "connected"
+    return JSONResponse(
+        status_code=200 if healthy else 503,
+        content={
+            "status": "healthy" if healthy else "unhealthy",
+            "database": database,
+            "database_pool": pool_status(),
+            "cache": product_cache.stats(),
+            "password_hashing": password_hasher.stats(),
+            "suggest_index": suggest_index.stats(),
+            "startup": startup_report.as_dict()
+        }
+    )
+
+
+@app.get("/metrics", tags=["Health"], response_class=PlainTextResponse)
+async def metrics():
+    """
+    Request metrics of this worker in the Prometheus text format.
+    """
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+# Everything above ran at import; the lifespan adds the init phases
+startup_report.record("import", time.perf_counter() - IMPORT_STARTED)
@@ -1,3 +1,6 @@
 # Models package
 from app.models.user import User
 from app.models.product import Product
+from app.models.product_facet import ProductFacet
+from app.models.product_stock_shard import ProductStockShard
+from app.models.product_change import ProductChange
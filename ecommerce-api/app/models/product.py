@@ -4,7 +4,9 @@ Product Model
 Defines the Product database model for e-commerce functionality.
 """
 
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Index, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
@@ -21,7 +23,10 @@ class Product(Base):
         description: Detailed product description
         price: Product price (stored as float)
         category: Product category for filtering
-        stock_quantity: Available inventory count
+        stock_quantity: Available inventory count (for sharded stock, the
+            shard total as of the last reservation)
+        stock_shards: Number of stock counter shards, 0 when the stock is
+            kept in stock_quantity
         image_url: URL to product image
         is_active: Whether product is available for sale
         owner_id: Foreign key to the user who created the product
@@ -30,6 +35,28 @@ class Product(Base):
     """
     
     __tablename__ = "products"
+    __table_args__ = (
+        # Access paths of the list routes. Every list query filters on
+        # is_active = true, so the indexes only cover active rows. Each one
+        # serves one keyset sort order, with or without a category filter;
+        # price ranges are answered from the price indexes.
+        Index(
+            "ix_products_active_created_at_id", "created_at", "id",
+            sqlite_where=text("is_active = 1"), postgresql_where=text("is_active"),
+        ),
+        Index(
+            "ix_products_active_price_id", "price", "id",
+            sqlite_where=text("is_active = 1"), postgresql_where=text("is_active"),
+        ),
+        Index(
+            "ix_products_active_category_created_at_id", "category", "created_at", "id",
+            sqlite_where=text("is_active = 1"), postgresql_where=text("is_active"),
+        ),
+        Index(
+            "ix_products_active_category_price_id", "category", "price", "id",
+            sqlite_where=text("is_active = 1"), postgresql_where=text("is_active"),
+        ),
+    )
     
     # Primary key
     id = Column(Integer, primary_key=True, index=True)
@@ -42,6 +69,7 @@ class Product(Base):
     
     # Inventory
     stock_quantity = Column(Integer, default=0)
+    stock_shards = Column(Integer, nullable=False, default=0, server_default="0")
     
     # Media
     image_url = Column(String(500), nullable=True)
@@ -50,11 +78,13 @@ class Product(Base):
     is_active = Column(Boolean, default=True)
     
     # Foreign keys
-    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Set in Python rather than by the database: SQLite's CURRENT_TIMESTAMP
+    # has whole-second precision, and updated_at versions the product ETag
+    updated_at = Column(DateTime(timezone=True), onupdate=lambda: datetime.now(timezone.utc))
     
     # Relationships
     owner = relationship("User", back_populates="products")
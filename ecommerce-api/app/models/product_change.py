@@ -0,0 +1,44 @@
+"""
+Product Change Model
+
+Defines the append-only log behind the catalog change feed.
+"""
+
+from sqlalchemy import Boolean, Column, DateTime, Index, Integer
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class ProductChange(Base):
+    """
+    One entry of the catalog change log.
+    
+    Every product write appends an entry in the same transaction, so
+    GET /products/changes can return what changed after a cursor (see
+    app.utils.changes). Entries superseded by a newer entry for the same
+    product are removed by compaction.
+    
+    Attributes:
+        seq: Position in the log, increasing in commit order
+        product_id: The product that changed (no foreign key, so
+            tombstones outlive hard-deleted products)
+        deleted: Whether the write removed the product (soft delete)
+        changed_at: When the entry was written
+    """
+    
+    __tablename__ = "product_changes"
+    __table_args__ = (
+        # Compaction looks for newer entries of the same product
+        Index("ix_product_changes_product_id_seq", "product_id", "seq"),
+        # Never reuse the seq of a deleted entry as a new one
+        {"sqlite_autoincrement": True},
+    )
+    
+    seq = Column(Integer, primary_key=True)
+    product_id = Column(Integer, nullable=False)
+    deleted = Column(Boolean, nullable=False, default=False)
+    changed_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<ProductChange(seq={self.seq}, product_id={self.product_id}, deleted={self.deleted})>"
@@ -0,0 +1,33 @@
+"""
+Product Facet Model
+
+Defines the summary table behind the product facet counts.
+"""
+
+from sqlalchemy import Column, Float, Integer, String
+
+from app.database import Base
+
+
+class ProductFacet(Base):
+    """
+    Number of active products per category and price bucket.
+    
+    Rows are maintained by database triggers on the products table (see
+    app.utils.facets), so every write path, including bulk imports, keeps
+    the counts current without application code.
+    
+    Attributes:
+        category: Product category, or "" for uncategorized products
+        price_from: Lower bound of the price bucket (see PRICE_BUCKETS)
+        product_count: Active products in this category and bucket
+    """
+    
+    __tablename__ = "product_facets"
+    
+    category = Column(String(100), primary_key=True)
+    price_from = Column(Float, primary_key=True)
+    product_count = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<ProductFacet(category={self.category}, price_from={self.price_from}, count={self.product_count})>"
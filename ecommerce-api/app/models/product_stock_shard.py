@@ -0,0 +1,34 @@
+"""
+Product Stock Shard Model
+
+Defines the sharded stock counters used for high-contention products.
+"""
+
+from sqlalchemy import Column, ForeignKey, Integer
+
+from app.database import Base
+
+
+class ProductStockShard(Base):
+    """
+    One slice of a sharded product's stock.
+    
+    A product with stock_shards > 0 keeps its stock split across this
+    many rows instead of in products.stock_quantity, so concurrent
+    reservations update different rows rather than queueing on one
+    (see app.utils.inventory).
+    
+    Attributes:
+        product_id: Foreign key to the product
+        shard: Shard number, from 0 to stock_shards - 1
+        quantity: Units held by this shard
+    """
+    
+    __tablename__ = "product_stock_shards"
+    
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    shard = Column(Integer, primary_key=True)
+    quantity = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<ProductStockShard(product_id={self.product_id}, shard={self.shard}, quantity={self.quantity})>"
@@ -22,6 +22,8 @@ class User(Base):
         full_name: User's display name
         is_active: Whether the user account is active
         is_admin: Whether the user has admin privileges
+        token_version: Version stamp embedded in access tokens; bumped to
+            revoke every token issued so far
         created_at: Account creation timestamp
         updated_at: Last update timestamp
     """
@@ -41,6 +43,7 @@ class User(Base):
     # Status flags
     is_active = Column(Boolean, default=True)
     is_admin = Column(Boolean, default=False)
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
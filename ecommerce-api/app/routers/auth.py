@@ -6,19 +6,28 @@ Handles user registration, login, and profile endpoints.
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User
-from app.schemas.user import UserCreate, UserResponse, Token
-from app.utils.security import hash_password, verify_password, create_access_token, get_current_user
+from app.schemas.user import UserCreate, UserResponse, UserStatusUpdate, Token
+from app.utils.security import (
+    Principal,
+    hash_password_async,
+    verify_password_async,
+    create_user_token,
+    revoke_user_tokens,
+    get_current_principal,
+    get_current_user,
+)
 
 
 router = APIRouter()
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Register a new user account.
     
@@ -27,9 +36,11 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     - **full_name**: Optional display name
     
     Returns the created user data (without password).
+    Answers 503 when too many passwords are already waiting to be hashed.
     """
     # Check if email already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    result = await db.execute(select(User).where(User.email == user_data.email))
+    existing_user = result.scalars().first()
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -39,14 +50,14 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     # Create new user with hashed password
     new_user = User(
         email=user_data.email,
-        hashed_password=hash_password(user_data.password),
+        hashed_password=await hash_password_async(user_data.password),
         full_name=user_data.full_name
     )
     
     # Save to database
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     
     return new_user
 
@@ -54,7 +65,7 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
 @router.post("/login", response_model=Token)
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Authenticate user and return JWT access token.
@@ -63,12 +74,17 @@ async def login(
     - **password**: User's password
     
     Returns a JWT token for authenticating subsequent requests.
+    Answers 503 when too many logins are already waiting to be hashed.
     """
     # Find user by email
-    user = db.query(User).filter(User.email == form_data.username).first()
+    result = await db.execute(select(User).where(User.email == form_data.username))
+    user = result.scalars().first()
     
-    # Verify user exists and password is correct
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    # Verify user exists and password is correct (off the event loop)
+    password_ok, new_hash = False, None
+    if user:
+        password_ok, new_hash = await verify_password_async(form_data.password, user.hashed_password)
+    if not user or not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -82,8 +98,13 @@ async def login(
             detail="Account is deactivated"
         )
     
-    # Create access token with email as subject
-    access_token = create_access_token(data={"sub": user.email})
+    # Upgrade the stored hash if BCRYPT_ROUNDS changed since it was made
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+    
+    # Create access token with user id as subject plus status claims
+    access_token = create_user_token(user)
     
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -96,3 +117,45 @@ async def get_current_user_profile(current_user: User = Depends(get_current_user
     Requires a valid JWT token in the Authorization header.
     """
     return current_user
+
+
+@router.put("/users/{user_id}/status", response_model=UserResponse)
+async def update_user_status(
+    user_id: int,
+    status_data: UserStatusUpdate,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Activate/deactivate a user or change their admin flag.
+    
+    Requires admin privileges. Any change revokes the user's existing
+    tokens, so the new status applies from their next request.
+    """
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required"
+        )
+    
+    user = await db.get(User, user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"User with id {user_id} not found"
+        )
+    
+    # Update only provided fields, revoking tokens if anything changed
+    update_data = status_data.model_dump(exclude_unset=True)
+    changed = False
+    for field, value in update_data.items():
+        if value is not None and getattr(user, field) != value:
+            setattr(user, field, value)
+            changed = True
+    
+    if changed:
+        revoke_user_tokens(user)
+        await db.commit()
+        await db.refresh(user)
+    
+    return user
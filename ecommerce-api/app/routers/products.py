@@ -4,103 +4,794 @@ Products Router
 Handles all product CRUD operations and search functionality.
 """
 
-from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+import json
+from datetime import datetime
+from math import ceil
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Select, String, case, func, insert, select, true, tuple_, type_coerce, update
 
-from app.database import get_db
+from app.config import settings
+from app.database import get_async_db, get_read_db, read_replicas, reads_pinned
 from app.models.product import Product
-from app.models.user import User
-from app.schemas.product import ProductCreate, ProductUpdate, ProductResponse, ProductList
-from app.utils.security import get_current_user
+from app.models.product_facet import ProductFacet
+from app.schemas.product import (
+    ProductCreate, ProductUpdate, ProductResponse, ProductList, ProductSearchResult, ProductFacets,
+    ProductBatchRequest, ProductBatch, BulkImportReport, StockReservation, StockShardsUpdate, StockShardsResponse,
+    ProductSuggestion, CategorySuggestion, ProductSuggestions, ProductChangeFeed
+)
+from app.utils.bulk import import_products, iter_lines, parse_csv, parse_ndjson
+from app.utils.cache import product_cache
+from app.utils.changes import latest_seq, read_changes, record_changes
+from app.utils.export import EXPORT_COLUMNS, MEDIA_TYPES, require_pyarrow, stream_export
+from app.utils.facets import UNCATEGORIZED, get_product_facets
+from app.utils.inventory import InsufficientStock, ProductNotFound, reserve_stock, set_stock_shards
+from app.utils.http_cache import (
+    cache_headers, catalog_etag, etag_matches, fieldset_etag, not_modified, product_etag, validated_response
+)
+from app.utils.pagination import CountCache, decode_cursor, encode_cursor
+from app.utils.search import build_fuzzy_query, build_search_query, pg_similarity_threshold
+from app.utils.security import Principal, get_current_principal, get_optional_principal
+from app.utils.serialization import (
+    FastJSONResponse, parse_fields, product_rows, search_results, search_rows, sparse_row, sparse_rows
+)
+from app.utils.suggest import IndexedProduct, suggest_index
 
 
 router = APIRouter()
 
 
-@router.get("/", response_model=list[ProductResponse])
+# Cached list totals, keyed by filter set
+product_counts = CountCache(ttl_seconds=settings.PRODUCT_COUNT_CACHE_SECONDS)
+
+FIELDS_DESCRIPTION = "Comma-separated fields to return, e.g. name,price,image_url (default: all)"
+
+
+def requested_fields(fields: Optional[str], model=ProductResponse) -> Optional[tuple[str, ...]]:
+    """
+    Parse a `fields=` parameter against a response model.
+    
+    Raises:
+        HTTPException: 400 if a field does not exist
+    """
+    try:
+        return parse_fields(fields, model)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc)
+        )
+
+
+def apply_product_filters(
+    query: Select,
+    category: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    is_active: Optional[bool] = True
+) -> Select:
+    """
+    Restrict a select to products matching the list filters.
+    
+    Shared by the list query, its total count and the export so they
+    always agree. Only active products match unless is_active says
+    otherwise (None matches both).
+    """
+    if is_active is not None:
+        query = query.where(Product.is_active == is_active)
+    
+    if category:
+        query = query.where(Product.category == category)
+    if min_price is not None:
+        query = query.where(Product.price >= min_price)
+    if max_price is not None:
+        query = query.where(Product.price <= max_price)
+    
+    return query
+
+
+def product_sort_key(sort: str, dialect_name: str):
+    """
+    Get the column expression used as the keyset sort key.
+    
+    SQLite stores the server default created_at as text without fractional
+    seconds, while bound datetimes are rendered with ".000000". Comparing
+    the raw text there keeps equal timestamps equal, so no rows are skipped.
+    """
+    if sort == "price":
+        return Product.price
+    if dialect_name == "sqlite":
+        return type_coerce(Product.created_at, String)
+    return Product.created_at
+
+
+def build_page_query(
+    dialect_name: str,
+    sort: str = "created_at",
+    order: str = "asc",
+    category: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    after: Optional[tuple] = None,
+    plain_rows: bool = False,
+    fields: Optional[tuple[str, ...]] = None
+) -> Select:
+    """
+    Build the keyset query behind GET /products/.
+    
+    Selects each Product plus its sort key (labelled "sort_key") in
+    (sort key, id) order, without a LIMIT. With plain_rows, the product
+    columns are selected instead of the entity, for the fast
+    serialization path; with fields, only those columns are.
+    
+    Args:
+        dialect_name: SQLAlchemy dialect name of the target database
+        sort: "created_at" or "price"
+        order: "asc" or "desc"
+        category: Optional category filter
+        min_price: Optional minimum price
+        max_price: Optional maximum price
+        after: (sort key, id) of the previous page's last row, if any
+        plain_rows: Select product columns rather than Product objects
+        fields: Select only these product columns (must include "id")
+    
+    Returns:
+        Select for the page
+    """
+    sort_key = product_sort_key(sort, dialect_name)
+    if fields is not None:
+        product = [Product.__table__.c[name] for name in fields]
+    else:
+        product = Product.__table__.c if plain_rows else [Product]
+    query = apply_product_filters(
+        select(*product, sort_key.label("sort_key")), category, min_price, max_price
+    )
+    
+    if after is not None:
+        position = tuple_(sort_key, Product.id)
+        if order == "asc":
+            query = query.where(position > after)
+        else:
+            query = query.where(position < after)
+    
+    if order == "asc":
+        return query.order_by(sort_key.asc(), Product.id.asc())
+    return query.order_by(sort_key.desc(), Product.id.desc())
+
+
+async def count_products(
+    db: AsyncSession,
+    category: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None
+) -> int:
+    """
+    Count active products matching the filters.
+    
+    Served from product_counts when fresh, so list calls do not run a
+    full COUNT(*) each time. Write routes clear the cache.
+    """
+    key = (category, min_price, max_price)
+    total = product_counts.get(key)
+    
+    if total is None:
+        query = apply_product_filters(select(func.count(Product.id)), category, min_price, max_price)
+        total = await db.scalar(query)
+        product_counts.set(key, total)
+    
+    return total
+
+
+async def render_product_page(
+    db: AsyncSession,
+    cursor: Optional[str],
+    limit: int,
+    sort: str,
+    order: str,
+    category: Optional[str],
+    min_price: Optional[float],
+    max_price: Optional[float],
+    fields: Optional[tuple[str, ...]] = None
+) -> str:
+    """
+    Query one page of the product list and serialize it.
+    
+    With fields, only those columns are read and only those keys are
+    written for each product.
+    
+    Returns:
+        str: The ProductList JSON document
+    
+    Raises:
+        HTTPException: 400 if the cursor is invalid
+    """
+    dialect_name = db.bind.dialect.name
+    
+    # Resume right after the last row of the previous page
+    page = 1
+    after = None
+    if cursor:
+        try:
+            state = decode_cursor(cursor)
+            if state["sort"] != sort or state["order"] != order:
+                raise ValueError("Cursor does not match sort order")
+            last_key, last_id, page = state["key"], int(state["id"]), int(state["page"])
+            if sort == "created_at" and dialect_name != "sqlite":
+                last_key = datetime.fromisoformat(last_key)
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        after = (last_key, last_id)
+    
+    fast = settings.FAST_JSON_RESPONSES
+    query = build_page_query(
+        dialect_name, sort, order, category, min_price, max_price, after, plain_rows=fast, fields=fields
+    )
+    
+    # Fetch one extra row to learn whether another page exists
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_row = rows[-1]
+        last_key = last_row.sort_key
+        next_cursor = encode_cursor({
+            "sort": sort,
+            "order": order,
+            "key": last_key.isoformat() if isinstance(last_key, datetime) else last_key,
+            "id": last_row.id if fast or fields else last_row.Product.id,
+            "page": page + 1,
+        })
+    
+    total = await count_products(db, category, min_price, max_price)
+    
+    if fields:
+        # Validate and encode the selected columns in one call each
+        adapter = sparse_rows(ProductResponse, fields)
+        items = adapter.dump_json(adapter.validate_python([row._asdict() for row in rows])).decode()
+        page_meta = json.dumps(
+            {"total": total, "page": page, "pages": ceil(total / limit), "next_cursor": next_cursor},
+            separators=(",", ":")
+        )
+        return f'{{"items":{items},{page_meta[1:]}'
+    
+    if fast:
+        # Validate every row in one call and encode with orjson
+        return FastJSONResponse({
+            "items": product_rows().validate_python([row._asdict() for row in rows]),
+            "total": total,
+            "page": page,
+            "pages": ceil(total / limit),
+            "next_cursor": next_cursor,
+        }).body.decode()
+    
+    page_data = ProductList(
+        items=[ProductResponse.model_validate(product) for product, _ in rows],
+        total=total,
+        page=page,
+        pages=ceil(total / limit),
+        next_cursor=next_cursor,
+    )
+    return page_data.model_dump_json()
+
+
+def writable_by(principal: Principal):
+    """WHERE clause for the products a caller may change: their own, or any for an admin."""
+    return true() if principal.is_admin else Product.owner_id == principal.id
+
+
+async def write_refused(db: AsyncSession, product_id: int, action: str) -> HTTPException:
+    """
+    Explain why a conditional product write matched no row.
+    
+    Only called once the write has matched nothing, so successful writes
+    never pay for this lookup.
+    
+    Args:
+        db: Database session
+        product_id: Product the write targeted
+        action: Verb for the 403 message ("update", "delete")
+    
+    Returns:
+        404 if the product does not exist, else 403
+    """
+    if await db.scalar(select(Product.id).where(Product.id == product_id)) is None:
+        return HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Product with id {product_id} not found"
+        )
+    return HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail=f"Not authorized to {action} this product"
+    )
+
+
+@router.get("/", response_model=ProductList)
 async def get_products(
-    skip: int = Query(0, ge=0, description="Number of items to skip"),
+    request: Request,
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
     limit: int = Query(10, ge=1, le=100, description="Number of items to return"),
+    sort: Literal["created_at", "price"] = Query("created_at", description="Sort key"),
+    order: Literal["asc", "desc"] = Query("asc", description="Sort direction"),
     category: Optional[str] = Query(None, description="Filter by category"),
     min_price: Optional[float] = Query(None, ge=0, description="Minimum price"),
     max_price: Optional[float] = Query(None, ge=0, description="Maximum price"),
-    db: Session = Depends(get_db)
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
 ):
     """
-    Get a list of all active products with optional filtering.
+    Get a page of active products with optional filtering.
     
-    - **skip**: Number of items to skip for pagination
+    Uses keyset pagination: pass the returned `next_cursor` to fetch the
+    next page. Every page costs the same, however deep the client pages.
+    
+    - **cursor**: Opaque cursor from a previous response
     - **limit**: Maximum number of items to return (max 100)
+    - **sort**: Order by `created_at` or `price` (ties broken by id)
+    - **order**: `asc` or `desc`
     - **category**: Filter products by category
     - **min_price**: Filter products with price >= min_price
     - **max_price**: Filter products with price <= max_price
+    - **fields**: Return only these product fields (`id` is always included)
+    
+    Pages are served from the product cache when possible, and carry an
+    ETag that changes with any product write (see If-None-Match).
+    Concurrent requests for the same page share one query. With `fields`,
+    only the requested columns are read from the database.
     """
-    # Start with base query for active products
-    query = db.query(Product).filter(Product.is_active == True)
+    params = {
+        "cursor": cursor, "limit": limit, "sort": sort, "order": order,
+        "category": category, "min_price": min_price, "max_price": max_price,
+        "fields": requested_fields(fields),
+    }
     
-    # Apply filters if provided
-    if category:
-        query = query.filter(Product.category == category)
-    if min_price is not None:
-        query = query.filter(Product.price >= min_price)
-    if max_price is not None:
-        query = query.filter(Product.price <= max_price)
+    # Serve the page from cache if this exact query was answered recently
+    cache_key = etag = None
+    if product_cache.enabled:
+        cache_key = await product_cache.list_key(params)
+        etag = catalog_etag(cache_key)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        cached = await product_cache.get(cache_key, "list")
+        if cached is not None:
+            return Response(content=cached, media_type="application/json", headers=cache_headers(etag))
+    
+    async def load_page() -> str:
+        # Its own session: the flight may outlive the request that started it
+        async with read_replicas.session() as db:
+            payload = await render_product_page(db, **params)
+        if cache_key:
+            await product_cache.set(cache_key, payload)
+        return payload
     
-    # Apply pagination and return results
-    products = query.offset(skip).limit(limit).all()
-    return products
+    flight_key = ("list", reads_pinned(), *params.values())
+    payload = await product_cache.flights.run(flight_key, load_page)
+    
+    return validated_response(request, payload, etag)
 
 
-@router.get("/search", response_model=list[ProductResponse])
+async def product_batch_response(product_ids: list[int], db: AsyncSession) -> Response:
+    """
+    Build the batch fetch response for a list of product IDs.
+    
+    Cached products are looked up with one multi-key cache read and the
+    rest are loaded with a single `IN` query, so a batch costs at most one
+    round trip to each. Products loaded from the database are cached the
+    same way as by GET /products/{product_id}, so both endpoints share
+    entries.
+    
+    Args:
+        product_ids: Requested IDs; duplicates are returned once
+        db: Database session
+    
+    Returns:
+        Response: Serialized ProductBatch
+    """
+    ids = list(dict.fromkeys(product_ids))
+    if len(ids) > settings.PRODUCT_BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.PRODUCT_BATCH_MAX_IDS} product ids per batch"
+        )
+    
+    # Cached entries are stored as "<etag>\n<json>"
+    payloads: dict[int, str] = {}
+    cached = await product_cache.get_many([product_cache.product_key(product_id) for product_id in ids], "product")
+    for product_id, entry in zip(ids, cached):
+        if entry is not None:
+            payloads[product_id] = entry.split("\n", 1)[1]
+    
+    uncached = [product_id for product_id in ids if product_id not in payloads]
+    if uncached:
+        generation = await product_cache.generation()
+        result = await db.execute(select(Product).where(Product.id.in_(uncached)))
+        entries = {}
+        for product in result.scalars():
+            payload = ProductResponse.model_validate(product).model_dump_json()
+            payloads[product.id] = payload
+            etag = product_etag(product.id, product.updated_at, product.created_at)
+            entries[product_cache.product_key(product.id)] = f"{etag}\n{payload}"
+        await product_cache.set_products(entries, generation)
+    
+    # Splice the serialized products together in request order
+    items = ",".join(payloads[product_id] for product_id in ids if product_id in payloads)
+    missing = [product_id for product_id in ids if product_id not in payloads]
+    return Response(
+        content=f'{{"items":[{items}],"missing":{json.dumps(missing)}}}',
+        media_type="application/json"
+    )
+
+
+@router.get("/search", response_model=list[ProductSearchResult])
 async def search_products(
+    request: Request,
     q: str = Query(..., min_length=1, description="Search query"),
     limit: int = Query(10, ge=1, le=50, description="Number of results"),
-    db: Session = Depends(get_db)
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    fuzzy: bool = Query(False, description="Match product names by trigram similarity, tolerating typos"),
+    threshold: Optional[float] = Query(
+        None, gt=0, le=1, description="Least similarity of a fuzzy match (default FUZZY_SEARCH_THRESHOLD)"
+    ),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Search products by name or description.
     
+    Uses the full-text index, ranked by relevance (BM25 on SQLite,
+    ts_rank on PostgreSQL). The last word also matches as a prefix.
+    
     - **q**: Search query string (searches in name and description)
     - **limit**: Maximum number of results to return
+    - **fields**: Return only these result fields (`id` is always included)
+    - **fuzzy**: Search product names by trigram similarity instead, so
+      misspelled words still match
+    - **threshold**: Least similarity (0-1) of a fuzzy match
+    
+    Each result includes a `rank` and a highlighted `snippet`, unless
+    `fields` leaves them out, in which case they are not computed. Fuzzy
+    results are ranked by similarity (1.0: the name contains the whole
+    query) and have no snippet; both use a trigram index.
+    """
+    selected = requested_fields(fields, ProductSearchResult)
+    if fuzzy and threshold is None:
+        threshold = settings.FUZZY_SEARCH_THRESHOLD
+    
+    etag = None
+    if product_cache.enabled:
+        cache_key = await product_cache.list_key({
+            "view": "search", "q": q, "limit": limit, "fields": selected, "fuzzy": fuzzy, "threshold": threshold,
+        })
+        etag = catalog_etag(cache_key)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+    
+    dialect_name = db.bind.dialect.name
+    if fuzzy:
+        query = build_fuzzy_query(dialect_name, q, limit, threshold, selected)
+        if query is not None and dialect_name == "postgresql":
+            await db.execute(pg_similarity_threshold(threshold))
+    else:
+        query = build_search_query(dialect_name, q, limit, selected)
+    if query is None:
+        return validated_response(request, b"[]", etag)
+    
+    result = await db.execute(query)
+    rows = result.mappings().all()
+    if selected:
+        adapter = sparse_rows(ProductSearchResult, selected)
+        payload = adapter.dump_json(adapter.validate_python(rows))
+    elif settings.FAST_JSON_RESPONSES:
+        payload = FastJSONResponse(search_rows().validate_python(rows)).body
+    else:
+        payload = search_results().dump_json([ProductSearchResult.model_validate(row) for row in rows])
+    return validated_response(request, payload, etag)
+
+
+@router.get("/changes", response_model=ProductChangeFeed)
+async def get_product_changes(
+    since: Optional[str] = Query(None, description="next_cursor of the previous call"),
+    limit: int = Query(100, ge=1, le=1000, description="Most changes to read"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get the products created, updated or deleted since a cursor.
+    
+    For keeping a copy of the catalog in sync without re-paging it:
+    
+    1. Call without `since` to get a cursor at the current end of the log
+    2. Copy the catalog (`GET /products/` or `/products/export`)
+    3. Call with `since` set to the latest `next_cursor`, repeating while
+       `has_more` is true, then poll
+    
+    Each changed product is listed once per page with its current state;
+    `deleted` products should be dropped. The cost depends on the number
+    of changes read, not on the size of the catalog. Stock taken by
+    reservations is not reported.
+    """
+    if since is None:
+        return ProductChangeFeed(items=[], next_cursor=encode_cursor({"seq": await latest_seq(db)}), has_more=False)
+    
+    try:
+        after_seq = int(decode_cursor(since)["seq"])
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    
+    feed = await read_changes(db, after_seq, limit)
+    return Response(content=feed.model_dump_json(), media_type="application/json")
+
+
+@router.get("/suggest", response_model=ProductSuggestions)
+async def suggest_products(
+    prefix: str = Query(..., min_length=1, max_length=100, description="Text typed so far"),
+    limit: int = Query(10, ge=1, le=50, description="Most products and most categories returned")
+):
+    """
+    Suggest product names and categories while the user types.
+    
+    Served from an in-memory prefix index, without a database query.
+    Matching ignores case and repeated spaces.
+    
+    - **prefix**: Beginning of a product name or category
+    - **limit**: Maximum number of products, and of categories
+    
+    Products are ordered by stock, categories by their number of active
+    products. Answers 503 while the index is loading, and 404 when
+    SUGGEST_ENABLED is off. Writes from other workers appear after the
+    next reload (SUGGEST_REFRESH_SECONDS).
+    """
+    if not settings.SUGGEST_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Autocomplete is disabled"
+        )
+    if not suggest_index.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Autocomplete index is loading",
+            headers={"Retry-After": "5"}
+        )
+    
+    products, categories = suggest_index.search(prefix, limit)
+    suggestions = ProductSuggestions(
+        products=[
+            ProductSuggestion(id=product_id, name=name, stock_quantity=stock)
+            for product_id, name, stock in products
+        ],
+        categories=[CategorySuggestion(category=category, count=count) for category, count in categories]
+    )
+    return Response(content=suggestions.model_dump_json(), media_type="application/json")
+
+
+@router.get("/facets", response_model=ProductFacets)
+async def get_facets(
+    request: Request,
+    category: Optional[str] = Query(None, description="Filter by category"),
+    min_price: Optional[float] = Query(None, ge=0, description="Minimum price"),
+    max_price: Optional[float] = Query(None, ge=0, description="Maximum price"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get category and price bucket counts for the current filters.
+    
+    - **category**, **min_price**, **max_price**: Same filters as the list
+    
+    Category counts apply the price filter and price bucket counts the
+    category filter, so each facet still shows the alternatives to the
+    current choice. `total` applies every filter.
+    
+    Counts come from a summary table kept current by database triggers,
+    so the cost does not depend on the catalog size. Price filters on
+    bucket bounds are cheapest. Responses are cached like list pages.
+    """
+    cache_key = etag = None
+    if product_cache.enabled:
+        cache_key = await product_cache.list_key({
+            "view": "facets", "category": category, "min_price": min_price, "max_price": max_price,
+        })
+        etag = catalog_etag(cache_key)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        cached = await product_cache.get(cache_key, "facets")
+        if cached is not None:
+            return Response(content=cached, media_type="application/json", headers=cache_headers(etag))
+    
+    facets = await get_product_facets(db, category, min_price, max_price)
+    payload = facets.model_dump_json()
+    if cache_key:
+        await product_cache.set(cache_key, payload)
+    
+    return validated_response(request, payload, etag)
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_products(
+    format: Literal["ndjson", "csv", "parquet"] = Query("ndjson", description="File format"),
+    category: Optional[str] = Query(None, description="Filter by category"),
+    min_price: Optional[float] = Query(None, ge=0, description="Minimum price"),
+    max_price: Optional[float] = Query(None, ge=0, description="Maximum price"),
+    is_active: bool = Query(True, description="Export active (true) or deactivated (false) products"),
+    principal: Optional[Principal] = Depends(get_optional_principal)
+):
+    """
+    Download every product matching the filters as one file.
+    
+    - **format**: `ndjson`, `csv` or `parquet` (Parquet needs pyarrow)
+    - **category**, **min_price**, **max_price**: Same filters as the list
+    - **is_active**: Export active or deactivated products. Deactivated
+      products need authentication: admins get all of them, other users
+      only their own.
+    
+    Rows are streamed in id order straight from the database, so the
+    download starts at once and any catalog size can be exported. CSV
+    output can be fed back to `POST /products/bulk`.
+    """
+    if format == "parquet":
+        try:
+            require_pyarrow()
+        except RuntimeError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_501_NOT_IMPLEMENTED,
+                detail=str(exc)
+            )
+    
+    columns = [Product.__table__.c[name] for name in EXPORT_COLUMNS]
+    query = apply_product_filters(select(*columns), category, min_price, max_price, is_active)
+    if not is_active:
+        if principal is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Authentication required to export deactivated products",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        query = query.where(writable_by(principal))
+    
+    return StreamingResponse(
+        stream_export(query.order_by(Product.id), format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="products.{format}"'}
+    )
+
+
+@router.get("/batch", response_model=ProductBatch)
+async def get_product_batch(
+    ids: str = Query(..., description="Comma-separated product IDs, e.g. 12,7,31"),
+    db: AsyncSession = Depends(get_read_db)
+):
     """
-    # Search in name and description using LIKE
-    search_term = f"%{q}%"
-    products = db.query(Product).filter(
-        Product.is_active == True,
-        or_(
-            Product.name.ilike(search_term),
-            Product.description.ilike(search_term)
+    Get several products by ID in one request.
+    
+    - **ids**: Comma-separated product IDs (at most PRODUCT_BATCH_MAX_IDS)
+    
+    Products are returned in the requested order; IDs with no product are
+    listed in `missing`. Use `POST /products/batch` for lists too long for
+    a URL.
+    """
+    try:
+        product_ids = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be a comma-separated list of integers"
         )
-    ).limit(limit).all()
     
-    return products
+    if not product_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must list at least one product id"
+        )
+    
+    return await product_batch_response(product_ids, db)
+
+
+@router.post("/batch", response_model=ProductBatch)
+async def post_product_batch(batch: ProductBatchRequest, db: AsyncSession = Depends(get_read_db)):
+    """
+    Get several products by ID, with the IDs in the request body.
+    
+    Same as `GET /products/batch`, for ID lists too long for a URL.
+    
+    - **ids**: Product IDs (at most PRODUCT_BATCH_MAX_IDS)
+    """
+    return await product_batch_response(batch.ids, db)
 
 
 @router.get("/{product_id}", response_model=ProductResponse)
-async def get_product(product_id: int, db: Session = Depends(get_db)):
+async def get_product(
+    product_id: int,
+    request: Request,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
+):
     """
     Get a single product by its ID.
     
     - **product_id**: The unique identifier of the product
+    - **fields**: Return only these product fields (`id` is always included)
+    
+    The ETag changes whenever the product does; send it back in
+    If-None-Match to get an empty 304 if the product is unchanged.
+    Concurrent requests for an uncached product share one query.
+    
+    A sparse response is cut from the cached product when there is one;
+    otherwise only the requested columns are read, and not cached.
     """
-    product = db.query(Product).filter(Product.id == product_id).first()
+    selected = requested_fields(fields)
     
-    if not product:
+    # Cached entries are stored as "<etag>\n<json>"
+    cache_key = product_cache.product_key(product_id)
+    cached = await product_cache.get(cache_key, "product")
+    if cached is not None:
+        etag, payload = cached.split("\n", 1)
+        if selected:
+            etag = fieldset_etag(etag, selected)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        if selected:
+            adapter = sparse_row(ProductResponse, selected)
+            payload = adapter.dump_json(adapter.validate_json(payload))
+        return Response(content=payload, media_type="application/json", headers=cache_headers(etag))
+    
+    # Revalidation only needs the timestamps, not the whole product
+    if request.headers.get("if-none-match"):
+        async with read_replicas.session() as db:
+            stamps = (await db.execute(
+                select(Product.updated_at, Product.created_at).where(Product.id == product_id)
+            )).first()
+        if stamps is not None:
+            etag = product_etag(product_id, *stamps)
+            if selected:
+                etag = fieldset_etag(etag, selected)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+    
+    async def load_product() -> Optional[str]:
+        generation = await product_cache.generation()
+        # Its own session: the flight may outlive the request that started it
+        async with read_replicas.session() as db:
+            product = await db.get(Product, product_id)
+            if not product:
+                return None
+            etag = product_etag(product.id, product.updated_at, product.created_at)
+            entry = f"{etag}\n{ProductResponse.model_validate(product).model_dump_json()}"
+        await product_cache.set_products({cache_key: entry}, generation)
+        return entry
+    
+    async def load_product_fields() -> Optional[str]:
+        # The timestamps are read for the ETag, requested or not
+        columns = [Product.__table__.c[name] for name in dict.fromkeys((*selected, "updated_at", "created_at"))]
+        async with read_replicas.session() as db:
+            row = (await db.execute(select(*columns).where(Product.id == product_id))).mappings().first()
+        if row is None:
+            return None
+        etag = fieldset_etag(product_etag(product_id, row["updated_at"], row["created_at"]), selected)
+        adapter = sparse_row(ProductResponse, selected)
+        return f"{etag}\n{adapter.dump_json(adapter.validate_python(row)).decode()}"
+    
+    entry = await product_cache.flights.run(
+        ("product", reads_pinned(), product_id, selected),
+        load_product_fields if selected else load_product
+    )
+    
+    if entry is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Product with id {product_id} not found"
         )
     
-    return product
+    etag, payload = entry.split("\n", 1)
+    return Response(content=payload, media_type="application/json", headers=cache_headers(etag))
 
 
 @router.post("/", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
 async def create_product(
     product_data: ProductCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new product.
@@ -114,75 +805,178 @@ async def create_product(
     - **stock_quantity**: Initial stock quantity
     - **image_url**: URL to product image
     """
-    # Create new product with owner set to current user
-    new_product = Product(
-        **product_data.model_dump(),
-        owner_id=current_user.id
+    # One INSERT ... RETURNING gives back the whole row, server defaults included
+    result = await db.execute(
+        insert(Product)
+        .values(**product_data.model_dump(), owner_id=current_user.id)
+        .returning(Product)
     )
+    new_product = result.scalar_one()
     
-    # Save to database
-    db.add(new_product)
-    db.commit()
-    db.refresh(new_product)
+    # Save with its change log entry
+    await record_changes(db, [new_product.id])
+    await db.commit()
+    product_counts.clear()
+    await product_cache.invalidate_product()
+    suggest_index.upsert(IndexedProduct.of(new_product))
     
     return new_product
 
 
+@router.post("/bulk", response_model=BulkImportReport)
+async def bulk_import_products(
+    request: Request,
+    format: Optional[Literal["ndjson", "csv"]] = Query(
+        None, description="Upload format; defaults to csv for text/csv bodies, else ndjson"
+    ),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Create many products from a streamed NDJSON or CSV upload.
+    
+    Requires authentication. The authenticated user owns every product.
+    
+    - **NDJSON**: one product object per line
+    - **CSV**: a header row of product field names, then one product per row
+    
+    Rows are validated like `POST /products/` and inserted in batches as
+    the upload arrives; invalid rows are skipped and listed by line number
+    in the report. Batches that were committed stay committed.
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "csv" if "csv" in content_type else "ndjson"
+    
+    lines = iter_lines(request.stream())
+    records = parse_csv(lines) if format == "csv" else parse_ndjson(lines)
+    
+    try:
+        report = await import_products(db, records, owner_id=current_user.id)
+    finally:
+        product_counts.clear()
+        await product_cache.invalidate_product()
+    
+    return report
+
+
+@router.post("/reservations", response_model=StockReservation)
+async def reserve_products(
+    reservation: StockReservation,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Reserve stock of one or more products atomically.
+    
+    Requires authentication.
+    
+    - **items**: `product_id` and `quantity` pairs (a product listed twice
+      has its quantities added)
+    
+    Every product is decremented with a single conditional UPDATE, so
+    concurrent buyers can never oversell. The reservation is
+    all-or-nothing: if any product is inactive or short of stock, nothing
+    is reserved and 409 is returned.
+    """
+    items: dict[int, int] = {}
+    for item in reservation.items:
+        items[item.product_id] = items.get(item.product_id, 0) + item.quantity
+    
+    try:
+        await reserve_stock(db, items)
+    except ProductNotFound as exc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(exc)
+        )
+    except InsufficientStock as exc:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(exc)
+        )
+    
+    await product_cache.invalidate_product(*items)
+    suggest_index.adjust_stock({product_id: -quantity for product_id, quantity in items.items()})
+    
+    return {"items": [{"product_id": product_id, "quantity": quantity} for product_id, quantity in items.items()]}
+
+
 @router.put("/{product_id}", response_model=ProductResponse)
 async def update_product(
     product_id: int,
     product_data: ProductUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update an existing product.
     
     Requires authentication. Only the product owner or admin can update.
     Only provided fields will be updated.
+    
+    The update is one UPDATE ... RETURNING, restricted to products the
+    caller may write; the product is only looked up again when it
+    matched no row, to answer 404 or 403. A body without fields writes
+    nothing and returns the product as it is.
     """
-    # Find the product
-    product = db.query(Product).filter(Product.id == product_id).first()
+    # Update only provided fields
+    update_data = product_data.model_dump(exclude_unset=True)
+    if not update_data:
+        product = await db.scalar(select(Product).where(Product.id == product_id, writable_by(current_user)))
+        if product is None:
+            raise await write_refused(db, product_id, "update")
+        return product
     
-    if not product:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Product with id {product_id} not found"
+    stock_quantity = update_data.get("stock_quantity")
+    if stock_quantity is not None:
+        # Sharded stock is left alone here and respread over the shards below
+        update_data["stock_quantity"] = case(
+            (Product.stock_shards == 0, stock_quantity), else_=Product.stock_quantity
         )
     
-    # Check ownership (owner or admin can update)
-    if product.owner_id != current_user.id and not current_user.is_admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to update this product"
-        )
+    result = await db.execute(
+        update(Product)
+        .where(Product.id == product_id, writable_by(current_user))
+        .values(**update_data)
+        .returning(Product)
+    )
+    product = result.scalar_one_or_none()
+    if product is None:
+        raise await write_refused(db, product_id, "update")
     
-    # Update only provided fields
-    update_data = product_data.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(product, field, value)
+    if stock_quantity is not None and product.stock_shards:
+        await set_stock_shards(db, product, product.stock_shards, stock_quantity)
     
-    # Save changes
-    db.commit()
-    db.refresh(product)
+    # Save changes, with a tombstone if this deactivated the product
+    await record_changes(db, [product_id], deleted=not product.is_active)
+    await db.commit()
+    product_counts.clear()
+    await product_cache.invalidate_product(product_id)
+    suggest_index.upsert(IndexedProduct.of(product))
     
     return product
 
 
-@router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_product(
+@router.put("/{product_id}/stock-shards", response_model=StockShardsResponse)
+async def update_stock_shards(
     product_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    layout: StockShardsUpdate,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Delete a product.
+    Split a product's stock across sharded counters, or merge it back.
     
-    Requires authentication. Only the product owner or admin can delete.
-    This performs a soft delete (sets is_active to False).
+    Requires authentication. Only the product owner or admin can change it.
+    
+    - **shards**: Number of counters (0 keeps the stock in the product row)
+    
+    Use for flash-sale products: concurrent reservations then update
+    different rows instead of all waiting for the product row. The total
+    stock is preserved and spread evenly.
     """
-    # Find the product
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.get(Product, product_id)
     
     if not product:
         raise HTTPException(
@@ -190,28 +984,73 @@ async def delete_product(
             detail=f"Product with id {product_id} not found"
         )
     
-    # Check ownership
     if product.owner_id != current_user.id and not current_user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to delete this product"
+            detail="Not authorized to update this product"
         )
     
+    await set_stock_shards(db, product, layout.shards)
+    await db.commit()
+    await product_cache.invalidate_product(product_id)
+    
+    return StockShardsResponse(
+        product_id=product_id,
+        stock_shards=layout.shards,
+        stock_quantity=product.stock_quantity
+    )
+
+
+@router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_product(
+    product_id: int,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Delete a product.
+    
+    Requires authentication. Only the product owner or admin can delete.
+    This performs a soft delete (sets is_active to False) with one
+    UPDATE ... RETURNING, like update_product.
+    """
     # Soft delete - just mark as inactive
-    product.is_active = False
-    db.commit()
+    result = await db.execute(
+        update(Product)
+        .where(Product.id == product_id, writable_by(current_user))
+        .values(is_active=False)
+        .returning(*(getattr(Product, field) for field in IndexedProduct._fields))
+    )
+    product = result.one_or_none()
+    if product is None:
+        raise await write_refused(db, product_id, "delete")
+    
+    await record_changes(db, [product_id], deleted=True)
+    await db.commit()
+    product_counts.clear()
+    await product_cache.invalidate_product(product_id)
+    suggest_index.upsert(IndexedProduct.of(product))
     
     return None
 
 
 @router.get("/categories/list", response_model=list[str])
-async def get_categories(db: Session = Depends(get_db)):
+async def get_categories(request: Request, db: AsyncSession = Depends(get_read_db)):
     """
     Get a list of all unique product categories.
+    
+    Read from the facet summary table; use /products/facets for counts.
     """
-    categories = db.query(Product.category).filter(
-        Product.is_active == True,
-        Product.category != None
-    ).distinct().all()
+    etag = None
+    if product_cache.enabled:
+        etag = catalog_etag(await product_cache.list_key({"view": "categories"}))
+        if etag_matches(request, etag):
+            return not_modified(etag)
+    
+    result = await db.execute(
+        select(ProductFacet.category)
+        .where(ProductFacet.product_count > 0, ProductFacet.category != UNCATEGORIZED)
+        .group_by(ProductFacet.category)
+    )
     
-    return [cat[0] for cat in categories if cat[0]]
+    return validated_response(request, json.dumps(list(result.scalars()), ensure_ascii=False), etag)
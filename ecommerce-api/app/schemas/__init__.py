@@ -1,3 +1,9 @@
 # Schemas package
-from app.schemas.user import UserCreate, UserResponse, UserLogin, Token
-from app.schemas.product import ProductCreate, ProductUpdate, ProductResponse
+from app.schemas.user import UserCreate, UserResponse, UserLogin, UserStatusUpdate, Token
+from app.schemas.product import (
+    ProductCreate, ProductUpdate, ProductResponse, ProductList, ProductSearchResult,
+    ProductBatchRequest, ProductBatch, ProductSuggestion, CategorySuggestion, ProductSuggestions,
+    ProductChangeEntry, ProductChangeFeed,
+    StockReservationItem, StockReservation, StockShardsUpdate, StockShardsResponse,
+    CategoryFacet, PriceBucketFacet, ProductFacets, BulkImportRowError, BulkImportReport,
+)
@@ -69,9 +69,239 @@ class ProductResponse(ProductBase):
         from_attributes = True
 
 
+class ProductSearchResult(ProductResponse):
+    """
+    Schema for a full-text search hit.
+    
+    Attributes:
+        rank: Relevance score (higher is more relevant)
+        snippet: Matching text with terms wrapped in <mark> tags
+    """
+    rank: float
+    snippet: Optional[str] = None
+
+
 class ProductList(BaseModel):
-    """Schema for paginated product list response."""
+    """
+    Schema for paginated product list response.
+    
+    Attributes:
+        items: Products on this page
+        total: Number of matching products (may be briefly stale)
+        page: Current page number, starting at 1
+        pages: Total number of pages
+        next_cursor: Opaque cursor for the next page, None on the last page
+    """
     items: list[ProductResponse]
     total: int
     page: int
     pages: int
+    next_cursor: Optional[str] = None
+
+
+class ProductChangeEntry(BaseModel):
+    """
+    Schema for one product in the change feed.
+    
+    Attributes:
+        seq: Position of the product's latest change in the log
+        product_id: The product that changed
+        deleted: Whether the product is gone (soft deleted); drop it
+        changed_at: When the change was recorded
+        product: The product's current state, None if deleted
+    """
+    seq: int
+    product_id: int
+    deleted: bool
+    changed_at: Optional[datetime] = None
+    product: Optional[ProductResponse] = None
+
+
+class ProductChangeFeed(BaseModel):
+    """
+    Schema for a page of the change feed.
+    
+    Attributes:
+        items: Changed products in log order, each at most once
+        next_cursor: Pass as `since` for the following changes (also
+            when the page is empty)
+        has_more: Whether more changes are already waiting
+    """
+    items: list[ProductChangeEntry]
+    next_cursor: str
+    has_more: bool
+
+
+class ProductSuggestion(BaseModel):
+    """
+    Schema for a product name suggested while typing.
+    
+    Attributes:
+        id: Product ID
+        name: Product name
+        stock_quantity: Units in stock
+    """
+    id: int
+    name: str
+    stock_quantity: int
+
+
+class CategorySuggestion(BaseModel):
+    """
+    Schema for a category suggested while typing.
+    
+    Attributes:
+        category: Category name
+        count: Active products in the category
+    """
+    category: str
+    count: int
+
+
+class ProductSuggestions(BaseModel):
+    """
+    Schema for the autocomplete response.
+    
+    Attributes:
+        products: Active products whose name starts with the prefix,
+            most stock first
+        categories: Categories starting with the prefix, most products first
+    """
+    products: list[ProductSuggestion]
+    categories: list[CategorySuggestion]
+
+
+class ProductBatchRequest(BaseModel):
+    """
+    Schema for fetching several products in one request.
+    
+    Attributes:
+        ids: Product IDs, in the order the products should be returned
+    """
+    ids: list[int] = Field(..., min_length=1)
+
+
+class ProductBatch(BaseModel):
+    """
+    Schema for the batch fetch response.
+    
+    Attributes:
+        items: Found products, in request order (duplicate IDs once)
+        missing: Requested IDs with no product, in request order
+    """
+    items: list[ProductResponse]
+    missing: list[int]
+
+
+class StockReservationItem(BaseModel):
+    """
+    Schema for one product in a stock reservation.
+    
+    Attributes:
+        product_id: Product to reserve
+        quantity: Units to take from its stock
+    """
+    product_id: int
+    quantity: int = Field(..., gt=0)
+
+
+class StockReservation(BaseModel):
+    """
+    Schema for reserving stock of one or more products at once.
+    
+    Attributes:
+        items: Products and quantities; all are reserved or none is
+    """
+    items: list[StockReservationItem] = Field(..., min_length=1, max_length=100)
+
+
+class StockShardsUpdate(BaseModel):
+    """
+    Schema for splitting a product's stock into sharded counters.
+    
+    Attributes:
+        shards: Number of counters; 0 keeps the stock in the product row
+    """
+    shards: int = Field(..., ge=0, le=64)
+
+
+class StockShardsResponse(BaseModel):
+    """
+    Schema for a product's stock layout.
+    
+    Attributes:
+        product_id: The product
+        stock_shards: Number of counters, 0 if unsharded
+        stock_quantity: Total stock across them
+    """
+    product_id: int
+    stock_shards: int
+    stock_quantity: int
+
+
+class CategoryFacet(BaseModel):
+    """
+    Schema for one category in the facet counts.
+    
+    Attributes:
+        category: Category name, None for uncategorized products
+        count: Active products in the category matching the price filter
+    """
+    category: Optional[str] = None
+    count: int
+
+
+class PriceBucketFacet(BaseModel):
+    """
+    Schema for one price bucket in the facet counts.
+    
+    Attributes:
+        min_price: Lower bound of the bucket (inclusive)
+        max_price: Upper bound of the bucket (exclusive), None for the last
+        count: Active products in the bucket matching the category filter
+    """
+    min_price: float
+    max_price: Optional[float] = None
+    count: int
+
+
+class ProductFacets(BaseModel):
+    """
+    Schema for the product facets response.
+    
+    Attributes:
+        total: Products matching every filter, as in the list endpoint
+        categories: Counts per category, largest first
+        price_buckets: Counts per price bucket, in price order
+    """
+    total: int
+    categories: list[CategoryFacet]
+    price_buckets: list[PriceBucketFacet]
+
+
+class BulkImportRowError(BaseModel):
+    """
+    Schema for a rejected row in a bulk import.
+    
+    Attributes:
+        line: Line number of the row in the upload (1-based)
+        error: Why the row was rejected
+    """
+    line: int
+    error: str
+
+
+class BulkImportReport(BaseModel):
+    """
+    Schema for the result of a bulk import.
+    
+    Attributes:
+        inserted: Number of products created
+        failed: Number of rows rejected
+        errors: Rejected rows, up to BULK_IMPORT_MAX_ERRORS
+        errors_truncated: Whether more rows failed than are listed
+    """
+    inserted: int = 0
+    failed: int = 0
+    errors: list[BulkImportRowError] = Field(default_factory=list)
+    errors_truncated: bool = False
@@ -61,6 +61,19 @@ class UserResponse(UserBase):
         from_attributes = True
 
 
+class UserStatusUpdate(BaseModel):
+    """
+    Schema for an admin changing a user's status.
+    All fields are optional - only provided fields will be updated.
+    
+    Attributes:
+        is_active: Activate or deactivate the account
+        is_admin: Grant or revoke admin privileges
+    """
+    is_active: Optional[bool] = None
+    is_admin: Optional[bool] = None
+
+
 class Token(BaseModel):
     """
     Schema for JWT token response.
@@ -78,6 +91,12 @@ class TokenData(BaseModel):
     Schema for decoded token data.
     
     Attributes:
-        email: Email extracted from token
+        sub: User ID extracted from token
+        email: User's email
+        adm: Whether the user is an admin
+        ver: User version stamp the token was issued for
     """
+    sub: Optional[str] = None
     email: Optional[str] = None
+    adm: bool = False
+    ver: int = 0
@@ -1,2 +1,14 @@
 # Utils package
-from app.utils.security import hash_password, verify_password, create_access_token, get_current_user
+from app.utils.security import (
+    hash_password,
+    verify_password,
+    hash_password_async,
+    verify_password_async,
+    create_access_token,
+    create_user_token,
+    revoke_user_tokens,
+    get_current_principal,
+    get_optional_principal,
+    get_current_user,
+    Principal,
+)
@@ -0,0 +1,230 @@
+"""
+Bulk Product Import
+
+Streams NDJSON or CSV uploads into the products table.
+
+The request body is consumed chunk by chunk and parsed into records as
+lines arrive. Each record is validated against ProductCreate and valid
+rows are inserted with executemany in batches of BULK_IMPORT_BATCH_SIZE,
+each batch committed in its own transaction together with its change
+log entries. Memory use is bounded by the batch size, the longest line
+and the error report cap, not by the size of the upload.
+
+Invalid rows are reported by line number and skipped; they never abort
+the rest of the upload.
+"""
+
+import codecs
+import csv
+import json
+from typing import AsyncIterator, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.product import Product
+from app.schemas.product import BulkImportReport, BulkImportRowError, ProductCreate
+from app.utils.changes import record_changes
+from app.utils.suggest import IndexedProduct, suggest_index
+
+
+# Longest accepted line; longer lines are reported and skipped unread
+MAX_LINE_LENGTH = 1_000_000
+
+# (line number, record or None, error or None)
+ParsedRecord = tuple[int, Optional[dict], Optional[str]]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Optional[str]]:
+    """
+    Split a stream of UTF-8 bytes into lines without their terminators.
+    
+    A leading byte order mark is dropped. Lines longer than
+    MAX_LINE_LENGTH are not buffered; None is yielded in their place.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    skipping = False
+    
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            if skipping:
+                skipping = False
+                yield None
+            else:
+                yield line.rstrip("\r")
+        if len(pending) > MAX_LINE_LENGTH:
+            skipping = True
+            pending = ""
+    
+    pending += decoder.decode(b"", final=True)
+    if skipping:
+        yield None
+    elif pending:
+        yield pending.rstrip("\r")
+
+
+async def parse_ndjson(lines: AsyncIterator[Optional[str]]) -> AsyncIterator[ParsedRecord]:
+    """Parse one JSON object per line. Blank lines are ignored."""
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if line is None:
+            yield line_number, None, "Line too long"
+            continue
+        if not line.strip():
+            continue
+        
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield line_number, None, f"Invalid JSON: {exc}"
+            continue
+        
+        if not isinstance(record, dict):
+            yield line_number, None, "Expected a JSON object"
+            continue
+        
+        yield line_number, record, None
+
+
+async def parse_csv(lines: AsyncIterator[Optional[str]]) -> AsyncIterator[ParsedRecord]:
+    """
+    Parse CSV with a header row naming the product fields.
+    
+    Quoted fields may span lines. Empty cells are left out of the record,
+    so optional fields fall back to their defaults. Records are numbered
+    by the line they start on.
+    """
+    header = None
+    record = None
+    start_line = line_number = 0
+    
+    async for line in lines:
+        line_number += 1
+        if line is None:
+            record = None
+            yield line_number, None, "Line too long"
+            continue
+        
+        if record is None:
+            if not line.strip():
+                continue
+            record, start_line = line, line_number
+        else:
+            record = f"{record}\n{line}"
+        
+        # An odd number of quotes means a quoted field continues on the next line
+        if record.count('"') % 2:
+            if len(record) > MAX_LINE_LENGTH:
+                record = None
+                yield start_line, None, "Record too long"
+            continue
+        
+        values = next(csv.reader([record]))
+        record = None
+        
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        
+        if len(values) != len(header):
+            yield start_line, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        
+        yield start_line, {name: value for name, value in zip(header, values) if value != ""}, None
+    
+    if record is not None:
+        yield start_line, None, "Unterminated quoted field"
+
+
+def format_validation_error(exc: ValidationError) -> str:
+    """Summarize a validation error as 'field: message' pairs."""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+        for error in exc.errors()
+    )
+
+
+async def import_products(
+    db: AsyncSession,
+    records: AsyncIterator[ParsedRecord],
+    owner_id: int,
+    batch_size: Optional[int] = None,
+    max_errors: Optional[int] = None
+) -> BulkImportReport:
+    """
+    Validate and insert parsed records in committed batches.
+    
+    Args:
+        db: Async database session
+        records: Output of parse_ndjson or parse_csv
+        owner_id: Owner of every imported product
+        batch_size: Rows per INSERT batch and transaction
+            (defaults to BULK_IMPORT_BATCH_SIZE)
+        max_errors: Row errors kept in the report; further failures are
+            only counted (defaults to BULK_IMPORT_MAX_ERRORS)
+    
+    Returns:
+        Report of inserted and failed rows
+    """
+    batch_size = batch_size or settings.BULK_IMPORT_BATCH_SIZE
+    max_errors = settings.BULK_IMPORT_MAX_ERRORS if max_errors is None else max_errors
+    report = BulkImportReport()
+    statement = insert(Product.__table__)
+    batch: list[dict] = []
+    batch_lines: list[int] = []
+    
+    def record_error(line: int, error: str) -> None:
+        report.failed += 1
+        if len(report.errors) < max_errors:
+            report.errors.append(BulkImportRowError(line=line, error=error))
+        else:
+            report.errors_truncated = True
+    
+    async def flush() -> None:
+        try:
+            # The change log and the autocomplete index need the new ids
+            result = await db.execute(statement.returning(Product.id, sort_by_parameter_order=True), batch)
+            product_ids = result.scalars().all()
+            await record_changes(db, product_ids)
+            await db.commit()
+            report.inserted += len(batch)
+            for product_id, row in zip(product_ids, batch):
+                suggest_index.upsert(
+                    IndexedProduct(product_id, row["name"], row["category"], row["stock_quantity"], True)
+                )
+        except SQLAlchemyError as exc:
+            # Only this batch is lost; earlier batches are already committed
+            await db.rollback()
+            reason = str(getattr(exc, "orig", None) or exc)
+            for line in batch_lines:
+                record_error(line, f"Rejected by the database: {reason}")
+        batch.clear()
+        batch_lines.clear()
+    
+    async for line, record, error in records:
+        if error is not None:
+            record_error(line, error)
+            continue
+        
+        try:
+            product = ProductCreate.model_validate(record)
+        except ValidationError as exc:
+            record_error(line, format_validation_error(exc))
+            continue
+        
+        batch.append({**product.model_dump(), "owner_id": owner_id, "is_active": True})
+        batch_lines.append(line)
+        if len(batch) >= batch_size:
+            await flush()
+    
+    if batch:
+        await flush()
+    
+    return report
@@ -0,0 +1,336 @@
+"""
+Product Cache
+
+Read-through cache for serialized product responses and list pages.
+
+Backends:
+- MemoryCache: in-process LRU with per-entry TTL (default)
+- RedisCache: shared across workers, needs the optional `redis` package
+
+Invalidation uses two mechanisms:
+- Per-key: a product write deletes that product's entry
+- Catalog generation: list page keys embed a generation counter, and
+  every product write bumps it, so all cached pages become unreachable
+  at once and simply age out
+
+A product entry is only stored if the generation is still the one read
+before its query, so a write that commits while a product is being
+loaded cannot leave the old row cached behind its invalidation.
+
+With the memory backend each worker has its own cache and generation,
+so other workers may serve stale entries for up to CACHE_TTL_SECONDS.
+Use the Redis backend when running several workers.
+"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from app.config import settings
+from app.utils.singleflight import SingleFlight
+
+
+class CacheBackend:
+    """Interface shared by the cache backends. Values are strings."""
+    
+    # Whether every worker sees the same entries (and catalog generation)
+    shared = False
+    
+    async def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+    
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        raise NotImplementedError
+    
+    async def get_many(self, keys: list[str]) -> list[Optional[str]]:
+        """Values for several keys in one round trip, None where missing."""
+        raise NotImplementedError
+    
+    async def set_many(self, items: dict[str, str], ttl: int) -> None:
+        """Store several values in one round trip."""
+        raise NotImplementedError
+    
+    async def set_many_if(self, items: dict[str, str], ttl: int, key: str, expected: str) -> bool:
+        """
+        Store several values only if `key` holds `expected` (a missing key
+        reads as "0"), atomically with the check. Returns whether stored.
+        """
+        raise NotImplementedError
+    
+    async def delete(self, *keys: str) -> None:
+        raise NotImplementedError
+    
+    async def incr(self, key: str) -> int:
+        raise NotImplementedError
+
+
+class MemoryCache(CacheBackend):
+    """
+    In-process LRU cache with per-entry expiry.
+    
+    Expired entries are dropped lazily when read, and the least recently
+    used entry is evicted once max_entries is reached. Entries stored
+    without a TTL (such as the catalog generation) are never evicted.
+    """
+    
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[Optional[float], str]] = OrderedDict()
+    
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        
+        expires_at, value = entry
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        
+        self._entries.move_to_end(key)
+        return value
+    
+    async def set(self, key: str, value: str, ttl: Optional[int] = None) -> None:
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        for _ in range(len(self._entries) - self.max_entries):
+            oldest_key, (oldest_expiry, _) = next(iter(self._entries.items()))
+            if oldest_expiry is None:
+                self._entries.move_to_end(oldest_key)
+            else:
+                del self._entries[oldest_key]
+    
+    async def get_many(self, keys: list[str]) -> list[Optional[str]]:
+        return [await self.get(key) for key in keys]
+    
+    async def set_many(self, items: dict[str, str], ttl: Optional[int] = None) -> None:
+        for key, value in items.items():
+            await self.set(key, value, ttl)
+    
+    async def set_many_if(self, items: dict[str, str], ttl: Optional[int], key: str, expected: str) -> bool:
+        # Atomic: nothing here yields to the event loop
+        if (await self.get(key) or "0") != expected:
+            return False
+        await self.set_many(items, ttl)
+        return True
+    
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
+    
+    async def incr(self, key: str) -> int:
+        value = int(await self.get(key) or 0) + 1
+        await self.set(key, str(value))
+        return value
+
+
+class RedisCache(CacheBackend):
+    """
+    Redis-backed cache shared by every worker.
+    
+    Args:
+        client: A redis.asyncio client (or a compatible fake, e.g. fakeredis)
+        prefix: Namespace prepended to every key
+    """
+    
+    shared = True
+    
+    def __init__(self, client, prefix: str = "ecommerce:"):
+        self.client = client
+        self.prefix = prefix
+    
+    @classmethod
+    def from_url(cls, url: str) -> "RedisCache":
+        """Create a cache from a redis:// URL."""
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as exc:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package") from exc
+        
+        return cls(redis_asyncio.from_url(url, decode_responses=True))
+    
+    async def get(self, key: str) -> Optional[str]:
+        return await self.client.get(self.prefix + key)
+    
+    async def set(self, key: str, value: str, ttl: Optional[int] = None) -> None:
+        await self.client.set(self.prefix + key, value, ex=ttl)
+    
+    async def get_many(self, keys: list[str]) -> list[Optional[str]]:
+        if not keys:
+            return []
+        return await self.client.mget([self.prefix + key for key in keys])
+    
+    async def set_many(self, items: dict[str, str], ttl: Optional[int] = None) -> None:
+        if not items:
+            return
+        async with self.client.pipeline(transaction=False) as pipeline:
+            for key, value in items.items():
+                pipeline.set(self.prefix + key, value, ex=ttl)
+            await pipeline.execute()
+    
+    async def set_many_if(self, items: dict[str, str], ttl: Optional[int], key: str, expected: str) -> bool:
+        from redis.exceptions import WatchError
+        
+        async with self.client.pipeline(transaction=True) as pipeline:
+            try:
+                await pipeline.watch(self.prefix + key)
+                if (await pipeline.get(self.prefix + key) or "0") != expected:
+                    return False
+                pipeline.multi()
+                for item_key, value in items.items():
+                    pipeline.set(self.prefix + item_key, value, ex=ttl)
+                await pipeline.execute()
+            except WatchError:
+                # The key changed between the check and the write
+                return False
+        return True
+    
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self.client.delete(*(self.prefix + key for key in keys))
+    
+    async def incr(self, key: str) -> int:
+        return await self.client.incr(self.prefix + key)
+
+
+class ProductCache:
+    """
+    Cache of serialized product responses and list pages.
+    
+    Stores ready-to-send JSON, so a hit skips the query, ORM hydration
+    and Pydantic serialization entirely. Concurrent identical misses
+    share one read through `flights`.
+    """
+    
+    GENERATION_KEY = "products:generation"
+    
+    def __init__(self, backend: Optional[CacheBackend], ttl: int, flights: Optional[SingleFlight] = None):
+        self.backend = backend
+        self.ttl = ttl
+        self.flights = flights or SingleFlight()
+        self.hits = {"product": 0, "list": 0, "facets": 0}
+        self.misses = {"product": 0, "list": 0, "facets": 0}
+    
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+    
+    @staticmethod
+    def product_key(product_id: int) -> str:
+        return f"products:item:{product_id}"
+    
+    async def generation(self) -> Optional[str]:
+        """
+        The current catalog generation, None with the cache disabled.
+        
+        Read it before querying products and pass it to set_products.
+        """
+        if not self.enabled:
+            return None
+        return await self.backend.get(self.GENERATION_KEY) or "0"
+    
+    async def list_key(self, params: dict[str, Any]) -> str:
+        """
+        Build the key for a list page under the current catalog generation.
+        
+        Read the key before querying and store the page under that same
+        key: a write that lands in between bumps the generation, so the
+        possibly stale page is never served.
+        """
+        generation = await self.backend.get(self.GENERATION_KEY) or "0"
+        digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+        return f"products:list:{generation}:{digest}"
+    
+    async def get(self, key: str, kind: str) -> Optional[str]:
+        """Look up a cached payload and record a hit or miss for `kind`."""
+        if not self.enabled:
+            return None
+        
+        value = await self.backend.get(key)
+        if value is None:
+            self.misses[kind] += 1
+        else:
+            self.hits[kind] += 1
+        return value
+    
+    async def set(self, key: str, payload: str) -> None:
+        """Store a serialized payload for the configured TTL."""
+        if self.enabled:
+            await self.backend.set(key, payload, self.ttl)
+    
+    async def get_many(self, keys: list[str], kind: str) -> list[Optional[str]]:
+        """Look up several payloads at once, recording a hit or miss for each."""
+        if not self.enabled:
+            return [None] * len(keys)
+        
+        values = await self.backend.get_many(keys)
+        hits = sum(value is not None for value in values)
+        self.hits[kind] += hits
+        self.misses[kind] += len(values) - hits
+        return values
+    
+    async def set_many(self, payloads: dict[str, str]) -> None:
+        """Store several serialized payloads for the configured TTL."""
+        if self.enabled:
+            await self.backend.set_many(payloads, self.ttl)
+    
+    async def set_products(self, entries: dict[str, str], generation: Optional[str]) -> None:
+        """
+        Store product entries loaded after reading `generation`.
+        
+        Nothing is stored if a write bumped the generation since: the
+        entries may hold rows from before that write, and its
+        invalidation has already run.
+        """
+        if self.enabled and entries:
+            await self.backend.set_many_if(entries, self.ttl, self.GENERATION_KEY, generation)
+    
+    async def invalidate_product(self, *product_ids: int) -> None:
+        """
+        Invalidate after a product write.
+        
+        Bumps the catalog generation once so every cached list page is
+        bypassed, then deletes the products' own entries (if given). In
+        that order, a product load racing the write either fails the
+        generation check in set_products or stores before the delete.
+        Reads already in flight may predate the write, so later misses
+        start their own (even with the cache disabled).
+        """
+        self.flights.forget()
+        if not self.enabled:
+            return
+        
+        await self.backend.incr(self.GENERATION_KEY)
+        if product_ids:
+            await self.backend.delete(*(self.product_key(product_id) for product_id in product_ids))
+    
+    def stats(self) -> dict[str, Any]:
+        """Hit/miss counters per entry kind, since startup."""
+        return {
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "hits": dict(self.hits),
+            "misses": dict(self.misses),
+            "single_flight": self.flights.stats(),
+        }
+
+
+def create_backend() -> Optional[CacheBackend]:
+    """Create the backend selected by CACHE_BACKEND ("memory", "redis" or "none")."""
+    if settings.CACHE_BACKEND == "none":
+        return None
+    if settings.CACHE_BACKEND == "redis":
+        if not settings.REDIS_URL:
+            raise RuntimeError("CACHE_BACKEND=redis requires REDIS_URL")
+        return RedisCache.from_url(settings.REDIS_URL)
+    return MemoryCache(max_entries=settings.CACHE_MAX_ENTRIES)
+
+
+# Global product cache instance
+product_cache = ProductCache(
+    create_backend(),
+    ttl=settings.CACHE_TTL_SECONDS,
+    flights=SingleFlight(settings.SINGLE_FLIGHT_MAX_WAITERS, settings.SINGLE_FLIGHT_TIMEOUT_SECONDS)
+)
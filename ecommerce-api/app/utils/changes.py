@@ -0,0 +1,173 @@
+"""
+Catalog Change Feed
+
+Append-only log of product writes behind GET /products/changes, so
+downstream copies of the catalog (search indexers, mobile apps) can sync
+by reading what changed since their cursor instead of re-paging the
+whole list. A sync costs one indexed range read per page of changes,
+however large the catalog.
+
+Writing: create, update, delete and bulk import append one entry per
+product in the transaction of the write (record_changes). A soft delete
+appends a tombstone. Reservations only change stock and are not logged.
+
+Ordering: the cursor is the entry's seq, and a reader must never see a
+seq appear behind one it has already passed. SQLite commits one writer
+at a time, so seqs are assigned in commit order. On PostgreSQL
+concurrent transactions take seqs in one order and may commit in
+another, so record_changes takes a transaction-level advisory lock
+first; it is held only between the insert and the commit, which
+follows immediately.
+
+Compaction: an entry is removed once a newer entry exists for the same
+product. A client past the newer entry has seen the product's latest
+state, and a client before it will still read it, so compaction never
+invalidates a cursor and the log stays at most one entry per product.
+"""
+
+import asyncio
+
+from sqlalchemy import Connection, Select, delete, exists, insert, select, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.models.product import Product
+from app.models.product_change import ProductChange
+from app.schemas.product import ProductChangeEntry, ProductChangeFeed, ProductResponse
+from app.utils.pagination import encode_cursor
+
+
+# Key of the PostgreSQL advisory lock ordering log appends ("prch")
+CHANGE_LOG_LOCK = 0x70726368
+
+# Superseded entries deleted per compaction transaction
+COMPACT_BATCH_SIZE = 10_000
+
+
+async def record_changes(db: AsyncSession, product_ids: list[int], deleted: bool = False) -> None:
+    """
+    Append log entries for written products. Call right before committing.
+    
+    Args:
+        db: Session holding the uncommitted product write
+        product_ids: Products the write changed
+        deleted: Record tombstones (the products were soft deleted)
+    """
+    if not product_ids:
+        return
+    if db.bind.dialect.name == "postgresql":
+        # Seqs must be assigned in commit order; released by the commit
+        await db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": CHANGE_LOG_LOCK})
+    await db.execute(
+        insert(ProductChange),
+        [{"product_id": product_id, "deleted": deleted} for product_id in product_ids]
+    )
+
+
+async def latest_seq(db: AsyncSession) -> int:
+    """Seq of the newest entry, 0 if the log is empty."""
+    return await db.scalar(select(ProductChange.seq).order_by(ProductChange.seq.desc()).limit(1)) or 0
+
+
+def changes_page_query(after_seq: int) -> Select:
+    """Log entries after a seq, in seq order (a range read on the primary key)."""
+    return (
+        select(ProductChange.seq, ProductChange.product_id, ProductChange.deleted, ProductChange.changed_at)
+        .where(ProductChange.seq > after_seq)
+        .order_by(ProductChange.seq)
+    )
+
+
+async def read_changes(db: AsyncSession, after_seq: int, limit: int) -> ProductChangeFeed:
+    """
+    Read a page of the change log with the current state of each product.
+    
+    Entries are read in seq order and a product changed several times in
+    the page is reported once, at its last entry. Its current state is
+    loaded with one IN query for the whole page.
+    
+    Args:
+        db: Database session
+        after_seq: Seq of the last entry the client has read
+        limit: Most log entries to read
+    
+    Returns:
+        ProductChangeFeed whose next_cursor follows the last entry read
+    """
+    rows = (await db.execute(changes_page_query(after_seq).limit(limit + 1))).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    
+    # Later entries of a product replace earlier ones in the page
+    latest = {row.product_id: row for row in rows}
+    products = {}
+    live_ids = [product_id for product_id, row in latest.items() if not row.deleted]
+    if live_ids:
+        result = await db.execute(select(Product).where(Product.id.in_(live_ids)))
+        products = {product.id: product for product in result.scalars()}
+    
+    items = []
+    for row in sorted(latest.values(), key=lambda row: row.seq):
+        product = products.get(row.product_id)
+        # A product deactivated after the entry reads as deleted now
+        if product is not None and not product.is_active:
+            product = None
+        items.append(ProductChangeEntry(
+            seq=row.seq,
+            product_id=row.product_id,
+            deleted=product is None,
+            changed_at=row.changed_at,
+            product=ProductResponse.model_validate(product) if product is not None else None,
+        ))
+    
+    last_seq = rows[-1].seq if rows else after_seq
+    return ProductChangeFeed(items=items, next_cursor=encode_cursor({"seq": last_seq}), has_more=has_more)
+
+
+def compact_changes(conn: Connection, batch_size: int = COMPACT_BATCH_SIZE) -> int:
+    """
+    Delete log entries superseded by a newer entry for the same product.
+    
+    Runs in batches of batch_size, each committed on its own, so writers
+    are never held up for long.
+    
+    Args:
+        conn: Connection outside a transaction
+        batch_size: Entries deleted per transaction
+    
+    Returns:
+        Number of entries deleted
+    """
+    newer = aliased(ProductChange)
+    superseded = (
+        select(ProductChange.seq)
+        .where(exists().where(newer.product_id == ProductChange.product_id, newer.seq > ProductChange.seq))
+        .limit(batch_size)
+    )
+    removed = 0
+    while True:
+        with conn.begin():
+            count = conn.execute(delete(ProductChange).where(ProductChange.seq.in_(superseded))).rowcount
+        removed += count
+        if count < batch_size:
+            return removed
+
+
+async def compact_change_log(engine, interval_seconds: float, batch_size: int = COMPACT_BATCH_SIZE) -> None:
+    """
+    Compact the change log every interval_seconds, for the life of the app.
+    
+    Every worker may run it: compaction is idempotent.
+    """
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            async with engine.connect() as conn:
+                removed = await conn.run_sync(compact_changes, batch_size)
+        except (SQLAlchemyError, OSError) as exc:
+            print(f"⚠️ Change log compaction failed: {exc}")
+            continue
+        if removed:
+            print(f"🧹 Compacted {removed} change log entries")
+
@@ -0,0 +1,192 @@
+"""
+Catalog Export
+
+Streams product rows as NDJSON, CSV or Parquet.
+
+Rows are read with a streaming result (a server-side cursor on
+PostgreSQL) in partitions of yield_per rows, and each partition is
+serialized and sent before the next one is fetched. Memory stays flat
+however many rows match, and the first bytes go out as soon as the
+first partition is read.
+
+Parquet needs the optional `pyarrow` package; each partition becomes
+one row group.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import Select
+
+from app.database import read_replicas
+
+
+# Exported columns: the public product fields, in table order. Listed by
+# hand so internal columns (stock_shards) stay out of the files; a new
+# column needs a type in _parquet_schema as well.
+EXPORT_COLUMNS = [
+    "id", "name", "description", "price", "category", "stock_quantity", "image_url",
+    "is_active", "owner_id", "created_at", "updated_at",
+]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Rows per partition; Parquet uses larger partitions since each one is a row group
+BATCH_SIZES = {
+    "ndjson": 1_000,
+    "csv": 1_000,
+    "parquet": 10_000,
+}
+
+
+def require_pyarrow() -> None:
+    """
+    Check that Parquet export is available.
+    
+    Raises:
+        RuntimeError: If pyarrow is not installed
+    """
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as exc:
+        raise RuntimeError("Parquet export requires the 'pyarrow' package") from exc
+
+
+def _json_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def ndjson_chunk(rows) -> bytes:
+    """Serialize rows as one JSON object per line."""
+    lines = [
+        json.dumps(dict(zip(EXPORT_COLUMNS, map(_json_value, row))), ensure_ascii=False)
+        for row in rows
+    ]
+    return ("\n".join(lines) + "\n").encode()
+
+
+def csv_chunk(rows, header: bool = False) -> bytes:
+    """Serialize rows as CSV, optionally preceded by the header row."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    writer.writerows([_csv_value(value) for value in row] for row in rows)
+    return buffer.getvalue().encode()
+
+
+class _ParquetSink:
+    """
+    Write-only file object that hands written bytes back to the caller.
+    
+    ParquetWriter records offsets with tell(), so the position keeps
+    counting after the buffer is drained.
+    """
+    
+    def __init__(self):
+        self.closed = False
+        self._position = 0
+        self._parts: list[bytes] = []
+    
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+    
+    def tell(self) -> int:
+        return self._position
+    
+    def flush(self) -> None:
+        pass
+    
+    def close(self) -> None:
+        self.closed = True
+    
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def _parquet_schema():
+    import pyarrow as pa
+    
+    types = {
+        "id": pa.int64(),
+        "name": pa.string(),
+        "description": pa.string(),
+        "price": pa.float64(),
+        "category": pa.string(),
+        "stock_quantity": pa.int64(),
+        "image_url": pa.string(),
+        "is_active": pa.bool_(),
+        "owner_id": pa.int64(),
+        "created_at": pa.timestamp("us", tz="UTC"),
+        "updated_at": pa.timestamp("us", tz="UTC"),
+    }
+    return pa.schema([(name, types[name]) for name in EXPORT_COLUMNS])
+
+
+async def stream_export(query: Select, format: str, batch_size: Optional[int] = None) -> AsyncIterator[bytes]:
+    """
+    Run an export query and yield the serialized file chunk by chunk.
+    
+    Opens its own session, since the response body is produced after
+    the route handler (and its request-scoped session) has returned.
+    Like the other catalog reads, it uses a read replica if configured.
+    
+    Args:
+        query: Select of EXPORT_COLUMNS
+        format: "ndjson", "csv" or "parquet"
+        batch_size: Rows fetched and serialized per chunk
+            (defaults to BATCH_SIZES for the format)
+    
+    Yields:
+        Encoded file content
+    """
+    batch_size = batch_size or BATCH_SIZES[format]
+    writer = sink = schema = None
+    if format == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        schema = _parquet_schema()
+        sink = _ParquetSink()
+        writer = pq.ParquetWriter(sink, schema)
+    elif format == "csv":
+        yield csv_chunk([], header=True)
+    
+    async with read_replicas.session() as db:
+        result = await db.stream(query.execution_options(yield_per=batch_size))
+        async for rows in result.partitions():
+            if format == "ndjson":
+                yield ndjson_chunk(rows)
+            elif format == "csv":
+                yield csv_chunk(rows)
+            else:
+                columns = list(zip(*rows))
+                writer.write_table(pa.Table.from_arrays(
+                    [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                    schema=schema
+                ))
+                yield sink.drain()
+    
+    if writer is not None:
+        writer.close()
+        yield sink.drain()
@@ -0,0 +1,260 @@
+"""
+Product Facets
+
+Category and price bucket counts for the storefront sidebar, read from
+the product_facets summary table instead of counting products.
+
+The table holds one row per (category, price bucket) with the number of
+active products in it. Triggers on the products table adjust the counts
+on every insert, update and delete, so the create, update, soft delete
+and bulk import paths all keep it current without application code:
+
+- SQLite: three row triggers with upserts
+- PostgreSQL: one row trigger calling a PL/pgSQL function
+
+Price filters that fall on bucket bounds are answered from the summary
+alone (plus an index seek for products priced exactly at max_price);
+other bounds count the partially covered buckets from the price index.
+"""
+
+from collections import defaultdict
+from typing import Optional
+
+from sqlalchemy import Connection, Select, and_, func, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.product import Product
+from app.models.product_facet import ProductFacet
+from app.schemas.product import CategoryFacet, PriceBucketFacet, ProductFacets
+
+
+# Lower bounds of the price buckets; the last bucket has no upper bound
+PRICE_BUCKETS = (0.0, 10.0, 25.0, 50.0, 100.0, 250.0, 500.0, 1000.0, 2500.0, 5000.0)
+
+# Stored in place of a NULL category, which cannot be part of the primary key
+UNCATEGORIZED = ""
+
+
+def price_bucket_sql(price: str) -> str:
+    """SQL expression mapping a price column to its bucket's lower bound."""
+    cases = " ".join(
+        f"WHEN {price} >= {bound!r} THEN {bound!r}" for bound in reversed(PRICE_BUCKETS[1:])
+    )
+    return f"CASE {cases} ELSE {PRICE_BUCKETS[0]!r} END"
+
+
+SQLITE_DDL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS product_facets_insert AFTER INSERT ON products
+    WHEN new.is_active BEGIN
+        INSERT INTO product_facets(category, price_from, product_count)
+        VALUES (coalesce(new.category, ''), {price_bucket_sql("new.price")}, 1)
+        ON CONFLICT(category, price_from) DO UPDATE SET product_count = product_count + 1;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS product_facets_delete AFTER DELETE ON products
+    WHEN old.is_active BEGIN
+        UPDATE product_facets SET product_count = product_count - 1
+        WHERE category = coalesce(old.category, '') AND price_from = {price_bucket_sql("old.price")};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS product_facets_update
+    AFTER UPDATE OF category, price, is_active ON products
+    WHEN old.category IS NOT new.category OR old.price IS NOT new.price
+        OR old.is_active IS NOT new.is_active BEGIN
+        UPDATE product_facets SET product_count = product_count - 1
+        WHERE category = coalesce(old.category, '') AND price_from = {price_bucket_sql("old.price")}
+            AND old.is_active;
+        INSERT INTO product_facets(category, price_from, product_count)
+        SELECT coalesce(new.category, ''), {price_bucket_sql("new.price")}, 1 WHERE new.is_active
+        ON CONFLICT(category, price_from) DO UPDATE SET product_count = product_count + 1;
+    END
+    """,
+]
+
+PG_DDL = [
+    f"""
+    CREATE OR REPLACE FUNCTION product_facets_apply() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            IF OLD.is_active THEN
+                UPDATE product_facets SET product_count = product_count - 1
+                WHERE category = coalesce(OLD.category, '')
+                    AND price_from = {price_bucket_sql("OLD.price")};
+            END IF;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            IF NEW.is_active THEN
+                INSERT INTO product_facets AS f (category, price_from, product_count)
+                VALUES (coalesce(NEW.category, ''), {price_bucket_sql("NEW.price")}, 1)
+                ON CONFLICT (category, price_from) DO UPDATE SET product_count = f.product_count + 1;
+            END IF;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER product_facets_sync
+    AFTER INSERT OR DELETE OR UPDATE OF category, price, is_active ON products
+    FOR EACH ROW EXECUTE FUNCTION product_facets_apply()
+    """,
+]
+
+# Recount from scratch, for databases that had products before the triggers
+BACKFILL = [
+    "DELETE FROM product_facets",
+    f"""
+    INSERT INTO product_facets(category, price_from, product_count)
+    SELECT coalesce(category, ''), {price_bucket_sql("price")}, count(*)
+    FROM products WHERE is_active
+    GROUP BY 1, 2
+    """,
+]
+
+
+def install_facet_counts(connection: Connection) -> None:
+    """
+    Create the triggers that maintain product_facets.
+    
+    Migration 0003_product_facets creates them from its own copy of
+    this DDL; this recreates them after a bulk load dropped them.
+    Existing triggers are left untouched. When the triggers are created,
+    the table is filled from the existing products. The product_facets
+    table itself must exist.
+    
+    Args:
+        connection: Sync connection (use run_sync from async code)
+    """
+    dialect_name = connection.dialect.name
+    
+    if dialect_name == "sqlite":
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'product_facets_insert'")
+        ).first()
+        statements = SQLITE_DDL
+    elif dialect_name == "postgresql":
+        exists = connection.execute(
+            text("SELECT 1 FROM pg_trigger WHERE tgname = 'product_facets_sync'")
+        ).first()
+        statements = PG_DDL
+    else:
+        return
+    
+    if not exists:
+        for statement in statements + BACKFILL:
+            connection.execute(text(statement))
+
+
+def split_price_range(
+    min_price: Optional[float],
+    max_price: Optional[float]
+) -> tuple[list[float], list]:
+    """
+    Split a price filter into whole buckets and the partial edges left over.
+    
+    Args:
+        min_price: Inclusive lower bound, if any
+        max_price: Inclusive upper bound, if any
+    
+    Returns:
+        (lower bounds of the buckets entirely inside the range,
+        conditions on Product.price selecting the rest of the range)
+    """
+    low = PRICE_BUCKETS[0] if min_price is None else min_price
+    uppers = PRICE_BUCKETS[1:] + (None,)
+    full = [
+        bound for bound, upper in zip(PRICE_BUCKETS, uppers)
+        if bound >= low and (max_price is None or (upper is not None and upper <= max_price))
+    ]
+    
+    if not full:
+        condition = Product.price >= low
+        if max_price is not None:
+            condition = and_(condition, Product.price <= max_price)
+        return [], [condition]
+    
+    edges = []
+    if low < full[0]:
+        edges.append(and_(Product.price >= low, Product.price < full[0]))
+    covered_to = uppers[PRICE_BUCKETS.index(full[-1])]
+    if covered_to is not None:
+        # max_price itself is in the next bucket, so this is at least an equality seek
+        edges.append(and_(Product.price >= covered_to, Product.price <= max_price))
+    return full, edges
+
+
+def edge_count_query(edges: list) -> Select:
+    """Count active products per category within the partial price edges."""
+    category = func.coalesce(Product.category, UNCATEGORIZED)
+    return (
+        select(category, func.count(Product.id))
+        .where(Product.is_active == True, or_(*edges))
+        .group_by(category)
+    )
+
+
+async def get_product_facets(
+    db: AsyncSession,
+    category: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None
+) -> ProductFacets:
+    """
+    Count active products per category and per price bucket.
+    
+    Each facet ignores its own filter, so the sidebar can offer the
+    other categories and price ranges: category counts apply the price
+    filter only, price bucket counts the category filter only. The
+    total applies both, like the list endpoint.
+    
+    Args:
+        db: Async database session
+        category: Optional category filter
+        min_price: Optional minimum price (inclusive)
+        max_price: Optional maximum price (inclusive)
+    
+    Returns:
+        Total and per-facet counts
+    """
+    rows = (await db.execute(
+        select(ProductFacet.category, ProductFacet.price_from, ProductFacet.product_count)
+        .where(ProductFacet.product_count > 0)
+    )).all()
+    
+    full, edges = split_price_range(min_price, max_price)
+    full = set(full)
+    
+    by_category: dict[str, int] = defaultdict(int)
+    by_bucket: dict[float, int] = dict.fromkeys(PRICE_BUCKETS, 0)
+    for row_category, price_from, count in rows:
+        if price_from in full:
+            by_category[row_category] += count
+        if not category or row_category == category:
+            by_bucket[price_from] += count
+    
+    # Products in partially covered buckets are counted from the price index
+    if edges:
+        for row_category, count in await db.execute(edge_count_query(edges)):
+            by_category[row_category] += count
+    
+    if category:
+        total = by_category.get(category, 0)
+    else:
+        total = sum(by_category.values())
+    
+    uppers = PRICE_BUCKETS[1:] + (None,)
+    return ProductFacets(
+        total=total,
+        categories=[
+            CategoryFacet(category=name or None, count=count)
+            for name, count in sorted(by_category.items(), key=lambda item: (-item[1], item[0]))
+            if count
+        ],
+        price_buckets=[
+            PriceBucketFacet(min_price=bound, max_price=upper, count=by_bucket[bound])
+            for bound, upper in zip(PRICE_BUCKETS, uppers)
+        ],
+    )
@@ -0,0 +1,120 @@
+"""
+HTTP Caching
+
+ETags, conditional GET and Cache-Control headers for product responses.
+
+- Single products: the ETag is built from the product id and its last
+  change (updated_at, or created_at if never updated), plus a digest of
+  the field set for sparse (`fields=`) responses
+- Lists, search results, facets and categories: the ETag is a digest of
+  the response's product cache key, which embeds the catalog generation
+  that every product write bumps
+
+Requests whose If-None-Match holds the current ETag are answered with
+304 Not Modified before any ORM object or Pydantic model is built.
+
+The catalog generation lives in the product cache. With the memory
+backend each worker counts its own; its ETags include the process, so
+one worker never validates another worker's ETag. Without a cache
+backend (CACHE_BACKEND=none), list-style ETags are a digest of the
+rendered body instead: a matching request still runs its query, but
+gets an empty 304 instead of the body.
+"""
+
+import hashlib
+import os
+import uuid
+from datetime import datetime
+from typing import Optional, Union
+
+from fastapi import Request, Response
+
+from app.config import settings
+from app.utils.cache import product_cache
+
+
+# Distinguishes this process's catalog generations from other workers'
+PROCESS_TOKEN = uuid.uuid4().hex[:8]
+
+
+def cache_control() -> str:
+    """Cache-Control value for cacheable product responses."""
+    return f"public, max-age={settings.HTTP_CACHE_MAX_AGE}, must-revalidate"
+
+
+def cache_headers(etag: Optional[str]) -> dict[str, str]:
+    """Validator headers for a response, or none if it has no ETag."""
+    if etag is None:
+        return {}
+    return {"ETag": etag, "Cache-Control": cache_control()}
+
+
+def product_etag(product_id: int, updated_at: Optional[datetime], created_at: Optional[datetime]) -> str:
+    """Strong ETag of a single product, from its id and last change."""
+    changed = updated_at or created_at
+    stamp = changed.strftime("%Y%m%d%H%M%S%f") if changed else "0"
+    return f'"{product_id}-{stamp}"'
+
+
+def fieldset_etag(etag: str, fields: tuple[str, ...]) -> str:
+    """ETag of a sparse response, distinct from the full product's and other field sets'."""
+    digest = hashlib.sha1(",".join(fields).encode()).hexdigest()[:8]
+    return f'{etag[:-1]}-{digest}"'
+
+
+def catalog_etag(cache_key: str) -> str:
+    """
+    Strong ETag of a list-style response stored under `cache_key`.
+    
+    The key already changes with the query parameters and the catalog
+    generation, so its digest identifies the response body.
+    """
+    scope = "" if product_cache.backend.shared else f"{os.getpid()}:{PROCESS_TOKEN}"
+    digest = hashlib.sha1(f"{scope}:{cache_key}".encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def content_etag(payload: bytes) -> str:
+    """Strong ETag of a rendered response body."""
+    return f'"{hashlib.sha1(payload).hexdigest()[:20]}"'
+
+
+def etag_matches(request: Request, etag: Optional[str]) -> bool:
+    """
+    Check the request's If-None-Match header against an ETag.
+    
+    Uses the weak comparison RFC 9110 prescribes for If-None-Match, so
+    validators a CDN has marked weak (W/"...") still match.
+    """
+    header = request.headers.get("if-none-match")
+    if not header or etag is None:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    """Empty 304 response carrying the current validators."""
+    return Response(status_code=304, headers=cache_headers(etag))
+
+
+def validated_response(request: Request, payload: Union[bytes, str], etag: Optional[str]) -> Response:
+    """
+    JSON response for a rendered list-style body.
+    
+    Without a catalog ETag (no cache backend), the ETag is derived from
+    the body, and a request already holding it gets a 304.
+    
+    Args:
+        request: The request, for its If-None-Match header
+        payload: Rendered JSON body
+        etag: Catalog ETag of the response, None if there is none
+    """
+    if isinstance(payload, str):
+        payload = payload.encode()
+    if etag is None:
+        etag = content_etag(payload)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+    return Response(content=payload, media_type="application/json", headers=cache_headers(etag))
@@ -0,0 +1,277 @@
+"""
+Inventory Reservations
+
+Atomic stock decrements for checkout.
+
+Each product is reserved with a single conditional UPDATE:
+    
+    UPDATE products SET stock_quantity = stock_quantity - :n
+    WHERE id = :id AND stock_quantity >= :n
+
+so concurrent buyers can never take more than is in stock, and nothing
+is read before it is written. A reservation of several products runs in
+one transaction and is all-or-nothing.
+
+Products that many buyers hit at once (flash sales) can split their
+stock across several counter rows in product_stock_shards. A
+reservation then decrements a shard picked at random, so concurrent
+buyers mostly update different rows instead of queueing on one row
+lock. Only when the probed shards are short does it lock all of the
+product's shards and take from several. A sharded reservation never
+writes the products row, which would queue every buyer on it again.
+Its products.stock_quantity is for display only: maintain_stock_totals
+copies the shard totals into it every STOCK_REFRESH_SECONDS, so the
+displayed stock (and the product's ETag) changes at most that often.
+
+SQLite serializes all writers anyway, so sharding pays off on
+PostgreSQL, where writes to different rows proceed in parallel. On
+SQLite, reservations in a process also queue on an asyncio lock:
+SQLite's busy handler polls for the database lock, and under heavy
+contention an unlucky writer can starve past busy_timeout.
+"""
+
+import asyncio
+import random
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.models.product import Product
+from app.models.product_stock_shard import ProductStockShard
+from app.utils.cache import product_cache
+
+
+# Shards tried with a plain conditional UPDATE before locking them all
+SHARD_PROBES = 2
+
+# Queues this process's reservations on SQLite in arrival order
+sqlite_write_lock = asyncio.Lock()
+
+
+class ProductNotFound(LookupError):
+    """Raised when a reservation names a product that does not exist."""
+    
+    def __init__(self, product_id: int):
+        super().__init__(f"Product with id {product_id} not found")
+        self.product_id = product_id
+
+
+class InsufficientStock(Exception):
+    """Raised when a product has less stock than requested, or is not for sale."""
+    
+    def __init__(self, product_id: int, message: Optional[str] = None):
+        super().__init__(message or f"Insufficient stock for product {product_id}")
+        self.product_id = product_id
+
+
+async def take_from_shards(db: AsyncSession, product_id: int, quantity: int, shards: int) -> bool:
+    """
+    Decrement a sharded product's stock by `quantity`.
+    
+    Probes up to SHARD_PROBES shards, starting at a random one, with a
+    conditional UPDATE each. If none of them holds enough, locks all the
+    product's shards and takes the quantity from several.
+    
+    Args:
+        db: Database session, inside the reservation's transaction
+        product_id: Product to reserve
+        quantity: Units to take
+        shards: The product's stock_shards
+    
+    Returns:
+        bool: False if the shards together hold less than `quantity`
+    """
+    start = random.randrange(shards)
+    for offset in range(min(shards, SHARD_PROBES)):
+        result = await db.execute(
+            update(ProductStockShard)
+            .where(
+                ProductStockShard.product_id == product_id,
+                ProductStockShard.shard == (start + offset) % shards,
+                ProductStockShard.quantity >= quantity
+            )
+            .values(quantity=ProductStockShard.quantity - quantity)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            return True
+    
+    # The stock is spread too thin: lock every shard and drain them in order
+    rows = (await db.execute(
+        select(ProductStockShard.shard, ProductStockShard.quantity)
+        .where(ProductStockShard.product_id == product_id)
+        .order_by(ProductStockShard.shard)
+        .with_for_update()
+    )).all()
+    if sum(available for _, available in rows) < quantity:
+        return False
+    
+    remaining = quantity
+    for shard, available in rows:
+        take = min(available, remaining)
+        if take:
+            await db.execute(
+                update(ProductStockShard)
+                .where(ProductStockShard.product_id == product_id, ProductStockShard.shard == shard)
+                .values(quantity=ProductStockShard.quantity - take)
+                .execution_options(synchronize_session=False)
+            )
+            remaining -= take
+        if not remaining:
+            break
+    return True
+
+
+async def refresh_stock_totals(conn: AsyncConnection) -> list[int]:
+    """
+    Copy shard totals into stock_quantity where they differ.
+    
+    Only products that have shards are visited, each by primary key, so
+    the cost follows the number of sharded products, not the catalog.
+    
+    Args:
+        conn: Connection inside a transaction; the caller commits
+    
+    Returns:
+        IDs of the products whose stock_quantity changed
+    """
+    shard_total = (
+        select(func.coalesce(func.sum(ProductStockShard.quantity), 0))
+        .where(ProductStockShard.product_id == Product.id)
+        .scalar_subquery()
+    )
+    result = await conn.execute(
+        update(Product)
+        .where(
+            Product.id.in_(select(ProductStockShard.product_id).distinct()),
+            Product.stock_quantity != shard_total
+        )
+        .values(stock_quantity=shard_total, updated_at=datetime.now(timezone.utc))
+        .returning(Product.id)
+    )
+    return list(result.scalars())
+
+
+async def maintain_stock_totals(engine, interval_seconds: float) -> None:
+    """
+    Refresh the displayed stock of sharded products every interval_seconds.
+    
+    Products whose total changed are dropped from the product cache.
+    Every worker may run it: the refresh is idempotent.
+    """
+    while True:
+        await asyncio.sleep(interval_seconds)
+        lock = sqlite_write_lock if engine.dialect.name == "sqlite" else nullcontext()
+        try:
+            async with lock, engine.begin() as conn:
+                changed = await refresh_stock_totals(conn)
+        except (SQLAlchemyError, OSError) as exc:
+            print(f"⚠️ Stock total refresh failed: {exc}")
+            continue
+        if changed:
+            await product_cache.invalidate_product(*changed)
+
+
+async def reserve_stock(db: AsyncSession, items: dict[int, int]) -> None:
+    """
+    Reserve stock for one or more products in a single transaction.
+    
+    Products are updated in id order, so two reservations sharing
+    products lock them in the same order and cannot deadlock. On the
+    first product that cannot be reserved the transaction is rolled
+    back, so either every product is decremented or none is.
+    
+    Args:
+        db: Database session
+        items: Units to reserve per product id
+    
+    Raises:
+        ProductNotFound: If a product does not exist
+        InsufficientStock: If a product is inactive or short of stock
+    """
+    # One writer at a time on SQLite; queue here rather than on the file lock
+    lock = sqlite_write_lock if db.get_bind().dialect.name == "sqlite" else nullcontext()
+    async with lock:
+        now = datetime.now(timezone.utc)
+        try:
+            for product_id, quantity in sorted(items.items()):
+                result = await db.execute(
+                    update(Product)
+                    .where(
+                        Product.id == product_id,
+                        Product.is_active == True,
+                        Product.stock_shards == 0,
+                        Product.stock_quantity >= quantity
+                    )
+                    .values(stock_quantity=Product.stock_quantity - quantity, updated_at=now)
+                    .execution_options(synchronize_session=False)
+                )
+                if result.rowcount:
+                    continue
+                
+                # The conditional update matched nothing; find out why
+                product = (await db.execute(
+                    select(Product.is_active, Product.stock_shards).where(Product.id == product_id)
+                )).first()
+                if product is None:
+                    raise ProductNotFound(product_id)
+                if not product.is_active:
+                    raise InsufficientStock(product_id, f"Product {product_id} is not for sale")
+                if not product.stock_shards or not await take_from_shards(
+                    db, product_id, quantity, product.stock_shards
+                ):
+                    raise InsufficientStock(product_id)
+        except Exception:
+            await db.rollback()
+            raise
+        
+        await db.commit()
+
+
+async def set_stock_shards(
+    db: AsyncSession,
+    product: Product,
+    shards: int,
+    stock_quantity: Optional[int] = None
+) -> None:
+    """
+    Spread a product's stock evenly over `shards` counters.
+    
+    Locks the product and its current shards, then replaces them. With
+    0 shards the stock moves back into products.stock_quantity. The
+    caller commits.
+    
+    Args:
+        db: Database session
+        product: Product to reshard
+        shards: New number of shards
+        stock_quantity: New total stock; defaults to the current total
+    """
+    await db.refresh(product, with_for_update=True)
+    if stock_quantity is None:
+        stock_quantity = product.stock_quantity
+        if product.stock_shards:
+            # FOR UPDATE cannot lock an aggregate, so sum the locked rows here
+            stock_quantity = sum((await db.execute(
+                select(ProductStockShard.quantity)
+                .where(ProductStockShard.product_id == product.id)
+                .with_for_update()
+            )).scalars())
+    
+    await db.execute(delete(ProductStockShard).where(ProductStockShard.product_id == product.id))
+    if shards:
+        base, extra = divmod(stock_quantity, shards)
+        await db.execute(
+            insert(ProductStockShard),
+            [
+                {"product_id": product.id, "shard": shard, "quantity": base + (shard < extra)}
+                for shard in range(shards)
+            ]
+        )
+    
+    product.stock_shards = shards
+    product.stock_quantity = stock_quantity
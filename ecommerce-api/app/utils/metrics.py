@@ -0,0 +1,252 @@
+"""
+Request Metrics
+
+Per-route request metrics in the Prometheus text format, served at
+GET /metrics:
+
+- http_requests_total: requests by method, route and status
+- http_request_duration_seconds: latency histogram by method and route
+- http_requests_in_progress: requests currently being handled
+- http_response_size_bytes: response body size histogram by route
+- db_queries_per_request / db_query_seconds_per_request: number of SQL
+  statements, and the time spent in them, for each request by route
+
+Routes are labelled with their path template ("/products/{product_id}"),
+so the number of series stays bounded. Requests that match no route
+share the "unmatched" label.
+
+Query counts come from SQLAlchemy cursor events, attributed to the
+request through a context variable set by MetricsMiddleware. Metrics are
+kept per process, like the memory cache: scrape each worker.
+"""
+
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from sqlalchemy import Engine, event
+
+
+# Latency buckets (seconds), finer than the usual defaults at the low end
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Metric:
+    """
+    Base class for a metric family.
+    
+    Values are keyed by a tuple of label values in `labelnames` order.
+    Updates happen on the event loop thread only, so no locking is needed.
+    """
+    
+    kind = "untyped"
+    
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple, object] = {}
+    
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+    
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """Monotonically increasing count."""
+    
+    kind = "counter"
+    
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+    
+    def samples(self) -> Iterator[str]:
+        for labels, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {value}"
+
+
+class Gauge(Counter):
+    """Value that goes up and down."""
+    
+    kind = "gauge"
+    
+    def dec(self, labels: tuple = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+
+class Histogram(Metric):
+    """
+    Distribution of observed values over fixed buckets.
+    
+    Each label set keeps a non-cumulative count per bucket plus the sum
+    and count of all observations; buckets are made cumulative on render.
+    """
+    
+    kind = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+    
+    def observe(self, labels: tuple, value: float) -> None:
+        state = self._values.get(labels)
+        if state is None:
+            state = self._values[labels] = [[0] * len(self.buckets), 0.0, 0]
+        # Bucket "le" bounds are inclusive, so find the first bound >= value
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            state[0][index] += 1
+        state[1] += value
+        state[2] += 1
+    
+    def samples(self) -> Iterator[str]:
+        names = self.labelnames + ("le",)
+        for labels, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket{_format_labels(names, labels + (bound,))} {cumulative}"
+            yield f"{self.name}_bucket{_format_labels(names, labels + ('+Inf',))} {count}"
+            plain = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{plain} {total}"
+            yield f"{self.name}_count{plain} {count}"
+
+
+requests_total = Counter(
+    "http_requests_total", "HTTP requests handled.", ("method", "route", "status")
+)
+request_duration = Histogram(
+    "http_request_duration_seconds", "Time from receiving a request to sending the last byte.", ("method", "route")
+)
+requests_in_progress = Gauge(
+    "http_requests_in_progress", "HTTP requests currently being handled.", ("method",)
+)
+response_size = Histogram(
+    "http_response_size_bytes", "Size of response bodies.", ("method", "route"), SIZE_BUCKETS
+)
+request_queries = Histogram(
+    "db_queries_per_request", "SQL statements executed per request.", ("method", "route"), QUERY_COUNT_BUCKETS
+)
+request_query_time = Histogram(
+    "db_query_seconds_per_request", "Time spent executing SQL per request.", ("method", "route")
+)
+
+METRICS: list[Metric] = [
+    requests_total, request_duration, requests_in_progress,
+    response_size, request_queries, request_query_time,
+]
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    return "\n".join(metric.render() for metric in METRICS) + "\n"
+
+
+class RequestStats:
+    """Database work done on behalf of one request."""
+    
+    __slots__ = ("queries", "query_time")
+    
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+
+
+# Stats of the request being handled, set by MetricsMiddleware
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_request.get()
+    if stats is not None and context is not None:
+        stats.queries += 1
+        stats.query_time += time.perf_counter() - context._metrics_started
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Count statements and their execution time for the current request."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def uninstrument_engine(engine: Engine) -> None:
+    """Remove the hooks added by instrument_engine()."""
+    event.remove(engine, "before_cursor_execute", _before_cursor_execute)
+    event.remove(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording the request metrics.
+    
+    Written as plain ASGI rather than BaseHTTPMiddleware, which would run
+    every request in an extra task and buffer streamed responses.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        method = scope["method"]
+        status_code = 500
+        body_size = 0
+        
+        async def send_and_measure(message):
+            nonlocal status_code, body_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                body_size += len(message.get("body", b""))
+            await send(message)
+        
+        stats = RequestStats()
+        token = current_request.set(stats)
+        requests_in_progress.inc((method,))
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_and_measure)
+        finally:
+            elapsed = time.perf_counter() - started
+            requests_in_progress.dec((method,))
+            current_request.reset(token)
+            
+            # The router stores the matched route in the scope
+            route = scope.get("route")
+            labels = (method, route.path if route is not None else "unmatched")
+            requests_total.inc(labels + (status_code,))
+            request_duration.observe(labels, elapsed)
+            response_size.observe(labels, body_size)
+            request_queries.observe(labels, stats.queries)
+            request_query_time.observe(labels, stats.query_time)
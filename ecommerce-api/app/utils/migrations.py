@@ -0,0 +1,108 @@
+"""
+Schema Revision Check
+
+Checks at startup that the database schema is at the Alembic head
+revision of this code, instead of creating missing tables with
+metadata.create_all() on every boot.
+
+The head revisions are read from the revision identifiers of the
+scripts in alembic/versions (parsed, not imported) and the database's
+from its alembic_version table, so the check is two small queries and
+does not import Alembic. Alembic is only loaded to upgrade the schema,
+when AUTO_MIGRATE is set.
+"""
+
+import ast
+from functools import lru_cache
+from pathlib import Path
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+
+# Alembic's script directory (the ecommerce-api/alembic folder)
+MIGRATIONS_DIR = Path(__file__).resolve().parents[2] / "alembic"
+
+
+class SchemaOutOfDate(RuntimeError):
+    """Raised at startup when the database schema is older than the code."""
+
+
+@lru_cache()
+def script_revisions() -> dict[str, tuple[str, ...]]:
+    """
+    Map each migration script's revision to the revisions it revises.
+    
+    Reads the module-level `revision` and `down_revision` assignments
+    that Alembic generates, without importing the scripts.
+    """
+    revisions = {}
+    for path in sorted((MIGRATIONS_DIR / "versions").glob("*.py")):
+        values = {}
+        for node in ast.parse(path.read_text(encoding="utf-8")).body:
+            if isinstance(node, ast.AnnAssign) and node.value is not None:
+                target, value = node.target, node.value
+            elif isinstance(node, ast.Assign) and len(node.targets) == 1:
+                target, value = node.targets[0], node.value
+            else:
+                continue
+            if isinstance(target, ast.Name) and target.id in ("revision", "down_revision"):
+                values[target.id] = ast.literal_eval(value)
+        
+        if "revision" in values:
+            down = values.get("down_revision")
+            if down is None:
+                down = ()
+            elif isinstance(down, str):
+                down = (down,)
+            revisions[values["revision"]] = tuple(down)
+    return revisions
+
+
+def head_revisions() -> set[str]:
+    """Revisions no other migration revises: the schema this code expects."""
+    revisions = script_revisions()
+    revised = {down for downs in revisions.values() for down in downs}
+    return set(revisions) - revised
+
+
+def database_revisions(connection: Connection) -> set[str]:
+    """Revisions recorded in the database's alembic_version table, if any."""
+    if not inspect(connection).has_table("alembic_version"):
+        return set()
+    return set(connection.execute(text("SELECT version_num FROM alembic_version")).scalars())
+
+
+def check_schema_revision(connection: Connection) -> str:
+    """
+    Compare the database schema with this code's migrations.
+    
+    Args:
+        connection: Sync connection (use run_sync from async code)
+    
+    Returns:
+        str: "current" at the head revision; "ahead" if the database has a
+        revision this code does not know (a newer release migrated it);
+        "behind" if migrations are pending or the schema was never created
+    """
+    current = database_revisions(connection)
+    if current == head_revisions():
+        return "current"
+    if current - set(script_revisions()):
+        return "ahead"
+    return "behind"
+
+
+def upgrade_schema() -> None:
+    """
+    Run `alembic upgrade head` in-process.
+    
+    Blocking; run it in a thread from async code. alembic.ini is not
+    loaded, so the server's logging configuration is left alone.
+    """
+    from alembic import command
+    from alembic.config import Config
+    
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS_DIR))
+    command.upgrade(config, "head")
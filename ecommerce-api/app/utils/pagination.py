@@ -0,0 +1,89 @@
+"""
+Pagination Utilities
+
+Provides opaque keyset cursors and a small TTL cache for list totals.
+
+Keyset pagination filters on the sort key of the last row seen instead
+of skipping rows with OFFSET, so every page costs the same index seek
+no matter how deep the client has paged.
+"""
+
+import base64
+import json
+import time
+from typing import Any, Hashable, Optional
+
+
+def encode_cursor(data: dict[str, Any]) -> str:
+    """
+    Encode cursor state into an opaque URL-safe string.
+    
+    Args:
+        data: JSON-serializable cursor state
+    
+    Returns:
+        Base64url encoded cursor without padding
+    """
+    raw = json.dumps(data, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict[str, Any]:
+    """
+    Decode a cursor produced by encode_cursor().
+    
+    Args:
+        cursor: Opaque cursor string from a previous response
+    
+    Returns:
+        Cursor state dictionary
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    
+    if not isinstance(data, dict):
+        raise ValueError("Invalid cursor")
+    return data
+
+
+class CountCache:
+    """
+    Time-bounded cache of row counts keyed by filter set.
+    
+    Totals are only used to render page counts, so a slightly stale
+    value is acceptable and saves a full COUNT(*) on every list call.
+    """
+    
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: dict[Hashable, tuple[float, int]] = {}
+    
+    def get(self, key: Hashable) -> Optional[int]:
+        """Return the cached count, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        
+        expires_at, count = entry
+        if expires_at < time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        return count
+    
+    def set(self, key: Hashable, count: int) -> None:
+        """Store a count for the configured TTL."""
+        if len(self._entries) >= self.max_entries:
+            # Drop the oldest entry (dicts keep insertion order)
+            self._entries.pop(next(iter(self._entries)))
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, count)
+    
+    def clear(self) -> None:
+        """Forget all counts, e.g. after the catalog changes."""
+        self._entries.clear()
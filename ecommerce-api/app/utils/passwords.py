@@ -0,0 +1,179 @@
+"""
+Password Hashing Pool
+
+Runs bcrypt in a bounded pool of worker processes so that hashing never
+blocks the event loop. A bcrypt hash at the default cost takes hundreds
+of milliseconds of CPU; done inline, a burst of logins would stall every
+other request served by the worker.
+
+- Workers are separate processes, so hashes run in parallel across cores
+- The pool is created by the first hash or verification, so a worker
+  that never authenticates anyone never forks it
+- At most PASSWORD_HASH_QUEUE_LIMIT jobs may be queued or running; past
+  that, requests are rejected with 503 instead of piling up
+- The bcrypt cost comes from BCRYPT_ROUNDS, and hashes made with any
+  other cost are reported as needing a rehash
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional
+
+from fastapi import HTTPException, status
+
+from app.config import settings
+
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
+
+
+def build_password_context(rounds: int) -> "CryptContext":
+    """
+    Create a bcrypt context for a fixed cost.
+    
+    Pinning min and max rounds to the cost makes needs_update() (and so
+    verify_and_update()) flag hashes made with a lower or higher cost.
+    passlib is imported here, on first use, rather than at startup.
+    
+    Args:
+        rounds: bcrypt cost factor (log2 of the iteration count)
+    
+    Returns:
+        Configured CryptContext
+    """
+    from passlib.context import CryptContext
+    
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+@lru_cache()
+def _worker_context(rounds: int) -> "CryptContext":
+    """Context reused by a worker process across jobs."""
+    return build_password_context(rounds)
+
+
+def _hash_in_worker(password: str, rounds: int) -> str:
+    return _worker_context(rounds).hash(password)
+
+
+def _verify_in_worker(password: str, hashed_password: str, rounds: int) -> tuple[bool, Optional[str]]:
+    return _worker_context(rounds).verify_and_update(password, hashed_password)
+
+
+class PasswordHasher:
+    """
+    Bounded process pool for bcrypt hashing and verification.
+    
+    The pool is created on first use, or up front by start(). Its
+    workers are then forked from a process whose database connections
+    and their threads already exist; they only run bcrypt, never touch
+    those, and exit without finalizing them.
+    
+    Args:
+        rounds: bcrypt cost for new hashes
+        workers: Number of worker processes (defaults to the CPU count)
+        queue_limit: Maximum jobs queued or running at once
+    """
+    
+    def __init__(self, rounds: int, workers: Optional[int] = None, queue_limit: int = 64):
+        self.rounds = rounds
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_limit = queue_limit
+        self.pending = 0
+        self.rejected = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+    
+    def start(self) -> None:
+        """Create the pool; the first job starts every worker process."""
+        if self._executor is not None:
+            return
+        
+        # Fork where available: spawn would re-import the __main__ module
+        # of the parent in every worker
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+    
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+    
+    async def hash(self, password: str) -> str:
+        """
+        Hash a password in the pool.
+        
+        Raises:
+            HTTPException: 503 if the queue is full
+        """
+        return await self._run(_hash_in_worker, password, self.rounds)
+    
+    async def verify_and_update(self, password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+        """
+        Verify a password in the pool.
+        
+        Returns:
+            (matches, new_hash): new_hash is set when the password matches
+            but the stored hash uses a different cost and should be replaced
+        
+        Raises:
+            HTTPException: 503 if the queue is full
+        """
+        return await self._run(_verify_in_worker, password, hashed_password, self.rounds)
+    
+    async def _run(self, function, *args):
+        """Submit a job unless the queue is full, and await its result."""
+        if self.pending >= self.queue_limit:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many authentication requests, please retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        
+        self.start()
+        executor = self._executor
+        self.pending += 1
+        try:
+            return await asyncio.wrap_future(executor.submit(function, *args))
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); replace the pool, unless
+            # another failed job already did
+            if self._executor is executor:
+                self._executor = None
+            executor.shutdown(wait=False)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Password hashing is temporarily unavailable",
+                headers={"Retry-After": "1"},
+            )
+        finally:
+            self.pending -= 1
+    
+    def stats(self) -> dict:
+        """Pool size and queue counters."""
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "queue_limit": self.queue_limit,
+            "rejected": self.rejected,
+        }
+
+
+# Global password hashing pool
+password_hasher = PasswordHasher(
+    rounds=settings.BCRYPT_ROUNDS,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    queue_limit=settings.PASSWORD_HASH_QUEUE_LIMIT
+)
@@ -0,0 +1,457 @@
+"""
+Full-Text Search
+
+Builds and queries the product full-text index.
+
+- SQLite: an FTS5 external-content table kept in sync by triggers,
+  ranked with BM25 and highlighted with snippet()
+- PostgreSQL: a partial GIN index over a weighted tsvector expression,
+  ranked with ts_rank and highlighted with ts_headline
+
+Both indexes only cover active products, so create, update and soft
+delete (is_active = False) keep them in sync without application code.
+Other databases fall back to a LIKE scan.
+
+Fuzzy search tolerates typos in product names by comparing trigrams,
+the three-character pieces pg_trgm cuts each word into ("  k", " ke",
+"ket", ...): a misspelled word still shares most of them.
+
+- SQLite: a product_trigrams side table (trigram, product_id) kept in
+  sync by triggers, read by primary key for the query's trigrams
+- PostgreSQL: pg_trgm's word_similarity through a partial GIN index
+"""
+
+import re
+import string
+from typing import Optional, Sequence
+
+from sqlalchemy import (
+    Connection, Select, column, desc, func, literal, literal_column, or_, select, table, text
+)
+
+from app.models.product import Product
+
+
+# Tags wrapped around matched terms in snippets
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+
+# BM25 column weights: a match in the name counts more than in the description
+SQLITE_NAME_WEIGHT = 10.0
+SQLITE_DESCRIPTION_WEIGHT = 1.0
+
+SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, description,
+        content='products', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products
+    WHEN new.is_active BEGIN
+        INSERT INTO products_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products
+    WHEN old.is_active BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_update
+    AFTER UPDATE OF name, description, is_active ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description)
+        SELECT 'delete', old.id, old.name, old.description WHERE old.is_active;
+        INSERT INTO products_fts(rowid, name, description)
+        SELECT new.id, new.name, new.description WHERE new.is_active;
+    END
+    """,
+]
+
+# Only active products are indexed, so an external-content 'rebuild'
+# (which would index every row) cannot be used for the initial fill
+SQLITE_BACKFILL = """
+    INSERT INTO products_fts(rowid, name, description)
+    SELECT id, name, description FROM products WHERE is_active
+"""
+
+# The query must repeat this expression verbatim for PostgreSQL to use the index
+PG_SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+)
+
+PG_DDL = [
+    f"""
+    CREATE INDEX IF NOT EXISTS ix_products_search
+    ON products USING GIN (({PG_SEARCH_VECTOR}))
+    WHERE is_active
+    """,
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE INDEX IF NOT EXISTS ix_products_name_trgm
+    ON products USING GIN (name gin_trgm_ops)
+    WHERE is_active
+    """,
+]
+
+PG_HEADLINE_OPTIONS = (
+    f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, "
+    "MaxWords=20, MinWords=5, MaxFragments=1"
+)
+
+
+# Characters that separate words in names, like spaces (pg_trgm splits on
+# any non-alphanumeric character)
+TRIGRAM_SEPARATORS = "-_,./&+()"
+
+# Product names are at most 255 characters and each space becomes three
+TRIGRAM_MAX_POSITION = 2 + 3 * 255 + 1
+
+ASCII_LOWERCASE = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def trigram_source_sql(name: str) -> str:
+    """
+    SQLite expression padding every word of a name as pg_trgm does.
+    
+    Each word gets two spaces before and one after, so its first letters
+    and its end form trigrams of their own. Trigrams ending in two spaces
+    span a word boundary and are skipped (see name_trigrams).
+    """
+    expression = f"lower({name})"
+    for separator in TRIGRAM_SEPARATORS:
+        expression = f"replace({expression}, '{separator}', ' ')"
+    return f"('  ' || replace({expression}, ' ', '   ') || ' ')"
+
+
+def trigram_select_sql(name: str) -> str:
+    """
+    SQLite select of the distinct trigrams of a name, one row each.
+    
+    The LIMIT keeps SQLite from flattening the subquery, which would
+    compute the padded name again for every position.
+    """
+    return (
+        f"SELECT DISTINCT substr(source, n, 3) AS trigram "
+        f"FROM (SELECT {trigram_source_sql(name)} AS source LIMIT 1) "
+        f"JOIN product_trigram_positions ON n <= length(source) - 2 "
+        f"WHERE substr(source, n + 1, 2) != '  '"
+    )
+
+
+def name_trigrams(name: str) -> set[str]:
+    """
+    Trigrams of a name or query, exactly as the SQLite triggers cut them.
+    
+    SQLite's lower() only folds ASCII letters, so this does the same.
+    """
+    name = name.translate(ASCII_LOWERCASE)
+    for separator in TRIGRAM_SEPARATORS:
+        name = name.replace(separator, " ")
+    source = "  " + name.replace(" ", "   ") + " "
+    return {source[i:i + 3] for i in range(len(source) - 2) if source[i + 1:i + 3] != "  "}
+
+
+# Every trigram row also holds the product's number of trigrams, which
+# ranks shorter names first among equally good matches. SQLite triggers
+# cannot use recursive CTEs, so the trigrams are cut with a join on a
+# table of character positions.
+SQLITE_TRIGRAM_DDL = [
+    "CREATE TABLE IF NOT EXISTS product_trigram_positions (n INTEGER PRIMARY KEY)",
+    """
+    CREATE TABLE IF NOT EXISTS product_trigrams (
+        trigram TEXT NOT NULL,
+        product_id INTEGER NOT NULL,
+        trigram_count INTEGER NOT NULL,
+        PRIMARY KEY (trigram, product_id)
+    ) WITHOUT ROWID
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS product_trigrams_insert AFTER INSERT ON products
+    WHEN new.is_active BEGIN
+        INSERT INTO product_trigrams(trigram, product_id, trigram_count)
+        SELECT trigram, new.id, count(*) OVER () FROM ({trigram_select_sql("new.name")});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS product_trigrams_delete AFTER DELETE ON products
+    WHEN old.is_active BEGIN
+        DELETE FROM product_trigrams
+        WHERE product_id = old.id AND trigram IN ({trigram_select_sql("old.name")});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS product_trigrams_update
+    AFTER UPDATE OF name, is_active ON products
+    WHEN old.name IS NOT new.name OR old.is_active IS NOT new.is_active BEGIN
+        DELETE FROM product_trigrams
+        WHERE old.is_active AND product_id = old.id AND trigram IN ({trigram_select_sql("old.name")});
+        INSERT INTO product_trigrams(trigram, product_id, trigram_count)
+        SELECT trigram, new.id, count(*) OVER () FROM ({trigram_select_sql("new.name")})
+        WHERE new.is_active;
+    END
+    """,
+]
+
+SQLITE_TRIGRAM_BACKFILL = f"""
+    INSERT INTO product_trigrams(trigram, product_id, trigram_count)
+    SELECT trigram, id, count(*) OVER (PARTITION BY id) FROM (
+        SELECT DISTINCT id, substr(source, n, 3) AS trigram
+        FROM (SELECT id, {trigram_source_sql("name")} AS source FROM products WHERE is_active LIMIT -1)
+        JOIN product_trigram_positions ON n <= length(source) - 2
+        WHERE substr(source, n + 1, 2) != '  '
+    )
+"""
+
+
+def install_search_index(connection: Connection) -> None:
+    """
+    Create the full-text index for the connection's database.
+    
+    Creates the fuzzy search trigram index too. The migrations create
+    both (0001b_product_search_index, 0006_product_trigrams) from their
+    own copies of this DDL; this recreates them after a bulk load
+    dropped them. Existing objects are left untouched. On SQLite, newly
+    created indexes are filled from existing products.
+    
+    Args:
+        connection: Sync connection (use run_sync from async code)
+    """
+    dialect_name = connection.dialect.name
+    
+    if dialect_name == "sqlite":
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'")
+        ).first()
+        for statement in SQLITE_DDL:
+            connection.execute(text(statement))
+        if not exists:
+            connection.execute(text(SQLITE_BACKFILL))
+        
+        trigrams_exist = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'product_trigrams'")
+        ).first()
+        for statement in SQLITE_TRIGRAM_DDL:
+            connection.execute(text(statement))
+        if not trigrams_exist:
+            connection.execute(
+                text("INSERT OR IGNORE INTO product_trigram_positions(n) VALUES (:n)"),
+                [{"n": n} for n in range(1, TRIGRAM_MAX_POSITION + 1)]
+            )
+            connection.execute(text(SQLITE_TRIGRAM_BACKFILL))
+    
+    elif dialect_name == "postgresql":
+        for statement in PG_DDL:
+            connection.execute(text(statement))
+
+
+def search_terms(q: str) -> list[str]:
+    """
+    Split a user query into lowercase word terms.
+    
+    Anything that is not a word character is dropped, so the terms are
+    safe to embed in FTS5 and tsquery syntax.
+    """
+    return re.findall(r"\w+", q.lower())
+
+
+def result_columns(fields: Optional[Sequence[str]], rank, snippet) -> list:
+    """
+    Columns for the requested result fields, every field if None.
+    
+    Unrequested rank and snippet expressions are left out of the select
+    (ts_headline in particular is costly); ordering by rank still works.
+    """
+    extra = {"rank": rank, "snippet": snippet}
+    if fields is None:
+        return [*Product.__table__.c, rank.label("rank"), snippet.label("snippet")]
+    return [extra[name].label(name) if name in extra else Product.__table__.c[name] for name in fields]
+
+
+def build_search_query(
+    dialect_name: str,
+    q: str,
+    limit: int,
+    fields: Optional[Sequence[str]] = None
+) -> Optional[Select]:
+    """
+    Build the ranked search statement for a dialect.
+    
+    Every term must match; the last term also matches as a prefix, so
+    partially typed words find results.
+    
+    Args:
+        dialect_name: SQLAlchemy dialect name of the target database
+        q: Raw search query
+        limit: Maximum number of results
+        fields: ProductSearchResult fields to select, all if None
+    
+    Returns:
+        Select yielding product columns plus `rank` (higher is more
+        relevant) and `snippet`, or None if the query has no terms
+    """
+    terms = search_terms(q)
+    if not terms:
+        return None
+    
+    if dialect_name == "sqlite":
+        return _sqlite_search(terms, limit, fields)
+    if dialect_name == "postgresql":
+        return _postgres_search(terms, limit, fields)
+    return like_search(q, limit, fields)
+
+
+def _sqlite_search(terms: list[str], limit: int, fields: Optional[Sequence[str]] = None) -> Select:
+    """FTS5 MATCH ranked by BM25."""
+    match = " ".join(f'"{term}"' for term in terms[:-1])
+    match = f'{match} "{terms[-1]}"*'.strip()
+    
+    fts = table("products_fts", column("rowid"))
+    fts_table = literal_column("products_fts")
+    bm25 = func.bm25(fts_table, SQLITE_NAME_WEIGHT, SQLITE_DESCRIPTION_WEIGHT)
+    snippet = func.snippet(fts_table, -1, HIGHLIGHT_START, HIGHLIGHT_END, "…", 16)
+    
+    return (
+        select(*result_columns(fields, -bm25, snippet))
+        .select_from(fts)
+        .join(Product, Product.id == fts.c.rowid)
+        .where(fts_table.op("MATCH")(match), Product.is_active == True)
+        .order_by(bm25)
+        .limit(limit)
+    )
+
+
+def _postgres_search(terms: list[str], limit: int, fields: Optional[Sequence[str]] = None) -> Select:
+    """tsvector match ranked by ts_rank, headlines computed for the top rows only."""
+    query_text = " & ".join(terms[:-1] + [f"{terms[-1]}:*"])
+    tsquery = func.to_tsquery(literal_column("'english'"), query_text)
+    vector = literal_column(PG_SEARCH_VECTOR)
+    
+    ranked = (
+        select(Product.id, func.ts_rank(vector, tsquery).label("rank"))
+        .where(Product.is_active == True, vector.op("@@")(tsquery))
+        .order_by(desc("rank"))
+        .limit(limit)
+        .subquery()
+    )
+    headline = func.ts_headline(
+        literal_column("'english'"),
+        func.concat_ws(" ", Product.name, Product.description),
+        tsquery,
+        PG_HEADLINE_OPTIONS,
+    )
+    
+    return (
+        select(*result_columns(fields, ranked.c.rank, headline))
+        .join(ranked, ranked.c.id == Product.id)
+        .order_by(ranked.c.rank.desc())
+    )
+
+
+def like_search(q: str, limit: int, fields: Optional[Sequence[str]] = None) -> Select:
+    """
+    Unranked substring search over name and description.
+    
+    Used for databases without a full-text index. It scans the table.
+    """
+    search_term = f"%{q}%"
+    return (
+        select(*result_columns(fields, literal_column("0.0"), literal_column("NULL")))
+        .where(
+            Product.is_active == True,
+            or_(
+                Product.name.ilike(search_term),
+                Product.description.ilike(search_term)
+            )
+        )
+        .limit(limit)
+    )
+
+
+def build_fuzzy_query(
+    dialect_name: str,
+    q: str,
+    limit: int,
+    threshold: float,
+    fields: Optional[Sequence[str]] = None
+) -> Optional[Select]:
+    """
+    Build the typo-tolerant name search for a dialect.
+    
+    Products are ranked by how much of the query their name contains,
+    from 1.0 (every trigram of the query) down to threshold; weaker
+    matches are left out. Returns no snippets.
+    
+    - SQLite: the share of the query's trigrams found in product_trigrams
+    - PostgreSQL: pg_trgm's word_similarity. The `<%` operator filters
+      on pg_trgm.word_similarity_threshold: run pg_similarity_threshold()
+      in the same transaction first
+    
+    Other databases fall back to an exact LIKE search.
+    
+    Args:
+        dialect_name: SQLAlchemy dialect name of the target database
+        q: Raw search query
+        limit: Maximum number of results
+        threshold: Least similarity of a match, between 0 and 1
+        fields: ProductSearchResult fields to select, all if None
+    
+    Returns:
+        Select yielding product columns plus `rank` (the similarity) and
+        `snippet` (NULL), or None if the query has no trigrams
+    """
+    if not name_trigrams(q):
+        return None
+    
+    if dialect_name == "sqlite":
+        return _sqlite_fuzzy_search(q, limit, threshold, fields)
+    if dialect_name == "postgresql":
+        return _postgres_fuzzy_search(q, limit, fields)
+    return like_search(q, limit, fields)
+
+
+def pg_similarity_threshold(threshold: float) -> Select:
+    """Statement setting the fuzzy match threshold for the current transaction (PostgreSQL)."""
+    return select(func.set_config("pg_trgm.word_similarity_threshold", str(threshold), True))
+
+
+def _sqlite_fuzzy_search(q: str, limit: int, threshold: float, fields: Optional[Sequence[str]] = None) -> Select:
+    """Trigram postings grouped by product, best shares of the query first."""
+    query_trigrams = sorted(name_trigrams(q))
+    trigrams = table("product_trigrams", column("trigram"), column("product_id"), column("trigram_count"))
+    similarity = (func.count() * 1.0 / len(query_trigrams)).label("similarity")
+    trigram_count = func.max(trigrams.c.trigram_count).label("trigram_count")
+    
+    matches = (
+        select(trigrams.c.product_id, similarity, trigram_count)
+        .where(trigrams.c.trigram.in_(query_trigrams))
+        .group_by(trigrams.c.product_id)
+        .having(similarity >= threshold)
+        .order_by(similarity.desc(), trigram_count, trigrams.c.product_id)
+        .limit(limit)
+        .subquery()
+    )
+    
+    return (
+        select(*result_columns(fields, matches.c.similarity, literal_column("NULL")))
+        .join(matches, matches.c.product_id == Product.id)
+        .where(Product.is_active == True)
+        .order_by(matches.c.similarity.desc(), matches.c.trigram_count, Product.id)
+    )
+
+
+def _postgres_fuzzy_search(q: str, limit: int, fields: Optional[Sequence[str]] = None) -> Select:
+    """word_similarity match through the GIN trigram index."""
+    similarity = func.word_similarity(q, Product.name)
+    return (
+        select(*result_columns(fields, similarity, literal_column("NULL")))
+        .where(Product.is_active == True, literal(q).op("<%")(Product.name))
+        .order_by(similarity.desc(), Product.id)
+        .limit(limit)
+    )
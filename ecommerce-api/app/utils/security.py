@@ -3,40 +3,55 @@ Security Utilities
 
 Provides password hashing, JWT token creation, and user authentication.
 Uses bcrypt for password hashing and python-jose for JWT handling.
+passlib and jose are imported on first use, to keep them out of the
+worker startup time.
+Request handlers should use the async hashing functions, which run
+bcrypt in the password hashing pool instead of on the event loop.
 """
 
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User
+from app.utils.passwords import build_password_context, password_hasher
 
 
-# Password hashing context using bcrypt
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+@lru_cache()
+def password_context():
+    """Password hashing context using bcrypt at the configured cost."""
+    return build_password_context(settings.BCRYPT_ROUNDS)
+
 
 # OAuth2 scheme for extracting token from Authorization header
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# Same, for endpoints anonymous callers may use too
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login", auto_error=False)
+
 
 def hash_password(password: str) -> str:
     """
     Hash a plain text password using bcrypt.
     
+    Runs in the calling thread; use hash_password_async in handlers.
+    
     Args:
         password: Plain text password
         
     Returns:
         Hashed password string
     """
-    return pwd_context.hash(password)
+    return password_context().hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -50,7 +65,41 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         True if password matches, False otherwise
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_context().verify(plain_password, hashed_password)
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    Hash a plain text password in the password hashing pool.
+    
+    Args:
+        password: Plain text password
+    
+    Returns:
+        Hashed password string
+    
+    Raises:
+        HTTPException: 503 if the hashing queue is full
+    """
+    return await password_hasher.hash(password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    """
+    Verify a password in the password hashing pool.
+    
+    Args:
+        plain_password: Plain text password to verify
+        hashed_password: Hashed password to compare against
+    
+    Returns:
+        (matches, new_hash): new_hash is a replacement hash when the
+        password matches but was hashed with a different BCRYPT_ROUNDS
+    
+    Raises:
+        HTTPException: 503 if the hashing queue is full
+    """
+    return await password_hasher.verify_and_update(plain_password, hashed_password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -77,6 +126,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     to_encode.update({"exp": expire})
     
     # Encode and return the token
+    from jose import jwt
+    
     encoded_jwt = jwt.encode(
         to_encode,
         settings.SECRET_KEY,
@@ -85,22 +136,135 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
-async def get_current_user(
+@dataclass(frozen=True)
+class Principal:
+    """
+    Authenticated caller, built from verified token claims.
+    
+    Carries what authorization checks need, so authenticated routes
+    do not have to load the User row.
+    
+    Attributes:
+        id: User ID
+        email: User's email address
+        is_admin: Whether the user has admin privileges
+        token_version: User version stamp the token was issued for
+    """
+    id: int
+    email: str
+    is_admin: bool
+    token_version: int
+
+
+class TokenCache:
+    """
+    Bounded cache of verified tokens mapped to principals.
+    
+    Entries expire at the earlier of the token's own expiry and
+    TOKEN_CACHE_TTL_SECONDS. The least recently used entry is evicted
+    once max_entries is reached.
+    """
+    
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, Principal]] = OrderedDict()
+    
+    def get(self, token: str) -> Optional[Principal]:
+        """Return the cached principal for a token, or None."""
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        
+        expires_at, principal = entry
+        if expires_at < time.time():
+            del self._entries[token]
+            return None
+        
+        self._entries.move_to_end(token)
+        return principal
+    
+    def set(self, token: str, principal: Principal, token_expires_at: float) -> None:
+        """Cache a verified principal until the token or cache TTL expires."""
+        expires_at = min(token_expires_at, time.time() + self.ttl_seconds)
+        self._entries[token] = (expires_at, principal)
+        self._entries.move_to_end(token)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def discard_user(self, user_id: int) -> None:
+        """Drop every cached token belonging to a user."""
+        for token in [t for t, (_, p) in self._entries.items() if p.id == user_id]:
+            del self._entries[token]
+    
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+# Verified tokens of this process
+token_cache = TokenCache(
+    max_entries=settings.TOKEN_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.TOKEN_CACHE_TTL_SECONDS
+)
+
+# Lowest valid token_version per user, for users revoked by this process
+revoked_versions: dict[int, int] = {}
+
+
+def create_user_token(user: User) -> str:
+    """
+    Create an access token carrying the user's id and status claims.
+    
+    Args:
+        user: User to issue the token for
+    
+    Returns:
+        Encoded JWT token string
+    """
+    return create_access_token(data={
+        "sub": str(user.id),
+        "email": user.email,
+        "adm": bool(user.is_admin),
+        "ver": user.token_version or 0,
+    })
+
+
+def revoke_user_tokens(user: User) -> None:
+    """
+    Invalidate every token issued to a user so far.
+    
+    Bumps the user's version stamp; tokens carrying an older version are
+    rejected. Call this whenever is_active or is_admin changes, then
+    commit. Other workers drop their cached entries within
+    TOKEN_CACHE_TTL_SECONDS and re-check the stamp against the database.
+    """
+    user.token_version = (user.token_version or 0) + 1
+    revoked_versions[user.id] = user.token_version
+    token_cache.discard_user(user.id)
+
+
+async def get_current_principal(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
     """
-    Dependency to get the current authenticated user from JWT token.
+    Dependency to get the authenticated principal from a JWT token.
+    
+    A token seen recently is answered from token_cache without touching
+    the database. Otherwise the signature is verified and the user row is
+    loaded once to confirm the account is active and the token's version
+    stamp is current.
     
     Args:
         token: JWT token from Authorization header
-        db: Database session
+        db: Async database session (only used on a cache miss)
         
     Returns:
-        User object if authentication is successful
+        Principal for the token's user
         
     Raises:
-        HTTPException: If token is invalid or user not found
+        HTTPException: If token is invalid, revoked, or the user is
+            not found or deactivated
     """
     # Exception for invalid credentials
     credentials_exception = HTTPException(
@@ -109,6 +273,15 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
+    # Hot path: token already verified by this process
+    principal = token_cache.get(token)
+    if principal is not None:
+        if principal.token_version < revoked_versions.get(principal.id, 0):
+            raise credentials_exception
+        return principal
+    
+    from jose import JWTError, jwt
+    
     try:
         # Decode the JWT token
         payload = jwt.decode(
@@ -117,18 +290,17 @@ async def get_current_user(
             algorithms=[settings.ALGORITHM]
         )
         
-        # Extract email from token
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-            
-    except JWTError:
+        # Extract user id and version stamp from token
+        user_id = int(payload["sub"])
+        token_version = int(payload["ver"])
+    
+    except (JWTError, KeyError, TypeError, ValueError):
         raise credentials_exception
     
     # Look up user in database
-    user = db.query(User).filter(User.email == email).first()
+    user = await db.get(User, user_id)
     
-    if user is None:
+    if user is None or user.token_version != token_version:
         raise credentials_exception
     
     if not user.is_active:
@@ -137,4 +309,66 @@ async def get_current_user(
             detail="User account is deactivated"
         )
     
+    principal = Principal(
+        id=user.id,
+        email=user.email,
+        is_admin=bool(user.is_admin),
+        token_version=user.token_version
+    )
+    token_cache.set(token, principal, token_expires_at=payload["exp"])
+    
+    return principal
+
+
+async def get_optional_principal(
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> Optional[Principal]:
+    """
+    Dependency to get the authenticated principal, if there is one.
+    
+    Args:
+        token: JWT token from Authorization header, if sent
+        db: Async database session (only used on a cache miss)
+    
+    Returns:
+        Principal for the token's user, or None for anonymous callers
+    
+    Raises:
+        HTTPException: If a token is sent but is not valid
+    """
+    if token is None:
+        return None
+    return await get_current_principal(token, db)
+
+
+async def get_current_user(
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """
+    Dependency to get the current authenticated User row.
+    
+    Use get_current_principal instead where id and is_admin are enough,
+    which avoids this extra query.
+    
+    Args:
+        principal: Authenticated principal
+        db: Async database session
+    
+    Returns:
+        User object for the principal
+    
+    Raises:
+        HTTPException: If the user no longer exists
+    """
+    user = await db.get(User, principal.id)
+    
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
     return user
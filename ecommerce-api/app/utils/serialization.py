@@ -0,0 +1,132 @@
+"""
+Fast JSON Serialization
+
+Opt-in path (FAST_JSON_RESPONSES) for the product list and search
+responses, where building a Pydantic model per product dominates the
+CPU cost of large pages.
+
+Rows are selected as plain column tuples (no ORM identity map or
+attribute instrumentation), validated in one call by a prebuilt
+TypeAdapter over a TypedDict that mirrors the response schema, and
+encoded with orjson. Needs the optional `orjson` package.
+
+Sparse fieldsets (`fields=` on the product routes) use the same row
+schemas restricted to the requested fields; their validators are
+cached per field set and serialize with Pydantic's own encoder, so they
+work without orjson.
+"""
+
+from functools import lru_cache
+from typing import Any, Optional
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+from typing_extensions import TypedDict
+
+from app.schemas.product import ProductResponse, ProductSearchResult
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def require_orjson() -> None:
+    """
+    Check that the fast serialization path is available.
+    
+    Raises:
+        RuntimeError: If orjson is not installed
+    """
+    if orjson is None:
+        raise RuntimeError("FAST_JSON_RESPONSES requires the 'orjson' package")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response encoded with orjson.
+    
+    UTC datetimes are written with a "Z" suffix, as Pydantic writes them,
+    so both serialization paths produce the same documents.
+    """
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+
+
+def row_schema(model: type[BaseModel], fields: Optional[tuple[str, ...]] = None) -> type:
+    """
+    Build a TypedDict with the same fields as a response model.
+    
+    Validating into dicts instead of model instances skips creating an
+    object per row, and the result can be handed to orjson as is. With
+    fields, only those fields of the model are kept; other keys in the
+    validated data are ignored.
+    """
+    fields = {
+        name: field.annotation for name, field in model.model_fields.items()
+        if fields is None or name in fields
+    }
+    return TypedDict(f"{model.__name__}Row", fields)
+
+
+def parse_fields(fields: Optional[str], model: type[BaseModel]) -> Optional[tuple[str, ...]]:
+    """
+    Parse a comma-separated `fields=` parameter against a response model.
+    
+    Args:
+        fields: Raw parameter, e.g. "name,price,image_url"
+        model: Response model the names must belong to
+    
+    Returns:
+        The requested names plus "id", in the model's field order, or
+        None (every field) if no fields were given
+    
+    Raises:
+        ValueError: If a name is not a field of the model
+    """
+    if fields is None:
+        return None
+    names = {name.strip() for name in fields.split(",") if name.strip()}
+    if not names:
+        return None
+    
+    unknown = names - model.model_fields.keys()
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    
+    # Clients need the id to tell products apart, and keyset pages to resume
+    names.add("id")
+    return tuple(name for name in model.model_fields if name in names)
+
+
+# Built once, on first use: compiling a TypeAdapter's validator is slow
+# enough to show in the startup time of workers that never use it
+@lru_cache()
+def product_rows() -> TypeAdapter:
+    """Validator for a page of product rows."""
+    return TypeAdapter(list[row_schema(ProductResponse)])
+
+
+@lru_cache()
+def search_rows() -> TypeAdapter:
+    """Validator for a list of search result rows."""
+    return TypeAdapter(list[row_schema(ProductSearchResult)])
+
+
+@lru_cache()
+def search_results() -> TypeAdapter:
+    """Encoder for a list of search result models, as FastAPI would."""
+    return TypeAdapter(list[ProductSearchResult])
+
+
+@lru_cache(maxsize=256)
+def sparse_row(model: type[BaseModel], fields: tuple[str, ...]) -> TypeAdapter:
+    """Validator for one row holding the given fields of a model."""
+    return TypeAdapter(row_schema(model, fields))
+
+
+@lru_cache(maxsize=256)
+def sparse_rows(model: type[BaseModel], fields: tuple[str, ...]) -> TypeAdapter:
+    """Validator for a list of rows holding the given fields of a model."""
+    return TypeAdapter(list[row_schema(model, fields)])
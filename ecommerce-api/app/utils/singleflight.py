@@ -0,0 +1,122 @@
+"""
+Request Coalescing
+
+Single-flight execution of identical reads: while a read of some key is
+running, concurrent callers asking for the same key wait for its result
+instead of running the same query and serialization again. A burst of
+identical cache misses (a product launch, a popular filter page) then
+costs one database query however many clients arrive at once.
+
+The read runs in a task of its own, so a caller that goes away (a
+cancelled request) does not cancel it for the others. Safeguards:
+
+- max_waiters: callers beyond this many waiters run the read themselves,
+  so one slow flight cannot hold an unbounded crowd (0 disables
+  coalescing altogether)
+- timeout: a waiter whose flight has not finished after this many
+  seconds gives up on it and runs the read itself
+- forget(): after a write, reads already running may return the old
+  state; they still answer the callers waiting on them, but later
+  callers start a new flight
+
+Flights are per process, like the memory cache.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+
+T = TypeVar("T")
+
+
+class Flight:
+    """A running read and the number of callers waiting on it."""
+    
+    __slots__ = ("task", "waiters")
+    
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Group of reads coalesced by key.
+    
+    Example:
+        product = await flights.run(("product", product_id), load_product)
+    """
+    
+    def __init__(self, max_waiters: int = 1000, timeout: float = 5.0):
+        self.max_waiters = max_waiters
+        self.timeout = timeout
+        self.flights: dict[Hashable, Flight] = {}
+        self.started = 0
+        self.shared = 0
+        self.overflows = 0
+        self.timeouts = 0
+    
+    async def run(self, key: Hashable, work: Callable[[], Awaitable[T]]) -> T:
+        """
+        Return the result of `await work()`, sharing a running call for the same key.
+        
+        Args:
+            key: Identifies the read; calls with equal keys must be interchangeable
+            work: Coroutine function performing the read
+        
+        Returns:
+            The result of the flight (exceptions are raised to every caller)
+        """
+        if self.max_waiters <= 0:
+            return await work()
+        
+        flight = self.flights.get(key)
+        if flight is None:
+            flight = self.start(key, work)
+            # Shielded: cancelling this caller leaves the flight to the others
+            return await asyncio.shield(flight.task)
+        
+        if flight.waiters >= self.max_waiters:
+            self.overflows += 1
+            return await work()
+        
+        flight.waiters += 1
+        self.shared += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(flight.task), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+        finally:
+            flight.waiters -= 1
+        return await work()
+    
+    def start(self, key: Hashable, work: Callable[[], Awaitable[Any]]) -> Flight:
+        """Run work in a new task registered under key."""
+        flight = Flight(asyncio.get_running_loop().create_task(work()))
+        self.flights[key] = flight
+        self.started += 1
+        
+        def finished(task: asyncio.Task) -> None:
+            # forget() may have replaced this flight already
+            if self.flights.get(key) is flight:
+                del self.flights[key]
+            # Mark the exception retrieved in case every caller went away
+            if not task.cancelled():
+                task.exception()
+        
+        flight.task.add_done_callback(finished)
+        return flight
+    
+    def forget(self) -> None:
+        """Make later callers start new flights; running ones finish for their waiters."""
+        self.flights = {}
+    
+    def stats(self) -> dict[str, int]:
+        """Flight counters since startup, for /health."""
+        return {
+            "in_flight": len(self.flights),
+            "started": self.started,
+            "shared": self.shared,
+            "overflows": self.overflows,
+            "timeouts": self.timeouts,
+        }
@@ -0,0 +1,54 @@
+"""
+Startup Report
+
+Times the phases of a worker's startup, so slow boots (which delay
+rolling restarts and autoscaling) can be traced to a phase:
+
+- import: from the first app module being imported until app.main has
+  built the application (framework, models, routers and middleware)
+- one entry per initialization step of the lifespan hook
+
+The report is printed once the worker is ready and included in
+GET /health. benchmarks/bench_startup.py breaks the import phase down
+by package and checks the total against a time budget.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class StartupReport:
+    """Durations of the startup phases of this process, in start order."""
+    
+    def __init__(self):
+        self.phases: dict[str, float] = {}
+    
+    def record(self, name: str, seconds: float) -> None:
+        self.phases[name] = seconds
+    
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the block as the phase `name`."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+    
+    def as_dict(self) -> dict:
+        """Milliseconds per phase and in total."""
+        return {
+            "phases_ms": {name: round(seconds * 1000, 1) for name, seconds in self.phases.items()},
+            "total_ms": round(sum(self.phases.values()) * 1000, 1),
+        }
+    
+    def summary(self) -> str:
+        """One line for the log, e.g. "412 ms (import 350 ms, schema check 3 ms)"."""
+        report = self.as_dict()
+        phases = ", ".join(f"{name} {ms:.0f} ms" for name, ms in report["phases_ms"].items())
+        return f"{report['total_ms']:.0f} ms ({phases})"
+
+
+# Startup phases of this worker
+startup_report = StartupReport()
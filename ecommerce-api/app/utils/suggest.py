@@ -0,0 +1,485 @@
+"""
+Autocomplete Index
+
+In-memory prefix index behind GET /products/suggest, so search-as-you-type
+never reaches the database.
+
+Active product names are kept casefolded in one sorted array, so the names
+starting with a prefix form a contiguous range found with two bisects. A
+max segment tree over the products' stock picks the best-stocked names of
+a range without visiting every match: the range splits into O(log n)
+subtrees, and a heap keeps expanding the subtree holding the most stock.
+A lookup costs O(limit * log n) however many names match.
+
+Writes are applied as they are committed:
+
+- a stock change rewrites the product's leaf in the tree
+- a deactivated or renamed product gets a leaf of -1 (a tombstone)
+- new and renamed products go to a small sorted overlay, searched
+  directly, which is merged into the array in a worker thread once it
+  holds OVERLAY_LIMIT entries
+
+Categories are a separate sorted list, ranked by their number of active
+products.
+
+Every change is an idempotent upsert of the product's current state, so
+changes made while a new array is built in the background are recorded
+and replayed onto it. The index is per process, like the memory cache:
+it is loaded at startup and, if SUGGEST_REFRESH_SECONDS is set, reloaded
+periodically to pick up other workers' writes.
+"""
+
+import asyncio
+import heapq
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from typing import Iterable, NamedTuple, Optional
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.models.product import Product
+
+
+# New or renamed products held in the overlay before a merge is started
+OVERLAY_LIMIT = 4096
+
+# Sorts after every character, so prefix + MAX_CHAR bounds a prefix range
+MAX_CHAR = "\U0010ffff"
+
+# Seconds before a failed load is retried, when there is no refresh interval
+LOAD_RETRY_SECONDS = 30
+
+
+class IndexedProduct(NamedTuple):
+    """The product fields the index keeps."""
+    id: int
+    name: str
+    category: Optional[str]
+    stock_quantity: int
+    is_active: bool
+    
+    @classmethod
+    def of(cls, product) -> "IndexedProduct":
+        """Snapshot a Product (or a row with the same columns)."""
+        return cls(product.id, product.name, product.category, product.stock_quantity, product.is_active)
+
+
+def normalize(text: str) -> str:
+    """Casefold and collapse whitespace; a trailing space (a finished word) is kept."""
+    key = " ".join(text.casefold().split())
+    if key and text[-1:].isspace():
+        key += " "
+    return key
+
+
+class PrefixArray:
+    """
+    Sorted names with a max segment tree over their stock.
+    
+    Only the tree's leaves change after construction: -1 marks an entry
+    that is no longer live.
+    """
+    
+    def __init__(self, entries: list[tuple[str, str, int, int, int]]):
+        """
+        Args:
+            entries: (key, name, product id, stock, category code) sorted by key
+        """
+        count = len(entries)
+        self.keys = [entry[0] for entry in entries]
+        self.names = [name if name != key else key for key, name, _, _, _ in entries]
+        self.ids = array("q", (entry[2] for entry in entries))
+        self.categories = array("i", (entry[4] for entry in entries))
+        
+        self.size = 1
+        while self.size < count:
+            self.size *= 2
+        tree = array("q", [-1]) * (2 * self.size)
+        tree[self.size:self.size + count] = array("q", (max(entry[3], 0) for entry in entries))
+        for node in range(self.size - 1, 0, -1):
+            left, right = tree[2 * node], tree[2 * node + 1]
+            tree[node] = left if left > right else right
+        self.tree = tree
+        
+        # Product ids in ascending order and the index of each, for find();
+        # unlike a table indexed by id, the size does not depend on how
+        # large or sparse the ids are
+        self.position = array("q", sorted(range(count), key=self.ids.__getitem__))
+        self.sorted_ids = array("q", (self.ids[index] for index in self.position))
+    
+    def __len__(self) -> int:
+        return len(self.keys)
+    
+    def find(self, product_id: int) -> int:
+        """Index of the product's live entry, or -1."""
+        found = bisect_left(self.sorted_ids, product_id)
+        if found == len(self.sorted_ids) or self.sorted_ids[found] != product_id:
+            return -1
+        index = self.position[found]
+        return index if self.tree[self.size + index] >= 0 else -1
+    
+    def set_stock(self, index: int, stock: int) -> None:
+        """Set an entry's leaf (-1 removes it) and update its ancestors."""
+        tree = self.tree
+        node = self.size + index
+        tree[node] = stock
+        node //= 2
+        while node:
+            left, right = tree[2 * node], tree[2 * node + 1]
+            best = left if left > right else right
+            if tree[node] == best:
+                break
+            tree[node] = best
+            node //= 2
+    
+    def top(self, key: str, limit: int) -> list[tuple[int, int]]:
+        """(stock, index) of the best-stocked live entries starting with key."""
+        tree, size = self.tree, self.size
+        span = 2 * size
+        low = bisect_left(self.keys, key) + size
+        high = bisect_left(self.keys, key + MAX_CHAR) + size
+        
+        # Heap items are ints: -(stock * 64 + depth) * span + node, so the
+        # most stock pops first and ties go to the deeper node (many names
+        # with equal stock do not expand the range level by level). Plain
+        # ints are cheaper to compare and allocate than tuples.
+        heap = []
+        while low < high:
+            if low & 1:
+                if tree[low] >= 0:
+                    heap.append(-(tree[low] * 64 + low.bit_length()) * span + low)
+                low += 1
+            if high & 1:
+                high -= 1
+                if tree[high] >= 0:
+                    heap.append(-(tree[high] * 64 + high.bit_length()) * span + high)
+            low //= 2
+            high //= 2
+        heapq.heapify(heap)
+        
+        found = []
+        while heap and len(found) < limit:
+            item = heapq.heappop(heap)
+            node = item % span
+            if node >= size:
+                found.append((tree[node], node - size))
+                continue
+            for child in (2 * node, 2 * node + 1):
+                if tree[child] >= 0:
+                    heapq.heappush(heap, -(tree[child] * 64 + child.bit_length()) * span + child)
+        return found
+    
+    def live_entries(self) -> Iterable[tuple[str, str, int, int, int]]:
+        """Entries that are still live, in key order."""
+        tree, size = self.tree, self.size
+        for index, key in enumerate(self.keys):
+            stock = tree[size + index]
+            if stock >= 0:
+                yield key, self.names[index], self.ids[index], stock, self.categories[index]
+    
+    def memory_bytes(self) -> int:
+        """Approximate size of the array, its strings included."""
+        strings = sum(map(sys.getsizeof, self.keys)) + sum(
+            sys.getsizeof(name) for name, key in zip(self.names, self.keys) if name is not key
+        )
+        containers = sys.getsizeof(self.keys) + sys.getsizeof(self.names)
+        arrays = sum(
+            item.itemsize * len(item)
+            for item in (self.ids, self.categories, self.tree, self.position, self.sorted_ids)
+        )
+        return strings + containers + arrays
+
+
+class Categories:
+    """Category names with their number of active products, sorted by key."""
+    
+    def __init__(self):
+        self.names: list[str] = []
+        self.codes: dict[str, int] = {}
+        self.counts: list[int] = []
+        self.keys: list[tuple[str, int]] = []
+    
+    def code(self, category: Optional[str]) -> int:
+        """Code of a category, added if new (-1 for none)."""
+        if category is None:
+            return -1
+        code = self.codes.get(category)
+        if code is None:
+            code = len(self.names)
+            self.names.append(category)
+            self.codes[category] = code
+            self.counts.append(0)
+            entry = (normalize(category), code)
+            self.keys.insert(bisect_left(self.keys, entry), entry)
+        return code
+    
+    def add(self, code: int, count: int) -> None:
+        if code >= 0:
+            self.counts[code] += count
+    
+    def search(self, key: str, limit: int) -> list[tuple[str, int]]:
+        """(category, active products) starting with key, most products first."""
+        low = bisect_left(self.keys, (key,))
+        high = bisect_left(self.keys, (key + MAX_CHAR,))
+        matches = [(self.counts[code], self.names[code]) for _, code in self.keys[low:high] if self.counts[code] > 0]
+        return [(name, count) for count, name in heapq.nlargest(limit, matches)]
+    
+    def copy(self) -> "Categories":
+        categories = Categories()
+        categories.names, categories.codes = list(self.names), dict(self.codes)
+        categories.counts, categories.keys = list(self.counts), list(self.keys)
+        return categories
+
+
+class SuggestIndex:
+    """
+    Prefix index of active product names and categories.
+    
+    All methods run on the event loop thread; only building a new
+    PrefixArray happens in a worker thread. While one is built, changes
+    are applied to the current index and recorded, then replayed onto
+    the new one.
+    """
+    
+    def __init__(self):
+        self.array = PrefixArray([])
+        self.array_bytes = 0
+        # product id -> (key, name, stock, category code), and (key, id) sorted
+        self.overlay: dict[int, tuple[str, str, int, int]] = {}
+        self.overlay_keys: list[tuple[str, int]] = []
+        self.categories = Categories()
+        
+        self.ready = False
+        self.build_seconds = 0.0
+        self.merges = 0
+        self._journal: Optional[list[tuple]] = None
+        self._build_lock = asyncio.Lock()
+        self._merge_task: Optional[asyncio.Task] = None
+    
+    def _record(self, method, *args) -> None:
+        if self._journal is not None:
+            self._journal.append((method, args))
+    
+    def _current(self, product_id: int) -> Optional[tuple[str, int]]:
+        """(key, category code) of the product's live entry, if any."""
+        entry = self.overlay.get(product_id)
+        if entry is not None:
+            return entry[0], entry[3]
+        index = self.array.find(product_id)
+        if index >= 0:
+            return self.array.keys[index], self.array.categories[index]
+        return None
+    
+    def _remove(self, product_id: int) -> None:
+        entry = self.overlay.pop(product_id, None)
+        if entry is not None:
+            del self.overlay_keys[bisect_left(self.overlay_keys, (entry[0], product_id))]
+            return
+        index = self.array.find(product_id)
+        if index >= 0:
+            self.array.set_stock(index, -1)
+    
+    def upsert(self, product: IndexedProduct) -> None:
+        """Bring the index in line with a product's committed state."""
+        if not self.ready and self._journal is None:
+            # Nothing loaded or loading (disabled, or the load failed)
+            return
+        self._record(self.upsert, product)
+        current = self._current(product.id)
+        if current is not None:
+            self.categories.add(current[1], -1)
+        
+        key = normalize(product.name)
+        stock = max(product.stock_quantity, 0)
+        code = self.categories.code(product.category)
+        if product.is_active:
+            self.categories.add(code, 1)
+        
+        index = self.array.find(product.id)
+        if product.is_active and index >= 0 and self.array.keys[index] == key:
+            # Same name: update the entry in place
+            self.array.categories[index] = code
+            self.array.set_stock(index, stock)
+            return
+        
+        self._remove(product.id)
+        if product.is_active:
+            self.overlay[product.id] = (key, product.name, stock, code)
+            self.overlay_keys.insert(bisect_left(self.overlay_keys, (key, product.id)), (key, product.id))
+            if len(self.overlay) >= OVERLAY_LIMIT:
+                self.schedule_merge()
+    
+    def set_stock(self, product_id: int, stock: int) -> None:
+        """Set a product's stock, if it is in the index."""
+        self._record(self.set_stock, product_id, stock)
+        entry = self.overlay.get(product_id)
+        if entry is not None:
+            self.overlay[product_id] = (entry[0], entry[1], stock, entry[3])
+            return
+        index = self.array.find(product_id)
+        if index >= 0:
+            self.array.set_stock(index, stock)
+    
+    def adjust_stock(self, changes: dict[int, int]) -> None:
+        """Add a stock change (e.g. -quantity for a reservation) per product id."""
+        for product_id, change in changes.items():
+            entry = self.overlay.get(product_id)
+            if entry is not None:
+                self.set_stock(product_id, max(entry[2] + change, 0))
+                continue
+            index = self.array.find(product_id)
+            if index >= 0:
+                self.set_stock(product_id, max(self.array.tree[self.array.size + index] + change, 0))
+    
+    def search(self, prefix: str, limit: int = 10) -> tuple[list[tuple[int, str, int]], list[tuple[str, int]]]:
+        """
+        Find the product names and categories starting with a prefix.
+        
+        Args:
+            prefix: Typed text; matching ignores case and repeated spaces
+            limit: Most products and most categories returned
+        
+        Returns:
+            (products, categories): (id, name, stock) most stock first,
+            and (category, active products) most products first
+        """
+        key = normalize(prefix)
+        array = self.array
+        found = [(stock, array.ids[index], array.names[index]) for stock, index in array.top(key, limit)]
+        
+        low = bisect_left(self.overlay_keys, (key,))
+        high = bisect_left(self.overlay_keys, (key + MAX_CHAR,))
+        for _, product_id in self.overlay_keys[low:high]:
+            _, name, stock, _ = self.overlay[product_id]
+            found.append((stock, product_id, name))
+        
+        products = [(product_id, name, stock) for stock, product_id, name in heapq.nlargest(limit, found)]
+        return products, self.categories.search(key, limit)
+    
+    async def _rebuild(self, collect) -> None:
+        """
+        Swap in a new array built from `await collect()`.
+        
+        collect returns (entries, categories) and runs after recording
+        starts, so changes committed while it reads are replayed.
+        """
+        async with self._build_lock:
+            self._journal = []
+            try:
+                entries, categories = await collect()
+                started = time.perf_counter()
+                array, array_bytes = await asyncio.to_thread(self._build, entries)
+                self.build_seconds = time.perf_counter() - started
+            except BaseException:
+                # The changes were applied to the current index already
+                self._journal = None
+                raise
+            
+            self.array, self.array_bytes = array, array_bytes
+            self.overlay, self.overlay_keys = {}, []
+            self.categories = categories
+            journal, self._journal = self._journal, None
+            for method, args in journal:
+                method(*args)
+    
+    @staticmethod
+    def _build(entries: list[tuple[str, str, int, int, int]]) -> tuple[PrefixArray, int]:
+        entries.sort()
+        prefix_array = PrefixArray(entries)
+        return prefix_array, prefix_array.memory_bytes()
+    
+    async def load(self, fetch) -> None:
+        """
+        Replace the index with the active products returned by `await fetch()`.
+        
+        Args:
+            fetch: Coroutine function returning IndexedProducts
+        """
+        async def collect():
+            categories = Categories()
+            entries = []
+            for product in await fetch():
+                if product.is_active:
+                    code = categories.code(product.category)
+                    categories.add(code, 1)
+                    entries.append((normalize(product.name), product.name, product.id, product.stock_quantity, code))
+            return entries, categories
+        
+        await self._rebuild(collect)
+        self.ready = True
+    
+    def schedule_merge(self) -> None:
+        """Merge the overlay into a new array in the background, unless a build is running."""
+        if not self._build_lock.locked() and (self._merge_task is None or self._merge_task.done()):
+            self._merge_task = asyncio.get_running_loop().create_task(self.merge())
+    
+    async def merge(self) -> None:
+        """Rebuild the array from its live entries and the overlay."""
+        async def collect():
+            overlay = [(key, name, product_id, stock, code) for product_id, (key, name, stock, code) in self.overlay.items()]
+            return list(self.array.live_entries()) + overlay, self.categories.copy()
+        
+        await self._rebuild(collect)
+        self.merges += 1
+    
+    def stats(self) -> dict:
+        """Size and approximate memory use, for /health."""
+        overlay_bytes = sum(
+            sys.getsizeof(key) + sys.getsizeof(name) + 200 for key, name, _, _ in self.overlay.values()
+        )
+        return {
+            "ready": self.ready,
+            "names": len(self.array) + len(self.overlay),
+            "overlay": len(self.overlay),
+            "categories": sum(1 for count in self.categories.counts if count > 0),
+            "memory_bytes": self.array_bytes + overlay_bytes,
+            "build_seconds": round(self.build_seconds, 3),
+            "merges": self.merges,
+        }
+
+
+async def load_suggest_index(index: SuggestIndex, session_factory) -> None:
+    """
+    Load every active product into the index.
+    
+    Args:
+        index: Index to replace
+        session_factory: Callable returning an async session for the
+            primary database; a lagging replica could miss writes that
+            are not replayed
+    """
+    async def fetch():
+        async with session_factory() as db:
+            result = await db.execute(
+                select(Product.id, Product.name, Product.category, Product.stock_quantity, Product.is_active)
+                .where(Product.is_active == True)
+            )
+            return [IndexedProduct(*row) for row in result]
+    
+    await index.load(fetch)
+
+
+async def maintain_suggest_index(index: SuggestIndex, session_factory, refresh_seconds: float) -> None:
+    """
+    Load the index, then reload it every refresh_seconds (0: never).
+    
+    Runs as a background task for the life of the app. A failed load is
+    reported and retried; lookups answer 503 until the first one succeeds.
+    """
+    while True:
+        try:
+            await load_suggest_index(index, session_factory)
+        except (SQLAlchemyError, OSError) as exc:
+            print(f"⚠️ Autocomplete index load failed: {exc}")
+            await asyncio.sleep(refresh_seconds or LOAD_RETRY_SECONDS)
+            continue
+        if not refresh_seconds:
+            return
+        await asyncio.sleep(refresh_seconds)
+
+
+# Global autocomplete index
+suggest_index = SuggestIndex()
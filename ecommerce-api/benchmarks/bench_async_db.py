@@ -0,0 +1,107 @@
+"""
+Async Database Benchmark
+
+Measures p99 latency of single-product reads under 200 concurrent clients
+while a share of requests run a slow full-table query. The app runs under
+uvicorn in a separate process so event loop stalls show up as latency.
+
+- blocking: the old handlers, sync Session inside `async def`, so every
+  query (and especially the slow one) stalls the event loop
+- async: the real `/products/{id}` route on the AsyncSession layer
+
+Usage:
+    python -m benchmarks.bench_async_db --products 200000 --concurrency 200
+"""
+
+import argparse
+import asyncio
+import random
+
+from benchmarks.common import (
+    configure_database,
+    http_client,
+    print_report,
+    run_load,
+    seed_catalog,
+    serve_in_subprocess,
+)
+
+configure_database("async-db")
+
+from fastapi import APIRouter, Depends  # noqa: E402
+from sqlalchemy import func, select  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession  # noqa: E402
+
+from app.database import SessionLocal, async_engine, engine, get_async_db  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.product import Product  # noqa: E402
+
+
+# Slow query shared by both modes: a LIKE scan that no index can serve
+SLOW_QUERY = select(func.count()).where(Product.description.like("%waterproof kettle ceramic%"))
+
+router = APIRouter()
+
+
+@router.get("/blocking/products/{product_id}")
+async def blocking_get_product(product_id: int):
+    """Baseline read: sync session called from an async handler."""
+    with SessionLocal() as db:
+        product = db.get(Product, product_id)
+        return {"id": product.id, "name": product.name}
+
+
+@router.get("/blocking/slow")
+async def blocking_slow():
+    """Baseline slow query on the sync session."""
+    with SessionLocal() as db:
+        return {"matches": db.scalar(SLOW_QUERY)}
+
+
+@router.get("/async/slow")
+async def async_slow(db: AsyncSession = Depends(get_async_db)):
+    """Slow query on the async session."""
+    return {"matches": await db.scalar(SLOW_QUERY)}
+
+
+app.include_router(router, prefix="/bench")
+
+
+async def run_mode(base_url: str, mode: str, args) -> dict:
+    """Run the fast/slow request mix against one mode."""
+    rng = random.Random(7)
+    fast_path = "/bench/blocking/products/{}" if mode == "blocking" else "/products/{}"
+    slow_path = f"/bench/{mode}/slow"
+    
+    async def make_request(client, number):
+        if rng.random() < args.slow_ratio:
+            return "slow", await client.get(slow_path)
+        return "get_product", await client.get(fast_path.format(rng.randrange(args.products) + 1))
+    
+    async with http_client(base_url, args.concurrency) as client:
+        return await run_load(client, make_request, args.concurrency, args.requests)
+
+
+async def main(args) -> None:
+    async with app.router.lifespan_context(app):
+        seed_catalog(args.products)
+    engine.dispose()
+    await async_engine.dispose()
+    
+    report = {}
+    with serve_in_subprocess(app) as base_url:
+        for mode in ("blocking", "async"):
+            report[mode] = await run_mode(base_url, mode, args)
+    blocking_p99 = report["blocking"]["routes"]["get_product"]["p99_ms"]
+    async_p99 = report["async"]["routes"]["get_product"]["p99_ms"]
+    report["get_product_p99_speedup"] = round(blocking_p99 / async_p99, 2) if async_p99 else None
+    print_report(report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=200_000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--slow-ratio", type=float, default=0.05)
+    asyncio.run(main(parser.parse_args()))
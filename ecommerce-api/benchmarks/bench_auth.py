@@ -0,0 +1,72 @@
+"""
+Authentication Overhead Benchmark
+
+Measures the per-request cost of resolving the caller from a bearer
+token, with the verified-token cache warm (hot path) and cold (JWT
+decode plus one user lookup), and counts the queries each path runs.
+
+Usage:
+    python -m benchmarks.bench_auth --iterations 5000
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import configure_database, print_report, seed_catalog
+
+configure_database("auth")
+
+from sqlalchemy import event, select  # noqa: E402
+
+from app.database import AsyncSessionLocal, async_engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.utils.security import create_user_token, get_current_principal, token_cache  # noqa: E402
+
+
+async def measure(token: str, iterations: int, warm: bool) -> dict:
+    """Average microseconds and queries per principal lookup."""
+    queries = 0
+    
+    def count_query(*args):
+        nonlocal queries
+        queries += 1
+    
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count_query)
+    try:
+        async with AsyncSessionLocal() as db:
+            await get_current_principal(token, db)
+            started = time.perf_counter()
+            for _ in range(iterations):
+                if not warm:
+                    token_cache.clear()
+                    db.expunge_all()
+                await get_current_principal(token, db)
+            elapsed = time.perf_counter() - started
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count_query)
+    
+    return {
+        "us_per_request": round(elapsed / iterations * 1_000_000, 2),
+        "queries_per_request": round(queries / (iterations + 1), 2),
+    }
+
+
+async def main(args) -> None:
+    async with app.router.lifespan_context(app):
+        seed_catalog(0, n_owners=1)
+        async with AsyncSessionLocal() as db:
+            user = (await db.execute(select(User))).scalars().first()
+            token = create_user_token(user)
+        
+        print_report({
+            "cached": await measure(token, args.iterations, warm=True),
+            "uncached": await measure(token, args.iterations, warm=False),
+        })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=5_000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,92 @@
+"""
+Batch Fetch Benchmark
+
+Simulates a cart page that shows 30 products: one GET /products/{id}
+per item versus a single GET /products/batch, and reports the latency
+and SQL statements per page view.
+
+Runs with the product cache cleared before every page view (cold) and
+with it warm. Requests go through the ASGI app in-process, so the
+numbers leave out the network round trips the batch also saves.
+
+Usage:
+    python -m benchmarks.bench_batch_fetch --products 20000 --items 30 --views 300
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from benchmarks.common import asgi_client, configure_database, percentile, print_report, seed_catalog
+
+configure_database("batch-fetch")
+
+from sqlalchemy import event  # noqa: E402
+
+from app.database import async_engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.utils.cache import product_cache  # noqa: E402
+
+
+# SQL statements executed, reset per measurement
+statements = 0
+
+
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def count_statement(conn, cursor, statement, parameters, context, executemany):
+    global statements
+    statements += 1
+
+
+async def view_singles(client, product_ids: list[int]) -> None:
+    for product_id in product_ids:
+        (await client.get(f"/products/{product_id}")).raise_for_status()
+
+
+async def view_batch(client, product_ids: list[int]) -> None:
+    response = await client.get("/products/batch", params={"ids": ",".join(map(str, product_ids))})
+    response.raise_for_status()
+
+
+async def measure(client, view, carts: list[list[int]], cold: bool) -> dict:
+    """Latency (ms) and SQL statements per page view."""
+    global statements
+    samples = []
+    statements = 0
+    for product_ids in carts:
+        if cold:
+            await product_cache.backend.delete(*(product_cache.product_key(product_id) for product_id in product_ids))
+        started = time.perf_counter()
+        await view(client, product_ids)
+        samples.append(time.perf_counter() - started)
+    return {
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+        "queries_per_view": round(statements / len(carts), 2),
+    }
+
+
+async def main(args) -> None:
+    async with app.router.lifespan_context(app):
+        seed_catalog(args.products)
+        
+        rng = random.Random(42)
+        carts = [rng.sample(range(1, args.products + 1), args.items) for _ in range(args.views)]
+        
+        report = {"products": args.products, "items_per_view": args.items}
+        async with asgi_client(app) as client:
+            for cache in ("cold", "warm"):
+                report[cache] = {
+                    "singles": await measure(client, view_singles, carts, cache == "cold"),
+                    "batch": await measure(client, view_batch, carts, cache == "cold"),
+                }
+    print_report(report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=20_000)
+    parser.add_argument("--items", type=int, default=30)
+    parser.add_argument("--views", type=int, default=300)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,109 @@
+"""
+Bulk Import Benchmark
+
+Streams a generated catalog file into POST /products/bulk and reports
+rows per second, next to the rate of creating products one
+POST /products/ at a time. With --trace-memory it also reports the peak
+Python memory of the import (tracemalloc slows the import down).
+
+Usage:
+    python -m benchmarks.bench_bulk_import --products 100000 --format ndjson
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.common import NOUNS, WORDS, asgi_client, configure_database, login, print_report, seed_catalog
+
+configure_database("bulk-import")
+
+from app.main import app  # noqa: E402
+
+
+def generate_rows(n_products: int, seed: int = 42):
+    """Yield product dicts like the ones seed_catalog inserts."""
+    rng = random.Random(seed)
+    for i in range(n_products):
+        yield {
+            "name": f"{rng.choice(WORDS)} {rng.choice(NOUNS)} {i}",
+            "description": " ".join(rng.choices(WORDS + NOUNS, k=30)),
+            "price": round(rng.uniform(1, 1000), 2),
+            "category": f"category-{rng.randrange(50)}",
+            "stock_quantity": rng.randrange(0, 500),
+        }
+
+
+def write_upload(path: str, n_products: int, fmt: str) -> None:
+    """Write the upload file ahead of time, so generating rows is not timed."""
+    fields = ["name", "description", "price", "category", "stock_quantity"]
+    with open(path, "w", encoding="utf-8") as file:
+        if fmt == "csv":
+            file.write(",".join(fields) + "\n")
+        for row in generate_rows(n_products):
+            if fmt == "csv":
+                file.write(",".join(f'"{row[field]}"' for field in fields) + "\n")
+            else:
+                file.write(json.dumps(row) + "\n")
+
+
+async def stream_file(path: str, chunk_size: int = 64 * 1024):
+    """Stream a file as the request body, one chunk at a time."""
+    with open(path, "rb") as file:
+        while chunk := file.read(chunk_size):
+            yield chunk
+
+
+async def main(args) -> None:
+    async with app.router.lifespan_context(app):
+        emails = seed_catalog(0, n_owners=1)
+        async with asgi_client(app) as client:
+            headers = await login(client, emails[0])
+            content_type = "text/csv" if args.format == "csv" else "application/x-ndjson"
+            path = os.path.join(tempfile.gettempdir(), f"ecommerce-bench-upload.{args.format}")
+            write_upload(path, args.products, args.format)
+            
+            if args.trace_memory:
+                tracemalloc.start()
+            started = time.perf_counter()
+            response = await client.post(
+                "/products/bulk",
+                content=stream_file(path),
+                headers={**headers, "content-type": content_type},
+            )
+            bulk_elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1] if args.trace_memory else None
+            tracemalloc.stop()
+            os.remove(path)
+            response.raise_for_status()
+            result = response.json()
+            
+            started = time.perf_counter()
+            for row in generate_rows(args.single):
+                (await client.post("/products/", json=row, headers=headers)).raise_for_status()
+            single_elapsed = time.perf_counter() - started
+    
+    print_report({
+        "format": args.format,
+        "products": args.products,
+        "inserted": result["inserted"],
+        "failed": result["failed"],
+        "bulk_elapsed_s": round(bulk_elapsed, 3),
+        "bulk_rows_per_s": round(result["inserted"] / bulk_elapsed, 1),
+        "bulk_peak_traced_mb": round(peak / 1024 / 1024, 2) if peak is not None else None,
+        "single_post_rows_per_s": round(args.single / single_elapsed, 1) if args.single else None,
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--single", type=int, default=500, help="products created one POST at a time")
+    parser.add_argument("--trace-memory", action="store_true")
+    asyncio.run(main(parser.parse_args()))
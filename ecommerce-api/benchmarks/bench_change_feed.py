@@ -0,0 +1,124 @@
+"""
+Change Feed Benchmark
+
+Seeds a catalog, updates --changes random products through the API,
+then brings a downstream copy up to date two ways and reports the
+requests, rows, SQL statements and time each takes:
+
+- feed: GET /products/changes from the cursor taken before the updates
+- re-page: every page of GET /products/, the only option without a feed
+
+Re-paging costs the same however little changed; the feed costs one
+indexed range read per page of changes. Run it with growing --products
+to see the feed stay flat. Requests go through the ASGI app in-process.
+
+Usage:
+    python -m benchmarks.bench_change_feed --products 100000 --changes 500
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from benchmarks.common import asgi_client, configure_database, login, print_report, seed_catalog
+
+configure_database("change-feed")
+
+from sqlalchemy import event, select  # noqa: E402
+
+from app.database import async_engine, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.product import Product  # noqa: E402
+
+
+# SQL statements executed, reset per sync
+statements = 0
+
+
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def count_statement(conn, cursor, statement, parameters, context, executemany):
+    global statements
+    statements += 1
+
+
+async def apply_changes(client, emails: list[str], count: int) -> None:
+    """Change the price of `count` random products, each as its owner."""
+    with engine.connect() as conn:
+        owners = dict(conn.execute(select(Product.id, Product.owner_id)).all())
+    headers = {}
+    for product_id in random.Random(7).sample(sorted(owners), count):
+        owner_id = owners[product_id]
+        if owner_id not in headers:
+            headers[owner_id] = await login(client, emails[owner_id - 1])
+        response = await client.put(
+            f"/products/{product_id}", json={"price": 9.99}, headers=headers[owner_id]
+        )
+        response.raise_for_status()
+
+
+async def sync_from_feed(client, cursor: str, limit: int) -> dict:
+    """Read the feed from cursor to its end."""
+    global statements
+    statements, requests, rows = 0, 0, 0
+    started = time.perf_counter()
+    while True:
+        response = await client.get("/products/changes", params={"since": cursor, "limit": limit})
+        response.raise_for_status()
+        page = response.json()
+        requests += 1
+        rows += len(page["items"])
+        cursor = page["next_cursor"]
+        if not page["has_more"]:
+            break
+    return {
+        "requests": requests,
+        "rows": rows,
+        "statements": statements,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+async def sync_by_repaging(client, limit: int) -> dict:
+    """Read every page of the product list."""
+    global statements
+    statements, requests, rows = 0, 0, 0
+    params = {"limit": limit}
+    started = time.perf_counter()
+    while True:
+        response = await client.get("/products/", params=params)
+        response.raise_for_status()
+        page = response.json()
+        requests += 1
+        rows += len(page["items"])
+        if not page["next_cursor"]:
+            break
+        params["cursor"] = page["next_cursor"]
+    return {
+        "requests": requests,
+        "rows": rows,
+        "statements": statements,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+async def main(args) -> None:
+    report = {"products": args.products, "changes": args.changes}
+    async with app.router.lifespan_context(app):
+        emails = seed_catalog(args.products)
+        async with asgi_client(app) as client:
+            # A client that synced before the updates holds the feed's end as its cursor
+            cursor = (await client.get("/products/changes")).json()["next_cursor"]
+            await apply_changes(client, emails, args.changes)
+            report["feed"] = await sync_from_feed(client, cursor, args.feed_limit)
+            report["repage"] = await sync_by_repaging(client, args.page_limit)
+    print_report(report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--changes", type=int, default=500, help="products updated between the two syncs")
+    parser.add_argument("--feed-limit", type=int, default=1000, help="changes per feed page")
+    parser.add_argument("--page-limit", type=int, default=100, help="products per list page")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,98 @@
+"""
+Conditional GET Benchmark
+
+Compares full responses with 304 Not Modified revalidations for a single
+product and for list pages, and reports the ORM objects and Pydantic
+models each request builds. That a 304 builds none is checked by
+tests/test_conditional_get.py.
+
+Products are fetched with the product cache cleared before each request,
+so the 200 path always hydrates and serializes, while the 304 path only
+reads the product's timestamps. List pages come from the product cache
+on both paths, so there a 304 mainly saves sending the body.
+
+Usage:
+    python -m benchmarks.bench_conditional_get --products 10000 --repeat 500
+"""
+
+import argparse
+import asyncio
+import time
+from collections import Counter
+
+from benchmarks.common import asgi_client, configure_database, percentile, print_report, seed_catalog
+
+configure_database("conditional-get")
+
+from pydantic import BaseModel  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.models.product import Product  # noqa: E402
+from app.utils.cache import product_cache  # noqa: E402
+
+
+# ORM instances loaded and Pydantic models built, per label
+work = Counter()
+
+
+@event.listens_for(Product, "load")
+def count_load(target, context):
+    work["orm_loads"] += 1
+
+
+def counting(method, label):
+    """Wrap a Pydantic method so each call is counted."""
+    def wrapper(*args, **kwargs):
+        work[label] += 1
+        return method(*args, **kwargs)
+    return wrapper
+
+
+BaseModel.model_validate = classmethod(counting(BaseModel.model_validate.__func__, "pydantic_validations"))
+BaseModel.model_dump_json = counting(BaseModel.model_dump_json, "pydantic_serializations")
+
+
+async def time_requests(client, path: str, params: dict, repeat: int, etag=None, clear_cache=False) -> dict:
+    """Latency (ms) and work done by repeated GETs, with or without If-None-Match."""
+    headers = {"If-None-Match": etag} if etag else {}
+    expected = 304 if etag else 200
+    samples = []
+    work.clear()
+    for _ in range(repeat):
+        if clear_cache:
+            await product_cache.backend.delete(product_cache.product_key(1))
+        started = time.perf_counter()
+        response = await client.get(path, params=params, headers=headers)
+        samples.append(time.perf_counter() - started)
+        assert response.status_code == expected, response.status_code
+    return {
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+        **{label: count / repeat for label, count in sorted(work.items())},
+    }
+
+
+async def main(args) -> None:
+    async with app.router.lifespan_context(app):
+        seed_catalog(args.products)
+        
+        report = {"products": args.products}
+        async with asgi_client(app) as client:
+            for name, path, params, clear_cache in (
+                ("product", "/products/1", {}, True),
+                ("list page 100", "/products/", {"limit": 100}, False),
+            ):
+                etag = (await client.get(path, params=params)).headers["etag"]
+                report[name] = {
+                    "full": await time_requests(client, path, params, args.repeat, clear_cache=clear_cache),
+                    "not_modified": await time_requests(client, path, params, args.repeat, etag, clear_cache),
+                }
+    print_report(report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=500)
+    asyncio.run(main(parser.parse_args()))
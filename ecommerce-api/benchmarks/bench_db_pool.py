@@ -0,0 +1,135 @@
+"""
+Connection Pool Benchmark
+
+Runs a mixed read/write load (product reads, list pages and product
+updates) against a uvicorn server in a separate process, once with the
+old engine setup and once with the tuned one:
+
+- before: SQLite defaults (rollback journal, synchronous=FULL, small page
+  cache, no mmap) and SQLAlchemy's default NullPool for aiosqlite, which
+  opens a new connection for every request
+- after: the DB_POOL_* and SQLITE_* settings (queue pool, WAL, NORMAL)
+
+Each mode runs in a fresh process against a fresh database, since the
+journal mode is stored in the database file. The product cache is
+disabled so every request reaches the database.
+
+Usage:
+    python -m benchmarks.bench_db_pool --requests 4000 --readers 32 --writers 8
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import subprocess
+import sys
+
+from benchmarks.common import configure_database, http_client, login, print_report, run_load, seed_catalog, serve_in_subprocess
+
+# Settings that reproduce the SQLite defaults for the "before" mode
+# (Python's sqlite3 module already waits 5 seconds on a locked database)
+BEFORE_SETTINGS = {
+    "SQLITE_JOURNAL_MODE": "DELETE",
+    "SQLITE_SYNCHRONOUS": "FULL",
+    "SQLITE_BUSY_TIMEOUT_MS": "5000",
+    "SQLITE_MMAP_SIZE": "0",
+    "SQLITE_CACHE_SIZE_KB": "2000",
+}
+
+
+async def run_mode(args) -> dict:
+    """Seed, serve and load the app in this process, configured for args.mode."""
+    configure_database("db-pool")
+    os.environ["CACHE_BACKEND"] = "none"
+    if args.mode == "before":
+        os.environ.update(BEFORE_SETTINGS)
+    
+    from sqlalchemy import select
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlalchemy.pool import NullPool
+    
+    from app.database import ASYNC_DATABASE_URL, AsyncSessionLocal, async_engine, engine
+    from app.main import app
+    from app.models.product import Product
+    
+    async with app.router.lifespan_context(app):
+        emails = seed_catalog(args.products, n_owners=args.writers)
+    with engine.connect() as conn:
+        owned = {
+            owner_id: conn.scalars(select(Product.id).where(Product.owner_id == owner_id).limit(200)).all()
+            for owner_id in range(1, args.writers + 1)
+        }
+    engine.dispose()
+    await async_engine.dispose()
+    
+    if args.mode == "before":
+        # The routes get their sessions from AsyncSessionLocal
+        AsyncSessionLocal.configure(bind=create_async_engine(ASYNC_DATABASE_URL, poolclass=NullPool))
+    
+    rng = random.Random(11)
+    
+    with serve_in_subprocess(app) as base_url:
+        async with http_client(base_url, args.readers + args.writers) as client:
+            headers = [await login(client, email) for email in emails]
+            
+            async def read(client, number):
+                if number % 4 == 0:
+                    return "list", await client.get("/products/", params={"limit": 20, "category": f"category-{number % 50}"})
+                return "get_product", await client.get(f"/products/{rng.randrange(args.products) + 1}")
+            
+            async def write(client, number):
+                writer = number % args.writers
+                product_id = rng.choice(owned[writer + 1])
+                return "update_product", await client.put(
+                    f"/products/{product_id}",
+                    json={"price": round(rng.uniform(1, 1000), 2), "stock_quantity": rng.randrange(500)},
+                    headers=headers[writer],
+                )
+            
+            reads, writes = await asyncio.gather(
+                run_load(client, read, args.readers, args.requests),
+                run_load(client, write, args.writers, args.requests * args.writers // args.readers),
+            )
+            health = (await client.get("/health")).json()
+    
+    reads["routes"].update(writes["routes"])
+    reads["requests"] += writes["requests"]
+    reads["throughput_rps"] = round(reads["requests"] / max(reads["elapsed_s"], writes["elapsed_s"]), 1)
+    if args.mode == "after":
+        # The "before" sessions bypass the instrumented pool
+        reads["database_pool"] = health["database_pool"]["async"]
+    return reads
+
+
+def main(args) -> None:
+    report = {}
+    for mode in ("before", "after"):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_db_pool", "--mode", mode,
+             *(f"--{name.replace('_', '-')}={getattr(args, name)}" for name in ("products", "readers", "writers", "requests"))],
+            check=True,
+            stdout=subprocess.PIPE,
+            text=True,
+        ).stdout
+        report[mode] = json.loads(output)
+    print_report(report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=50_000)
+    parser.add_argument("--readers", type=int, default=32)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=4_000, help="read requests; writes scale with --writers")
+    parser.add_argument("--mode", choices=["before", "after"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.mode:
+        # Keep the app's startup messages out of the JSON read by main()
+        with contextlib.redirect_stdout(sys.stderr):
+            report = asyncio.run(run_mode(args))
+        print_report(report)
+    else:
+        main(args)
@@ -0,0 +1,84 @@
+"""
+Export Benchmark
+
+Downloads GET /products/export from a uvicorn server in a separate
+process and reports time to first byte, total time and throughput.
+Then runs the same export in-process under tracemalloc to report its
+peak Python memory, which should not grow with the catalog size.
+
+Usage:
+    python -m benchmarks.bench_export --products 1000000 --format ndjson
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from benchmarks.common import configure_database, http_client, print_report, seed_catalog, serve_in_subprocess
+
+configure_database("export")
+
+from sqlalchemy import select  # noqa: E402
+
+from app.database import async_engine, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.product import Product  # noqa: E402
+from app.routers.products import apply_product_filters  # noqa: E402
+from app.utils.export import EXPORT_COLUMNS, stream_export  # noqa: E402
+
+
+async def download(base_url: str, fmt: str) -> dict:
+    """Time the first byte and the full body of one export download."""
+    async with http_client(base_url, 1) as client:
+        started = time.perf_counter()
+        first_byte = None
+        size = 0
+        async with client.stream("GET", "/products/export", params={"format": fmt}) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_raw():
+                if first_byte is None:
+                    first_byte = time.perf_counter() - started
+                size += len(chunk)
+        elapsed = time.perf_counter() - started
+    return {
+        "first_byte_ms": round(first_byte * 1000, 1),
+        "elapsed_s": round(elapsed, 3),
+        "bytes": size,
+        "mb_per_s": round(size / elapsed / 1024 / 1024, 2),
+    }
+
+
+async def peak_memory(fmt: str) -> float:
+    """Peak traced memory (MB) of consuming the export stream in-process."""
+    columns = [Product.__table__.c[name] for name in EXPORT_COLUMNS]
+    query = apply_product_filters(select(*columns)).order_by(Product.id)
+    tracemalloc.start()
+    async for _ in stream_export(query, fmt):
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return round(peak / 1024 / 1024, 2)
+
+
+async def main(args) -> None:
+    async with app.router.lifespan_context(app):
+        seed_catalog(args.products)
+    engine.dispose()
+    await async_engine.dispose()
+    
+    with serve_in_subprocess(app) as base_url:
+        report = {"products": args.products, "format": args.format, "download": await download(base_url, args.format)}
+    
+    if not args.skip_memory:
+        async with app.router.lifespan_context(app):
+            report["peak_traced_mb"] = await peak_memory(args.format)
+    print_report(report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--format", choices=["ndjson", "csv", "parquet"], default="ndjson")
+    parser.add_argument("--skip-memory", action="store_true", help="skip the (slow) tracemalloc pass")
+    asyncio.run(main(parser.parse_args()))
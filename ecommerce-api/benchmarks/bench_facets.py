@@ -0,0 +1,99 @@
+"""
+Facets Benchmark
+
+Times the facet counts read from the trigger-maintained summary table
+against what the storefront did before: SELECT DISTINCT category, then
+one COUNT per category. Also times GET /products/facets in-process,
+where repeated filter sets are answered from the product cache.
+
+Usage:
+    python -m benchmarks.bench_facets --products 1000000
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import asgi_client, configure_database, percentile, print_report, seed_catalog
+
+configure_database("facets")
+
+from sqlalchemy import func, select  # noqa: E402
+
+from app.database import AsyncSessionLocal  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.product import Product  # noqa: E402
+from app.routers.products import apply_product_filters  # noqa: E402
+from app.utils.facets import get_product_facets  # noqa: E402
+
+
+# Filter sets a storefront sidebar asks for
+FILTERS = {
+    "all": {},
+    "category": {"category": "category-7"},
+    "bucket price range": {"min_price": 100, "max_price": 250},
+    "category and bucket price range": {"category": "category-7", "min_price": 100, "max_price": 250},
+    "arbitrary price range": {"min_price": 120, "max_price": 180},
+}
+
+
+async def distinct_and_count(db, category=None, min_price=None, max_price=None) -> dict:
+    """The previous approach: list the categories, then count each one."""
+    categories = (await db.execute(
+        select(Product.category).where(Product.is_active == True, Product.category != None).distinct()
+    )).scalars().all()
+    return {
+        name: await db.scalar(apply_product_filters(select(func.count(Product.id)), name, min_price, max_price))
+        for name in categories
+    }
+
+
+async def time_calls(call, params: dict, repeat: int) -> dict:
+    """p50/p99 latency (ms) of repeated calls, each on its own session."""
+    samples = []
+    for _ in range(repeat):
+        async with AsyncSessionLocal() as db:
+            started = time.perf_counter()
+            await call(db, **params)
+            samples.append(time.perf_counter() - started)
+    return latency_report(samples)
+
+
+async def time_route(client, params: dict, repeat: int) -> dict:
+    """p50/p99 latency (ms) of GET /products/facets, cache hits after the first."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = await client.get("/products/facets", params=params)
+        samples.append(time.perf_counter() - started)
+        response.raise_for_status()
+    return latency_report(samples)
+
+
+def latency_report(samples: list[float]) -> dict:
+    return {
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+    }
+
+
+async def main(args) -> None:
+    async with app.router.lifespan_context(app):
+        seed_catalog(args.products)
+        
+        report = {"products": args.products, "facets": {}, "route": {}, "distinct_and_count": {}}
+        for name, params in FILTERS.items():
+            report["facets"][name] = await time_calls(get_product_facets, params, args.repeat)
+        async with asgi_client(app) as client:
+            for name, params in FILTERS.items():
+                report["route"][name] = await time_route(client, params, args.repeat)
+        for name in ("all", "bucket price range"):
+            report["distinct_and_count"][name] = await time_calls(distinct_and_count, FILTERS[name], 3)
+    print_report(report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,136 @@
+"""
+Fuzzy Search Benchmark
+
+Seeds a catalog (1M products by default) and searches it with queries
+made from product names with one typo per word (a dropped, doubled,
+swapped or replaced letter), the way shoppers misspell them:
+
+- fuzzy: GET /products/search?fuzzy=true, through the trigram index
+- fulltext: the default GET /products/search, which needs exact words
+
+For each it reports the latency and how often the top result has the
+words the shopper meant. Also reports the time to build the trigram
+index from the whole catalog and its size on disk (SQLite).
+
+A fuzzy query costs about the number of products sharing each of its
+trigrams, so its time grows with the catalog. Seeded names use only 40
+words, so every trigram is shared by 5% of the catalog or more: a worst
+case next to the vocabulary of a real catalog.
+
+Usage:
+    python -m benchmarks.bench_fuzzy_search --products 1000000 --queries 300
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+
+from benchmarks.common import asgi_client, configure_database, percentile, print_report, seed_catalog
+
+configure_database("fuzzy-search")
+os.environ["SUGGEST_ENABLED"] = "false"
+
+from sqlalchemy import func, select, text  # noqa: E402
+
+from app.database import engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.product import Product  # noqa: E402
+from app.utils.search import install_search_index  # noqa: E402
+
+
+def misspell(word: str, rng: random.Random) -> str:
+    """Apply one random typo to a word."""
+    i = rng.randrange(len(word))
+    typo = rng.choice(("drop", "double", "swap", "replace"))
+    if typo == "drop":
+        return word[:i] + word[i + 1:]
+    if typo == "double":
+        return word[:i] + word[i] + word[i:]
+    if typo == "swap" and i < len(word) - 1:
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    return word[:i] + rng.choice("abcdefghijklmnopqrstuvwxyz") + word[i + 1:]
+
+
+def sample_queries(count: int, seed: int = 3) -> list[tuple[str, list[str]]]:
+    """(misspelled query, intended words) pairs from random product names."""
+    rng = random.Random(seed)
+    with engine.connect() as conn:
+        max_id = conn.scalar(select(func.max(Product.id)))
+        names = conn.execute(
+            select(Product.name).where(Product.id.in_(rng.sample(range(1, max_id + 1), count)))
+        ).scalars().all()
+    queries = []
+    for name in names:
+        # Seeded names are "<word> <noun> <number>"; shoppers type the words
+        words = name.split()[:2]
+        queries.append((" ".join(misspell(word, rng) for word in words), words))
+    return queries
+
+
+def rebuild_trigram_index() -> dict:
+    """Drop and rebuild the SQLite trigram index: build time and size."""
+    if engine.dialect.name != "sqlite":
+        return {}
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE product_trigrams"))
+    with engine.connect() as conn:
+        conn.exec_driver_sql("VACUUM")
+        pages_before = conn.exec_driver_sql("PRAGMA page_count").scalar()
+    
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        install_search_index(conn)
+    build_seconds = time.perf_counter() - started
+    
+    with engine.connect() as conn:
+        page_size = conn.exec_driver_sql("PRAGMA page_size").scalar()
+        pages_after = conn.exec_driver_sql("PRAGMA page_count").scalar()
+        rows = conn.execute(text("SELECT count(*) FROM product_trigrams")).scalar()
+    return {
+        "build_seconds": round(build_seconds, 1),
+        "rows": rows,
+        "size_mb": round((pages_after - pages_before) * page_size / 2**20, 1),
+    }
+
+
+async def measure(client, queries: list[tuple[str, list[str]]], params: dict) -> dict:
+    """Latency and top-result accuracy of a search mode."""
+    samples, hits, empty = [], 0, 0
+    for query, words in queries:
+        started = time.perf_counter()
+        response = await client.get("/products/search", params={"q": query, "limit": 10, **params})
+        samples.append(time.perf_counter() - started)
+        response.raise_for_status()
+        results = response.json()
+        if not results:
+            empty += 1
+        elif results[0]["name"].split()[:2] == words:
+            hits += 1
+    return {
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+        "top_result_correct_pct": round(hits / len(queries) * 100, 1),
+        "no_results_pct": round(empty / len(queries) * 100, 1),
+    }
+
+
+async def main(args) -> None:
+    report = {"products": args.products, "queries": args.queries}
+    async with app.router.lifespan_context(app):
+        seed_catalog(args.products)
+        report["trigram_index"] = rebuild_trigram_index()
+        queries = sample_queries(args.queries)
+        report["examples"] = [query for query, _ in queries[:5]]
+        async with asgi_client(app) as client:
+            report["fuzzy"] = await measure(client, queries, {"fuzzy": "true"})
+            report["fulltext"] = await measure(client, queries, {})
+    print_report(report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=300)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,171 @@
+"""
+Inventory Contention Benchmark
+
+Concurrent buyers take one unit at a time from a product until it sells
+out, against a uvicorn server in a separate process:
+
+- read-modify-write: the old way, GET the product then PUT the new
+  stock_quantity; concurrent buyers overwrite each other's decrements
+- reserve: POST /products/reservations, one conditional UPDATE
+- reserve sharded: the same on a product with sharded stock counters
+- reserve batch: each reservation takes a unit of three products in one
+  transaction
+
+Every unit a buyer was told it got must come off the stock. Any unit
+sold beyond the stock's decrease is an oversell; the script exits with
+code 1 if a reservation mode oversells. Failed requests (such as SQLite
+lock timeouts under heavy write contention) are counted as errors. The product cache is disabled,
+so the read-modify-write buyers read the database.
+
+Usage:
+    python -m benchmarks.bench_inventory --stock 1000 --buyers 32 --shards 16
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import Counter
+
+from benchmarks.common import (
+    configure_database, http_client, login, percentile, print_report, seed_catalog, serve_in_subprocess
+)
+
+configure_database("inventory")
+os.environ["CACHE_BACKEND"] = "none"
+
+import httpx  # noqa: E402
+from sqlalchemy import func, select, update  # noqa: E402
+
+from app.database import async_engine, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.product import Product  # noqa: E402
+from app.models.product_stock_shard import ProductStockShard  # noqa: E402
+
+
+# Mode name -> products each purchase takes a unit of
+MODES = {
+    "read-modify-write": [1],
+    "reserve": [2],
+    "reserve sharded": [3],
+    "reserve batch": [4, 5, 6],
+}
+SHARDED_PRODUCT = 3
+
+
+async def buy_read_modify_write(client, product_ids: list[int], headers: dict) -> str:
+    """Take one unit the old way: "bought", "sold out" or "error"."""
+    product_id = product_ids[0]
+    try:
+        stock = (await client.get(f"/products/{product_id}")).json()["stock_quantity"]
+        if stock < 1:
+            return "sold out"
+        response = await client.put(f"/products/{product_id}", json={"stock_quantity": stock - 1}, headers=headers)
+    except httpx.HTTPError:
+        return "error"
+    return "bought" if response.status_code == 200 else "error"
+
+
+async def buy_reserve(client, product_ids: list[int], headers: dict) -> str:
+    """Reserve one unit of each product: "bought", "sold out" or "error"."""
+    try:
+        response = await client.post(
+            "/products/reservations",
+            json={"items": [{"product_id": product_id, "quantity": 1} for product_id in product_ids]},
+            headers=headers,
+        )
+    except httpx.HTTPError:
+        return "error"
+    if response.status_code == 409:
+        return "sold out"
+    return "bought" if response.status_code == 200 else "error"
+
+
+def stock_levels(product_ids: list[int]) -> dict[int, int]:
+    """Exact stock per product, summing the shards of sharded products."""
+    with engine.connect() as conn:
+        levels = dict(conn.execute(
+            select(Product.id, Product.stock_quantity).where(Product.id.in_(product_ids), Product.stock_shards == 0)
+        ).all())
+        levels.update(conn.execute(
+            select(ProductStockShard.product_id, func.sum(ProductStockShard.quantity))
+            .where(ProductStockShard.product_id.in_(product_ids))
+            .group_by(ProductStockShard.product_id)
+        ).all())
+    return levels
+
+
+async def run_mode(client, buy, product_ids: list[int], headers: dict, buyers: int) -> dict:
+    """Let `buyers` concurrent buyers purchase until the products sell out."""
+    before = stock_levels(product_ids)
+    samples = []
+    outcomes = Counter()
+    
+    async def buyer():
+        while True:
+            started = time.perf_counter()
+            outcome = await buy(client, product_ids, headers)
+            samples.append(time.perf_counter() - started)
+            outcomes[outcome] += 1
+            if outcome == "sold out":
+                return
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(buyer() for _ in range(buyers)))
+    elapsed = time.perf_counter() - started
+    
+    after = stock_levels(product_ids)
+    sold = outcomes["bought"]
+    return {
+        "stock": before[product_ids[0]],
+        "sold": sold,
+        "errors": outcomes["error"],
+        "final_stock": after[product_ids[0]],
+        "oversold": max(sold - (before[product_id] - after[product_id]) for product_id in product_ids),
+        "purchases_per_s": round(sold / elapsed, 1),
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+    }
+
+
+async def main(args) -> int:
+    async with app.router.lifespan_context(app):
+        emails = seed_catalog(args.products, n_owners=1)
+    with engine.begin() as conn:
+        conn.execute(
+            update(Product)
+            .where(Product.id.in_([product_id for ids in MODES.values() for product_id in ids]))
+            .values(stock_quantity=args.stock, is_active=True)
+        )
+    engine.dispose()
+    await async_engine.dispose()
+    
+    report = {"buyers": args.buyers, "shards": args.shards}
+    with serve_in_subprocess(app) as base_url:
+        async with http_client(base_url, args.buyers) as client:
+            headers = await login(client, emails[0])
+            response = await client.put(
+                f"/products/{SHARDED_PRODUCT}/stock-shards", json={"shards": args.shards}, headers=headers
+            )
+            response.raise_for_status()
+            
+            for mode, product_ids in MODES.items():
+                buy = buy_read_modify_write if mode == "read-modify-write" else buy_reserve
+                report[mode] = await run_mode(client, buy, product_ids, headers, args.buyers)
+    print_report(report)
+    
+    oversold = {mode: report[mode]["oversold"] for mode in MODES if mode.startswith("reserve") and report[mode]["oversold"]}
+    if oversold:
+        print(f"Reservations oversold: {oversold}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=1_000)
+    parser.add_argument("--stock", type=int, default=1_000)
+    parser.add_argument("--buyers", type=int, default=32)
+    parser.add_argument("--shards", type=int, default=16)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,217 @@
+"""
+Mixed Load Benchmark
+
+Drives the real application with a weighted mix of catalog reads,
+writes and logins from concurrent clients, and reports throughput and
+p50/p95/p99 latency per route.
+
+- in-process (default): requests go through httpx's ASGI transport, so
+  the numbers are the app's own cost without sockets
+- --server: the app runs under uvicorn in a separate process, so event
+  loop stalls show up as latency
+
+The catalog (products, owners and categories) is seeded with executemany
+batches, from 10k up to millions of products. The report includes the
+current git commit; save it with --output and pass it to a later run
+with --compare to see the change per route.
+
+Logins verify bcrypt at BCRYPT_ROUNDS, which dominates the CPU time of
+the mix on small machines; lower their weight or the rounds to focus on
+the catalog routes.
+
+Usage:
+    python -m benchmarks.bench_load --products 100000 --concurrency 50 --requests 20000
+    python -m benchmarks.bench_load --server --output before.json
+    python -m benchmarks.bench_load --server --compare before.json
+    python -m benchmarks.bench_load --mix get=60,list=20,search=20
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+from typing import Optional
+
+from benchmarks.common import (
+    BENCH_PASSWORD,
+    NOUNS,
+    WORDS,
+    asgi_client,
+    configure_database,
+    http_client,
+    login,
+    print_report,
+    run_load,
+    seed_catalog,
+    serve_in_subprocess,
+)
+
+configure_database("load")
+
+from sqlalchemy import select  # noqa: E402
+
+from app.database import async_engine, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.product import Product  # noqa: E402
+
+
+# Relative weight of each route in the default mix
+DEFAULT_MIX = {
+    "get": 40,
+    "list": 15,
+    "filter": 15,
+    "search": 10,
+    "create": 5,
+    "update": 10,
+    "login": 1,
+}
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    """Parse "get=40,list=15" into weights; unknown routes are rejected."""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown route {name!r}, expected one of {', '.join(DEFAULT_MIX)}")
+        mix[name] = int(weight)
+    return mix
+
+
+def git_commit() -> Optional[str]:
+    """Short hash of the checked out commit, if run from a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_reports(previous: dict, current: dict) -> dict:
+    """Percent change of throughput and per-route latency against an earlier report."""
+    def change(old, new):
+        return round((new / old - 1) * 100, 1) if old else None
+    
+    routes = {}
+    for label, stats in current["routes"].items():
+        old = previous.get("routes", {}).get(label)
+        if old:
+            routes[label] = {
+                f"{metric}_change_pct": change(old[metric], stats[metric])
+                for metric in ("p50_ms", "p95_ms", "p99_ms")
+            }
+    return {
+        "commit": previous.get("commit"),
+        "throughput_change_pct": change(previous.get("throughput_rps"), current["throughput_rps"]),
+        "routes": routes,
+    }
+
+
+def owned_products(owner_ids: list[int], per_owner: int = 200) -> dict[int, list[int]]:
+    """Some product ids of each owner, for the update requests."""
+    with engine.connect() as conn:
+        return {
+            owner_id: conn.scalars(select(Product.id).where(Product.owner_id == owner_id).limit(per_owner)).all()
+            for owner_id in owner_ids
+        }
+
+
+async def run(client, args, emails: list[str]) -> dict:
+    """Log the writers in, warm up, then run the measured mix."""
+    rng = random.Random(args.seed)
+    writers = list(range(1, min(args.writers, len(emails)) + 1))
+    headers = {owner_id: await login(client, emails[owner_id - 1]) for owner_id in writers}
+    owned = owned_products(writers)
+    routes, weights = zip(*((name, weight) for name, weight in args.mix.items() if weight > 0))
+    
+    def price_range() -> dict:
+        low = round(rng.uniform(1, 900), 2)
+        return {"min_price": low, "max_price": round(low + rng.uniform(10, 200), 2)}
+    
+    async def make_request(client, number):
+        route = rng.choices(routes, weights)[0]
+        if route == "get":
+            return route, await client.get(f"/products/{rng.randrange(args.products) + 1}")
+        if route == "list":
+            return route, await client.get("/products/", params={"limit": 20})
+        if route == "filter":
+            params = {"category": f"category-{rng.randrange(args.categories)}", "sort": "price", "limit": 20}
+            return route, await client.get("/products/", params={**params, **price_range()})
+        if route == "search":
+            return route, await client.get("/products/search", params={"q": rng.choice(WORDS + NOUNS), "limit": 20})
+        if route == "login":
+            email = rng.choice(emails)
+            return route, await client.post("/auth/login", data={"username": email, "password": BENCH_PASSWORD})
+        
+        owner_id = rng.choice(writers)
+        if route == "create":
+            return route, await client.post(
+                "/products/",
+                json={
+                    "name": f"{rng.choice(WORDS)} {rng.choice(NOUNS)} load {number}",
+                    "description": " ".join(rng.choices(WORDS + NOUNS, k=30)),
+                    "price": round(rng.uniform(1, 1000), 2),
+                    "category": f"category-{rng.randrange(args.categories)}",
+                    "stock_quantity": rng.randrange(500),
+                },
+                headers=headers[owner_id],
+            )
+        return route, await client.put(
+            f"/products/{rng.choice(owned[owner_id])}",
+            json={"price": round(rng.uniform(1, 1000), 2)},
+            headers=headers[owner_id],
+        )
+    
+    if args.warmup:
+        await run_load(client, make_request, args.concurrency, args.warmup)
+    return await run_load(client, make_request, args.concurrency, args.requests)
+
+
+async def main(args) -> None:
+    report = {
+        "commit": git_commit(),
+        "transport": "uvicorn" if args.server else "asgi",
+        "products": args.products,
+        "concurrency": args.concurrency,
+        "mix": args.mix,
+    }
+    async with app.router.lifespan_context(app):
+        emails = seed_catalog(args.products, n_owners=args.owners, n_categories=args.categories)
+        if not args.server:
+            async with asgi_client(app) as client:
+                report.update(await run(client, args, emails))
+    
+    if args.server:
+        # The server process starts its own pools and lifespan
+        engine.dispose()
+        await async_engine.dispose()
+        with serve_in_subprocess(app) as base_url:
+            async with http_client(base_url, args.concurrency) as client:
+                report.update(await run(client, args, emails))
+    
+    if args.compare:
+        with open(args.compare) as file:
+            report["compared_to"] = compare_reports(json.load(file), report)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2, sort_keys=True)
+    print_report(report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--owners", type=int, default=1_000)
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--warmup", type=int, default=500, help="requests sent before measuring")
+    parser.add_argument("--writers", type=int, default=20, help="owners logged in for create and update")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="route weights, e.g. get=40,list=15")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--server", action="store_true", help="serve the app with uvicorn in a subprocess")
+    parser.add_argument("--output", help="also write the report to this file")
+    parser.add_argument("--compare", help="report the change against this earlier report")
+    asyncio.run(main(parser.parse_args()))
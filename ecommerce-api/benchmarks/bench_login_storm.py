@@ -0,0 +1,106 @@
+"""
+Login Storm Benchmark
+
+Measures catalog read latency while a burst of logins is in flight.
+The app runs under uvicorn in a separate process so event loop stalls
+show up as latency.
+
+- idle: catalog reads only, the reference latency
+- inline: the old login handler, bcrypt verified on the event loop
+- pool: the real /auth/login route, bcrypt in the password hashing pool
+
+Usage:
+    python -m benchmarks.bench_login_storm --logins 100 --login-concurrency 50
+"""
+
+import argparse
+import asyncio
+import random
+
+from benchmarks.common import (
+    BENCH_PASSWORD,
+    configure_database,
+    http_client,
+    print_report,
+    run_load,
+    seed_catalog,
+    serve_in_subprocess,
+)
+
+configure_database("login-storm")
+
+from fastapi import APIRouter, Depends, HTTPException  # noqa: E402
+from fastapi.security import OAuth2PasswordRequestForm  # noqa: E402
+from sqlalchemy import select  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession  # noqa: E402
+
+from app.database import async_engine, engine, get_async_db  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.utils.security import create_user_token, verify_password  # noqa: E402
+
+
+router = APIRouter()
+
+
+@router.post("/inline/login")
+async def inline_login(
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Baseline login: bcrypt runs on the event loop thread."""
+    user = (await db.execute(select(User).where(User.email == form_data.username))).scalars().first()
+    if not user or not verify_password(form_data.password, user.hashed_password):
+        raise HTTPException(status_code=401)
+    return {"access_token": create_user_token(user), "token_type": "bearer"}
+
+
+app.include_router(router, prefix="/bench")
+
+
+async def run_mode(base_url: str, login_path: str | None, emails: list[str], args) -> dict:
+    """Run catalog reads, alongside a login burst unless login_path is None."""
+    rng = random.Random(7)
+    
+    async def read_product(client, number):
+        return "get_product", await client.get(f"/products/{rng.randrange(args.products) + 1}")
+    
+    async def log_in(client, number):
+        form = {"username": emails[number % len(emails)], "password": BENCH_PASSWORD}
+        return "login", await client.post(login_path, data=form)
+    
+    concurrency = args.readers + args.login_concurrency
+    async with http_client(base_url, concurrency) as client:
+        loads = [run_load(client, read_product, args.readers, args.reads)]
+        if login_path is not None:
+            loads.append(run_load(client, log_in, args.login_concurrency, args.logins))
+        reports = await asyncio.gather(*loads)
+    
+    report = reports[0]
+    if login_path is not None:
+        report["routes"].update(reports[1]["routes"])
+    return report
+
+
+async def main(args) -> None:
+    async with app.router.lifespan_context(app):
+        emails = seed_catalog(args.products)
+    engine.dispose()
+    await async_engine.dispose()
+    
+    report = {}
+    with serve_in_subprocess(app) as base_url:
+        report["idle"] = await run_mode(base_url, None, emails, args)
+        report["inline"] = await run_mode(base_url, "/bench/inline/login", emails, args)
+        report["pool"] = await run_mode(base_url, "/auth/login", emails, args)
+    print_report(report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--readers", type=int, default=20)
+    parser.add_argument("--reads", type=int, default=2_000)
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--login-concurrency", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,130 @@
+"""
+Metrics Overhead Benchmark
+
+Measures the CPU time per request with and without request metrics
+(MetricsMiddleware plus the SQLAlchemy query hooks) for a single product
+and a 20 item list page. The target is an overhead under 2%.
+
+Requests go through the ASGI app in-process with the product cache
+disabled, so every request reaches the database and the query hooks
+fire. End-to-end differences of a few microseconds are close to the
+noise, so the middleware's own cost is also timed around an app that
+does nothing.
+
+Usage:
+    python -m benchmarks.bench_metrics_overhead --products 10000 --requests 2000
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from starlette.routing import Route
+
+from benchmarks.common import asgi_client, configure_database, print_report, seed_catalog
+
+configure_database("metrics-overhead")
+os.environ["CACHE_BACKEND"] = "none"
+# The benchmark adds the middleware itself, to switch it per request
+os.environ["METRICS_ENABLED"] = "false"
+
+from app.database import async_engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.utils.metrics import MetricsMiddleware, instrument_engine, uninstrument_engine  # noqa: E402
+
+
+CASES = {
+    "product": ("/products/1", {}),
+    "list 20": ("/products/", {"limit": 20}),
+}
+
+OVERHEAD_TARGET_PCT = 2.0
+
+
+async def timed_batch(client, path: str, params: dict, batch: int, instrumented: bool) -> float:
+    """CPU time (s) of `batch` requests, with the query hooks on or off."""
+    if instrumented:
+        instrument_engine(async_engine.sync_engine)
+    started = time.process_time()
+    for _ in range(batch):
+        (await client.get(path, params=params)).raise_for_status()
+    elapsed = time.process_time() - started
+    if instrumented:
+        uninstrument_engine(async_engine.sync_engine)
+    return elapsed
+
+
+async def measure(clients: dict, path: str, params: dict, requests: int, batch: int = 50) -> dict:
+    """
+    CPU time (ms) per request with and without metrics.
+    
+    Each round runs a batch per mode in ABBA order, so steady drift (such
+    as the list count cache expiring) cancels out, and the overhead is
+    the median of the per-round ratios. The query hooks are added and
+    removed between batches, as doing that costs more than a request.
+    """
+    totals = {"plain": 0.0, "metrics": 0.0}
+    ratios = []
+    # The first round warms up caches that are not under test
+    for number in range(requests // (2 * batch) + 1):
+        times = {"plain": 0.0, "metrics": 0.0}
+        for mode in ("plain", "metrics", "metrics", "plain"):
+            times[mode] += await timed_batch(clients[mode], path, params, batch, mode == "metrics")
+        if number > 0:
+            ratios.append(times["metrics"] / times["plain"])
+            for mode, elapsed in times.items():
+                totals[mode] += elapsed
+    
+    measured = len(ratios) * 2 * batch
+    overhead = (statistics.median(ratios) - 1) * 100
+    return {
+        **{f"{mode}_cpu_ms": round(cpu / measured * 1000, 4) for mode, cpu in totals.items()},
+        "cpu_overhead_pct": round(overhead, 2),
+        "within_target": overhead < OVERHEAD_TARGET_PCT,
+    }
+
+
+async def middleware_cost(requests: int = 100_000) -> float:
+    """Microseconds MetricsMiddleware adds to a request, timed around a no-op app."""
+    route = Route("/products/{product_id}", lambda request: None)
+    
+    async def endpoint(scope, receive, send):
+        scope["route"] = route
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+    
+    async def discard(message):
+        pass
+    
+    timings = {}
+    for name, target in (("plain", endpoint), ("metrics", MetricsMiddleware(endpoint))):
+        started = time.process_time()
+        for _ in range(requests):
+            await target({"type": "http", "method": "GET"}, None, discard)
+        timings[name] = time.process_time() - started
+    return (timings["metrics"] - timings["plain"]) / requests * 1_000_000
+
+
+async def main(args) -> None:
+    async with app.router.lifespan_context(app):
+        seed_catalog(args.products)
+        
+        report = {
+            "products": args.products,
+            "target_pct": OVERHEAD_TARGET_PCT,
+            "middleware_us": round(await middleware_cost(), 2),
+        }
+        async with asgi_client(app) as plain, asgi_client(MetricsMiddleware(app)) as metered:
+            clients = {"plain": plain, "metrics": metered}
+            for name, (path, params) in CASES.items():
+                report[name] = await measure(clients, path, params, args.requests)
+    print_report(report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=2_000)
+    asyncio.run(main(parser.parse_args()))
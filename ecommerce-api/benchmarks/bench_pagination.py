@@ -0,0 +1,90 @@
+"""
+Pagination Benchmark
+
+Compares the latency of page 1 and a deep page of GET /products/ with
+keyset cursors, against the same pages fetched with OFFSET/LIMIT.
+
+Usage:
+    python -m benchmarks.bench_pagination --products 200000 --page 10000
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import asgi_client, configure_database, percentile, print_report, seed_catalog
+
+configure_database("pagination")
+
+from sqlalchemy import select  # noqa: E402
+
+from app.database import SessionLocal  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.product import Product  # noqa: E402
+from app.routers.products import apply_product_filters, product_sort_key  # noqa: E402
+from app.utils.pagination import encode_cursor  # noqa: E402
+
+
+def cursor_for_page(page: int, limit: int) -> str:
+    """Build the cursor a client would hold after paging to `page`."""
+    with SessionLocal() as db:
+        sort_key = product_sort_key("created_at", db.bind.dialect.name)
+        query = apply_product_filters(select(Product.id, sort_key.label("sort_key")))
+        last_id, last_key = db.execute(
+            query.order_by(sort_key, Product.id).offset((page - 1) * limit - 1).limit(1)
+        ).one()
+    key = last_key.isoformat() if hasattr(last_key, "isoformat") else last_key
+    return encode_cursor({"sort": "created_at", "order": "asc", "key": key, "id": last_id, "page": page})
+
+
+def offset_page(page: int, limit: int) -> None:
+    """The previous implementation: OFFSET/LIMIT over the filtered rows."""
+    with SessionLocal() as db:
+        query = apply_product_filters(select(Product))
+        db.execute(query.offset((page - 1) * limit).limit(limit)).scalars().all()
+
+
+async def time_requests(client, params: dict, repeat: int) -> float:
+    """Median latency (ms) of repeated list requests."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = await client.get("/products/", params=params)
+        samples.append(time.perf_counter() - started)
+        response.raise_for_status()
+    return round(percentile(samples, 50) * 1000, 3)
+
+
+def time_offset(page: int, limit: int, repeat: int) -> float:
+    """Median latency (ms) of the OFFSET query alone."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        offset_page(page, limit)
+        samples.append(time.perf_counter() - started)
+    return round(percentile(samples, 50) * 1000, 3)
+
+
+async def main(args) -> None:
+    async with app.router.lifespan_context(app):
+        seed_catalog(args.products)
+        deep_cursor = cursor_for_page(args.page, args.limit)
+        async with asgi_client(app) as client:
+            report = {
+                "keyset_page_1_ms": await time_requests(client, {"limit": args.limit}, args.repeat),
+                f"keyset_page_{args.page}_ms": await time_requests(
+                    client, {"limit": args.limit, "cursor": deep_cursor}, args.repeat
+                ),
+                "offset_page_1_query_ms": time_offset(1, args.limit, args.repeat),
+                f"offset_page_{args.page}_query_ms": time_offset(args.page, args.limit, args.repeat),
+            }
+        print_report(report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=200_000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--page", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,71 @@
+"""
+Search Benchmark
+
+Compares the full-text search statement behind /products/search with the
+previous LIKE '%q%' scan over name and description.
+
+Usage:
+    python -m benchmarks.bench_search --products 1000000
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import configure_database, percentile, print_report, seed_catalog
+
+configure_database("search")
+
+from app.database import SessionLocal  # noqa: E402
+from app.main import app  # noqa: E402
+from app.utils.search import build_search_query, like_search  # noqa: E402
+
+
+# Seeded names are "<word> <noun> <n>" and descriptions draw from the same
+# small vocabulary, so single common words match a large share of the
+# catalog while numbered or absent terms are selective.
+QUERIES = {
+    "common_word": "wireless",
+    "two_common_words": "leather wallet",
+    "prefix": "blu",
+    "selective_name": "kettle 4242",
+    "no_match": "titanium",
+}
+
+
+def time_statement(build, q: str, repeat: int) -> dict:
+    """Latency percentiles (ms) of one statement, repeated."""
+    samples = []
+    with SessionLocal() as db:
+        statement = build(db.bind.dialect.name, q)
+        for _ in range(repeat):
+            started = time.perf_counter()
+            db.execute(statement).all()
+            samples.append(time.perf_counter() - started)
+    return {
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "max_ms": round(max(samples) * 1000, 3),
+    }
+
+
+async def main(args) -> None:
+    async with app.router.lifespan_context(app):
+        seed_catalog(args.products)
+        report = {"products": args.products, "queries": {}}
+        for label, q in QUERIES.items():
+            report["queries"][label] = {
+                "q": q,
+                "full_text": time_statement(
+                    lambda dialect, q: build_search_query(dialect, q, args.limit), q, args.repeat
+                ),
+                "like_scan": time_statement(lambda dialect, q: like_search(q, args.limit), q, args.repeat),
+            }
+        print_report(report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,81 @@
+"""
+Serialization Benchmark
+
+Measures the CPU time per request of GET /products/ with 10 and 100
+item pages, and of a 50 result search, with the default path (ORM
+objects and a Pydantic model per product) and with FAST_JSON_RESPONSES
+(plain rows, one TypeAdapter call, orjson).
+
+Requests go through the ASGI app in-process with the product cache
+disabled, so every request queries and serializes. CPU time is process
+time, which includes the database driver's thread.
+
+Usage:
+    python -m benchmarks.bench_serialization --products 20000 --requests 500
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.common import asgi_client, configure_database, print_report, seed_catalog
+
+configure_database("serialization")
+os.environ["CACHE_BACKEND"] = "none"
+
+from app.config import settings  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+CASES = {
+    "list 10": ("/products/", {"limit": 10}),
+    "list 100": ("/products/", {"limit": 100}),
+    "search 50": ("/products/search", {"q": "wireless", "limit": 50}),
+}
+
+MODES = {"default": False, "fast": True}
+
+
+async def measure(client, path: str, params: dict, requests: int) -> dict:
+    """
+    CPU and wall time (ms) per request for both modes.
+    
+    The modes alternate request by request, so drift over the run (such
+    as the list count cache expiring) affects both equally.
+    """
+    totals = {mode: [0.0, 0.0] for mode in MODES}
+    for number in range(requests + 10):
+        for mode, fast in MODES.items():
+            settings.FAST_JSON_RESPONSES = fast
+            cpu_started, wall_started = time.process_time(), time.perf_counter()
+            (await client.get(path, params=params)).raise_for_status()
+            # The first requests warm up caches that are not under test
+            if number >= 10:
+                totals[mode][0] += time.process_time() - cpu_started
+                totals[mode][1] += time.perf_counter() - wall_started
+    
+    report = {
+        mode: {"cpu_ms": round(cpu / requests * 1000, 3), "wall_ms": round(wall / requests * 1000, 3)}
+        for mode, (cpu, wall) in totals.items()
+    }
+    report["cpu_saved_pct"] = round((1 - totals["fast"][0] / totals["default"][0]) * 100, 1)
+    return report
+
+
+async def main(args) -> None:
+    async with app.router.lifespan_context(app):
+        seed_catalog(args.products)
+        
+        report = {"products": args.products}
+        async with asgi_client(app) as client:
+            for name, (path, params) in CASES.items():
+                report[name] = await measure(client, path, params, args.requests)
+    print_report(report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=20_000)
+    parser.add_argument("--requests", type=int, default=500)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,107 @@
+"""
+Single-Flight Benchmark
+
+Sends bursts of identical concurrent requests for a product that is not
+cached, and for an uncached list page, the way a launch hits the API,
+and counts the SQL statements each burst runs with request coalescing
+on and off (SINGLE_FLIGHT_MAX_WAITERS=0).
+
+With coalescing the statement count per burst stays flat as the
+concurrency rises from 1 to 1000; without it every request runs its
+own query. Requests go through the ASGI app in-process, and the cache
+is invalidated before every burst.
+
+Usage:
+    python -m benchmarks.bench_single_flight --concurrency 1,10,100,1000 --bursts 5
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import asgi_client, configure_database, percentile, print_report, seed_catalog
+
+configure_database("single-flight")
+
+from sqlalchemy import event  # noqa: E402
+
+from app.database import async_engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.routers.products import product_counts  # noqa: E402
+from app.utils.cache import product_cache  # noqa: E402
+
+
+# SQL statements executed, reset per burst
+statements = 0
+
+
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def count_statement(conn, cursor, statement, parameters, context, executemany):
+    global statements
+    statements += 1
+
+
+async def burst(client, path: str, params: dict, concurrency: int) -> tuple[list[float], int]:
+    """Send `concurrency` identical requests at once: latencies and failures."""
+    async def request():
+        started = time.perf_counter()
+        response = await client.get(path, params=params)
+        return time.perf_counter() - started, response.status_code != 200
+    
+    results = await asyncio.gather(*(request() for _ in range(concurrency)))
+    return [elapsed for elapsed, _ in results], sum(failed for _, failed in results)
+
+
+async def measure(client, path: str, params: dict, concurrency: int, bursts: int) -> dict:
+    """Statements per burst and request latency over cold bursts."""
+    global statements
+    samples, errors, counts = [], 0, []
+    for _ in range(bursts):
+        await product_cache.invalidate_product(1)
+        product_counts.clear()
+        statements = 0
+        latencies, failed = await burst(client, path, params, concurrency)
+        counts.append(statements)
+        samples += latencies
+        errors += failed
+    return {
+        "queries_per_burst": round(sum(counts) / bursts, 1),
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+        "errors": errors,
+    }
+
+
+async def main(args) -> None:
+    max_waiters = product_cache.flights.max_waiters
+    routes = {
+        "product": ("/products/1", {}),
+        "list": ("/products/", {"category": "category-3", "sort": "price", "limit": 20}),
+    }
+    
+    report = {"products": args.products, "bursts": args.bursts}
+    async with app.router.lifespan_context(app):
+        seed_catalog(args.products)
+        async with asgi_client(app) as client:
+            for route, (path, params) in routes.items():
+                await burst(client, path, params, 1)
+                report[route] = {}
+                for concurrency in args.concurrency:
+                    results = {}
+                    for mode, waiters in (("single_flight", max_waiters), ("off", 0)):
+                        product_cache.flights.max_waiters = waiters
+                        results[mode] = await measure(client, path, params, concurrency, args.bursts)
+                    report[route][f"concurrency_{concurrency}"] = results
+            product_cache.flights.max_waiters = max_waiters
+    report["flights"] = product_cache.flights.stats()
+    print_report(report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=20_000)
+    parser.add_argument(
+        "--concurrency", type=lambda value: [int(part) for part in value.split(",")], default=[1, 10, 100, 1000]
+    )
+    parser.add_argument("--bursts", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
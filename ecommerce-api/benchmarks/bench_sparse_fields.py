@@ -0,0 +1,105 @@
+"""
+Sparse Fieldset Benchmark
+
+Compares full product responses with `fields=id,name,price,image_url`,
+the columns a listing grid shows, on a catalog whose descriptions are
+padded to --description-chars characters. Reports the response size and
+the p50/p99 latency of:
+
+- list: 100-item pages of GET /products/, walked with the cursor
+- search: 50-result GET /products/search
+- product: single GET /products/{id}
+
+Requests go through the ASGI app in-process with the product cache
+disabled, so every request queries and serializes. The two modes
+alternate request by request.
+
+Usage:
+    python -m benchmarks.bench_sparse_fields --products 20000 --description-chars 2000
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.common import asgi_client, configure_database, percentile, print_report, seed_catalog
+
+configure_database("sparse-fields")
+os.environ["CACHE_BACKEND"] = "none"
+
+from sqlalchemy import text  # noqa: E402
+
+from app.database import engine  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+GRID_FIELDS = "id,name,price,image_url"
+
+MODES = {"full": {}, "sparse": {"fields": GRID_FIELDS}}
+
+
+def pad_descriptions(chars: int) -> None:
+    """Grow every description to about `chars` characters."""
+    padding = (" lorem ipsum dolor sit amet" * (chars // 27 + 1))[:chars]
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE products SET description = description || :padding"), {"padding": padding})
+
+
+async def measure(client, path_for, params: dict, requests: int) -> dict:
+    """Latency and response size for both modes."""
+    samples = {mode: [] for mode in MODES}
+    sizes = {mode: 0 for mode in MODES}
+    cursors = {mode: None for mode in MODES}
+    for number in range(requests + 10):
+        for mode, extra in MODES.items():
+            query = {**params, **extra}
+            if cursors[mode]:
+                query["cursor"] = cursors[mode]
+            started = time.perf_counter()
+            response = await client.get(path_for(number), params=query)
+            elapsed = time.perf_counter() - started
+            response.raise_for_status()
+            # List pages follow their cursor, starting over at the end
+            body = response.json()
+            if isinstance(body, dict) and "next_cursor" in body:
+                cursors[mode] = body["next_cursor"]
+            if number >= 10:
+                samples[mode].append(elapsed)
+                sizes[mode] += len(response.content)
+    
+    report = {
+        mode: {
+            "bytes": sizes[mode] // requests,
+            "p50_ms": round(percentile(samples[mode], 50) * 1000, 3),
+            "p99_ms": round(percentile(samples[mode], 99) * 1000, 3),
+        }
+        for mode in MODES
+    }
+    report["bytes_saved_pct"] = round((1 - sizes["sparse"] / sizes["full"]) * 100, 1)
+    return report
+
+
+async def main(args) -> None:
+    async with app.router.lifespan_context(app):
+        seed_catalog(args.products)
+        pad_descriptions(args.description_chars)
+        
+        report = {"products": args.products, "description_chars": args.description_chars, "fields": GRID_FIELDS}
+        async with asgi_client(app) as client:
+            report["list"] = await measure(client, lambda _: "/products/", {"limit": 100}, args.requests)
+            report["search"] = await measure(
+                client, lambda _: "/products/search", {"q": "wireless", "limit": 50}, args.requests
+            )
+            report["product"] = await measure(
+                client, lambda number: f"/products/{number % args.products + 1}", {}, args.requests
+            )
+    print_report(report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=20_000)
+    parser.add_argument("--description-chars", type=int, default=2_000)
+    parser.add_argument("--requests", type=int, default=300)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,119 @@
+"""
+Startup Time Benchmark
+
+Starts the application in fresh processes, the way a new worker does
+during a rolling restart or scale-out, and reports where the time goes:
+
+- phases: the app's startup report (import, then each lifespan step),
+  median over --runs processes
+- process_ms: wall time of the whole process, including the interpreter
+- imports_ms: import time by top-level package, from one extra run
+  under `python -X importtime`
+
+The first process migrates the fresh database and is not counted.
+
+Exits with code 1 when the median startup exceeds --budget-ms, or when
+a module that should only load on first use (LAZY_MODULES) was imported
+during startup. The budget depends on the machine: measure the current
+commit first and keep some headroom. The test suite runs the same
+checks (tests/test_startup.py) on its own database, with the budget
+from STARTUP_BUDGET_MS.
+
+Usage:
+    python -m benchmarks.bench_startup --runs 5 --budget-ms 3000
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from benchmarks.common import configure_database, print_report
+
+# Imported by the tests, which bring their own database
+if __name__ == "__main__":
+    configure_database("startup")
+
+
+# Modules only needed by some requests; startup must not import them
+LAZY_MODULES = ["passlib", "jose", "alembic"]
+
+# Run in each child process: start the app, print its report
+CHILD = f"""
+import asyncio, json, sys
+from app.main import app
+from app.utils.startup import startup_report
+
+async def start():
+    async with app.router.lifespan_context(app):
+        loaded = [name for name in {LAZY_MODULES!r} if name in sys.modules]
+        print(json.dumps({{"report": startup_report.as_dict(), "loaded": loaded}}))
+
+asyncio.run(start())
+"""
+
+
+def start_process(*options: str) -> tuple[dict, float, str]:
+    """Start the app in a new interpreter: its report, wall time and stderr."""
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, *options, "-c", CHILD], capture_output=True, text=True, check=True
+    )
+    elapsed = time.perf_counter() - started
+    # The lifespan prints its own lines; the report is the JSON one
+    line = next(line for line in result.stdout.splitlines() if line.startswith("{"))
+    return json.loads(line), elapsed, result.stderr
+
+
+def imports_by_package(importtime: str, top: int = 12) -> dict[str, float]:
+    """Sum the self time of every imported module by top-level package (ms)."""
+    totals = defaultdict(float)
+    for line in importtime.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, _, name = line[len("import time:"):].split("|")
+        totals[name.strip().split(".")[0]] += int(own) / 1000
+    ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)
+    return {name: round(ms, 1) for name, ms in ranked[:top]}
+
+
+def main(args) -> int:
+    start_process()
+    
+    runs = [start_process() for _ in range(args.runs)]
+    phases = {
+        name: round(statistics.median(run["report"]["phases_ms"].get(name, 0.0) for run, _, _ in runs), 1)
+        for name in runs[0][0]["report"]["phases_ms"]
+    }
+    total = statistics.median(run["report"]["total_ms"] for run, _, _ in runs)
+    loaded = sorted({name for run, _, _ in runs for name in run["loaded"]})
+    _, _, importtime = start_process("-X", "importtime")
+    
+    print_report({
+        "runs": args.runs,
+        "phases_ms": phases,
+        "total_ms": round(total, 1),
+        "process_ms": round(statistics.median(elapsed for _, elapsed, _ in runs) * 1000, 1),
+        "imports_ms": imports_by_package(importtime),
+        "budget_ms": args.budget_ms,
+        "lazy_modules_loaded": loaded,
+    })
+    
+    failed = False
+    if total > args.budget_ms:
+        print(f"Startup took {total:.0f} ms, over the {args.budget_ms:.0f} ms budget", file=sys.stderr)
+        failed = True
+    if loaded:
+        print(f"Imported during startup: {', '.join(loaded)}", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=3000.0, help="fail above this median startup time")
+    sys.exit(main(parser.parse_args()))
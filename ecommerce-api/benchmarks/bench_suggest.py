@@ -0,0 +1,144 @@
+"""
+Autocomplete Benchmark
+
+Measures the in-memory prefix index behind GET /products/suggest:
+
+- index: builds it from --names synthetic product names (1M by default)
+  and reports the build time, the memory it holds (traced with
+  tracemalloc) and the lookup time by prefix length
+- http: seeds --products products and compares GET /products/suggest
+  with the full-text GET /products/search for the same prefixes,
+  in-process through the ASGI app
+
+Short prefixes match the most names; the lookup cost should stay flat
+as they grow, since only `limit` names are ever visited.
+
+Usage:
+    python -m benchmarks.bench_suggest --names 1000000 --products 100000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import tracemalloc
+
+from benchmarks.common import NOUNS, WORDS, asgi_client, configure_database, percentile, print_report, seed_catalog
+
+configure_database("suggest")
+
+from app.database import AsyncSessionLocal  # noqa: E402
+from app.main import app  # noqa: E402
+from app.utils.suggest import IndexedProduct, SuggestIndex, load_suggest_index, suggest_index  # noqa: E402
+
+
+def synthetic_products(count: int, seed: int = 42) -> list[IndexedProduct]:
+    """Products named like the seeded catalog, with a random brand in front."""
+    rng = random.Random(seed)
+    brands = ["".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=rng.randint(4, 9))) for _ in range(5_000)]
+    return [
+        IndexedProduct(
+            product_id,
+            f"{rng.choice(brands).title()} {rng.choice(WORDS)} {rng.choice(NOUNS)} {product_id}",
+            f"category-{rng.randrange(200)}",
+            rng.randrange(500),
+            True,
+        )
+        for product_id in range(1, count + 1)
+    ]
+
+
+def sample_prefixes(names: list[str], length: int, count: int, rng: random.Random) -> list[str]:
+    return [name[:length] for name in rng.sample(names, count)]
+
+
+async def bench_index(args) -> dict:
+    """Build time, memory and lookup time of an index of args.names names."""
+    products = synthetic_products(args.names)
+    
+    async def fetch():
+        return products
+    
+    index = SuggestIndex()
+    started = time.perf_counter()
+    await index.load(fetch)
+    build_seconds = time.perf_counter() - started
+    
+    # Build again under tracemalloc, which slows it down
+    del index
+    tracemalloc.start()
+    index = SuggestIndex()
+    await index.load(fetch)
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    rng = random.Random(1)
+    names = [product.name for product in products]
+    lookups = {}
+    for length in (1, 2, 3, 4, 6, 8):
+        samples = []
+        for prefix in sample_prefixes(names, length, args.lookups, rng):
+            started = time.perf_counter()
+            index.search(prefix, args.limit)
+            samples.append(time.perf_counter() - started)
+        lookups[f"prefix_{length}"] = {
+            "p50_us": round(percentile(samples, 50) * 1e6, 1),
+            "p99_us": round(percentile(samples, 99) * 1e6, 1),
+        }
+    
+    return {
+        "names": args.names,
+        "build_seconds": round(build_seconds, 2),
+        "memory_mb": round(held / 2**20, 1),
+        "peak_memory_mb": round(peak / 2**20, 1),
+        "estimated_memory_mb": round(index.stats()["memory_bytes"] / 2**20, 1),
+        "lookups": lookups,
+    }
+
+
+async def measure_route(client, path: str, param: str, prefixes: list[str], limit: int) -> dict:
+    samples = []
+    for prefix in prefixes:
+        started = time.perf_counter()
+        (await client.get(path, params={param: prefix, "limit": limit})).raise_for_status()
+        samples.append(time.perf_counter() - started)
+    return {
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+    }
+
+
+async def bench_http(args) -> dict:
+    """GET /products/suggest against GET /products/search on a seeded catalog."""
+    async with app.router.lifespan_context(app):
+        seed_catalog(args.products)
+        await load_suggest_index(suggest_index, AsyncSessionLocal)
+        
+        rng = random.Random(2)
+        words = WORDS + NOUNS
+        report = {"products": args.products}
+        async with asgi_client(app) as client:
+            for length in (2, 4):
+                prefixes = [rng.choice(words)[:length] for _ in range(args.requests)]
+                report[f"prefix_{length}"] = {
+                    "suggest": await measure_route(client, "/products/suggest", "prefix", prefixes, args.limit),
+                    "search": await measure_route(client, "/products/search", "q", prefixes, args.limit),
+                }
+    return report
+
+
+async def main(args) -> None:
+    print_report({
+        "index": await bench_index(args),
+        "http": await bench_http(args),
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--names", type=int, default=1_000_000, help="names in the synthetic index")
+    parser.add_argument("--lookups", type=int, default=2_000, help="lookups per prefix length")
+    parser.add_argument("--products", type=int, default=100_000, help="products seeded for the HTTP comparison")
+    parser.add_argument("--requests", type=int, default=300, help="requests per route and prefix length")
+    parser.add_argument("--limit", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,182 @@
+"""
+Write Round-Trip Benchmark
+
+Creates, updates and deletes products two ways, as a product owner, and
+reports the database round trips (SQL statements plus the commit) and
+latency of each write:
+
+- returning: the product routes, one INSERT/UPDATE ... RETURNING whose
+  WHERE clause carries the ownership check
+- select-then-write: the previous route bodies, which load the product,
+  check its owner in Python, write it and load it again after the commit
+
+Also reports the round trips of updates refused with 403 and 404: only
+those pay for a lookup after the write matched nothing.
+
+Every write also appends its change feed entry. Writes run in-process on
+their own session, so the round trips are those of a single request; on
+a networked database each one is a network round trip.
+
+Usage:
+    python -m benchmarks.bench_write_round_trips --products 10000 --writes 500
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.common import configure_database, percentile, print_report, seed_catalog
+
+configure_database("write-round-trips")
+os.environ["CACHE_BACKEND"] = "none"
+os.environ["SUGGEST_ENABLED"] = "false"
+
+from fastapi import HTTPException  # noqa: E402
+from sqlalchemy import event, select  # noqa: E402
+
+from app.database import AsyncSessionLocal, async_engine, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.product import Product  # noqa: E402
+from app.routers.products import create_product, delete_product, update_product  # noqa: E402
+from app.schemas.product import ProductCreate, ProductUpdate  # noqa: E402
+from app.utils.changes import record_changes  # noqa: E402
+from app.utils.security import Principal  # noqa: E402
+
+
+# Statements and commits, reset per write
+round_trips = 0
+
+
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def count_statement(conn, cursor, statement, parameters, context, executemany):
+    global round_trips
+    round_trips += 1
+
+
+@event.listens_for(async_engine.sync_engine, "commit")
+def count_commit(conn):
+    global round_trips
+    round_trips += 1
+
+
+async def create_select_then_write(data: ProductCreate, principal: Principal, db) -> Product:
+    """POST /products/ as it was: add, flush, commit, refresh."""
+    product = Product(**data.model_dump(), owner_id=principal.id)
+    db.add(product)
+    await db.flush()
+    await record_changes(db, [product.id])
+    await db.commit()
+    await db.refresh(product)
+    return product
+
+
+async def update_select_then_write(product_id: int, data: ProductUpdate, principal: Principal, db) -> Product:
+    """PUT /products/{id} as it was: get, check owner, flush, commit, refresh."""
+    product = await db.get(Product, product_id)
+    if product.owner_id != principal.id and not principal.is_admin:
+        raise HTTPException(status_code=403)
+    for field, value in data.model_dump(exclude_unset=True).items():
+        setattr(product, field, value)
+    await record_changes(db, [product_id], deleted=not product.is_active)
+    await db.commit()
+    await db.refresh(product)
+    return product
+
+
+async def delete_select_then_write(product_id: int, principal: Principal, db) -> None:
+    """DELETE /products/{id} as it was: get, check owner, flush, commit."""
+    product = await db.get(Product, product_id)
+    if product.owner_id != principal.id and not principal.is_admin:
+        raise HTTPException(status_code=403)
+    product.is_active = False
+    await record_changes(db, [product_id], deleted=True)
+    await db.commit()
+
+
+MODES = {
+    "returning": {
+        "create": create_product,
+        "update": update_product,
+        "delete": delete_product,
+    },
+    "select-then-write": {
+        "create": create_select_then_write,
+        "update": update_select_then_write,
+        "delete": delete_select_then_write,
+    },
+}
+
+
+async def timed(write, *args) -> tuple[int, float]:
+    """Run one write on a fresh session: round trips and seconds."""
+    global round_trips
+    async with AsyncSessionLocal() as db:
+        round_trips = 0
+        started = time.perf_counter()
+        try:
+            await write(*args, db)
+        except HTTPException:
+            pass
+        return round_trips, time.perf_counter() - started
+
+
+def summary(results: list[tuple[int, float]]) -> dict:
+    """Mean round trips and latency percentiles."""
+    samples = [elapsed for _, elapsed in results]
+    return {
+        "round_trips": round(sum(count for count, _ in results) / len(results), 2),
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+    }
+
+
+async def measure(writes: dict, principal: Principal, product_ids: list[int], count: int) -> dict:
+    """Create `count` products, then update and delete `count` of the owner's products."""
+    results = {"create": [], "update": [], "delete": []}
+    for number in range(count):
+        data = ProductCreate(name=f"Round trip product {number}", price=9.99, category="bench")
+        results["create"].append(await timed(writes["create"], data, principal))
+    for product_id in product_ids[:count]:
+        data = ProductUpdate(price=19.99, stock_quantity=7)
+        results["update"].append(await timed(writes["update"], product_id, data, principal))
+    for product_id in product_ids[:count]:
+        results["delete"].append(await timed(writes["delete"], product_id, principal))
+    return {operation: summary(samples) for operation, samples in results.items()}
+
+
+async def main(args) -> None:
+    report = {"products": args.products, "writes": args.writes}
+    async with app.router.lifespan_context(app):
+        # Few owners, so the benchmarked owner has products enough for both modes
+        seed_catalog(args.products, n_owners=10)
+        with engine.connect() as conn:
+            owned = conn.execute(
+                select(Product.id).where(Product.owner_id == 1).order_by(Product.id)
+            ).scalars().all()
+            someone_elses = conn.scalar(select(Product.id).where(Product.owner_id != 1).limit(1))
+        principal = Principal(id=1, email="owner0@bench.example.com", is_admin=False, token_version=0)
+        
+        # Each mode updates and deletes its own half of the owner's products
+        half = len(owned) // 2
+        count = min(args.writes, half)
+        report["writes"] = count
+        for (mode, writes), product_ids in zip(MODES.items(), (owned[:half], owned[half:])):
+            report[mode] = await measure(writes, principal, product_ids, count)
+        
+        refused = {"forbidden": someone_elses, "not_found": args.products + 1_000_000}
+        report["returning"]["refused_update"] = {
+            reason: summary([
+                await timed(update_product, product_id, ProductUpdate(price=1.0), principal)
+                for _ in range(50)
+            ])
+            for reason, product_id in refused.items()
+        }
+    print_report(report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--writes", type=int, default=500, help="writes of each kind per mode")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,191 @@
+"""
+Query Plan Check
+
+Seeds a large catalog, then runs EXPLAIN on the query behind each
+product and auth route and fails (exit code 1) if any of them reads a
+table with a full scan. Keyset list pages must also be read in index
+order, without sorting every matching row.
+
+Queries are built with the same helpers the routes use, so a change to a
+route's filters or ordering is checked against the real indexes. Run it
+after changing queries or indexes:
+    
+    python -m benchmarks.check_query_plans --products 200000
+
+Set BENCH_DATABASE_URL to check PostgreSQL plans; the schema is created
+with `alembic upgrade head`, exactly as in production. The test suite
+runs the same checks (tests/test_query_plans.py) on its own database.
+"""
+
+import argparse
+import json
+import sys
+from dataclasses import dataclass
+
+from benchmarks.common import configure_database, seed_catalog
+
+# Imported by the tests, which bring their own database
+if __name__ == "__main__":
+    configure_database("query-plans")
+
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from sqlalchemy import Connection, Select, func, select, text  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.database import engine  # noqa: E402
+from app.models.product import Product  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.routers.products import apply_product_filters, build_page_query  # noqa: E402
+from app.utils.changes import changes_page_query  # noqa: E402
+from app.utils.facets import edge_count_query, split_price_range  # noqa: E402
+from app.utils.search import build_fuzzy_query, build_search_query  # noqa: E402
+
+
+# Tables that must never be read with a full scan
+CHECKED_TABLES = ("products", "users", "product_changes", "product_trigrams")
+
+
+@dataclass
+class PlanCheck:
+    """A route query and whether it must avoid sorting (keyset pages)."""
+    name: str
+    query: Select
+    index_order: bool = False
+
+
+def route_queries(conn: Connection) -> list[PlanCheck]:
+    """Build the queries issued by the product and auth routes."""
+    dialect = conn.dialect.name
+    category = conn.scalar(select(Product.category).limit(1))
+    email = conn.scalar(select(User.email).limit(1))
+    
+    checks = []
+    for sort in ("created_at", "price"):
+        for order in ("asc", "desc"):
+            first_page = build_page_query(dialect, sort, order)
+            last_product, last_key = Session(bind=conn).execute(first_page.limit(1)).one()
+            after = (last_key, last_product.id)
+            checks += [
+                PlanCheck(f"list {sort} {order}", first_page.limit(11), index_order=True),
+                PlanCheck(
+                    f"list {sort} {order} next page",
+                    build_page_query(dialect, sort, order, after=after).limit(11),
+                    index_order=True,
+                ),
+                PlanCheck(
+                    f"list {sort} {order} by category",
+                    build_page_query(dialect, sort, order, category=category).limit(11),
+                    index_order=True,
+                ),
+            ]
+    checks += [
+        PlanCheck(
+            "list price range",
+            build_page_query(dialect, "price", "asc", min_price=100, max_price=200).limit(11),
+            index_order=True,
+        ),
+        PlanCheck(
+            "list created_at with price range",
+            build_page_query(dialect, "created_at", "asc", min_price=100, max_price=200).limit(11),
+        ),
+        PlanCheck(
+            "list by category and price range",
+            build_page_query(dialect, "price", "asc", category, 100, 200).limit(11),
+            index_order=True,
+        ),
+        PlanCheck(
+            "list sparse fields",
+            build_page_query(dialect, "price", "asc", fields=("name", "price", "image_url", "id")).limit(11),
+            index_order=True,
+        ),
+        PlanCheck("count by category", apply_product_filters(select(func.count(Product.id)), category)),
+        PlanCheck(
+            "count price range",
+            apply_product_filters(select(func.count(Product.id)), min_price=100, max_price=200),
+        ),
+        PlanCheck("get product", select(Product).where(Product.id == 1)),
+        PlanCheck("facets price edges", edge_count_query(split_price_range(120, 180)[1])),
+        PlanCheck("facets max price seek", edge_count_query(split_price_range(100, 250)[1])),
+        PlanCheck("search", build_search_query(dialect, "wireless kett", 10)),
+        PlanCheck("search sparse fields", build_search_query(dialect, "wireless kett", 10, ("name", "id", "rank"))),
+        PlanCheck("fuzzy search", build_fuzzy_query(dialect, "wireles ketle", 10, 0.5)),
+        PlanCheck("change feed page", changes_page_query(100).limit(101), index_order=True),
+        PlanCheck("login user lookup", select(User).where(User.email == email)),
+        PlanCheck("user by id", select(User).where(User.id == 1)),
+    ]
+    return checks
+
+
+def explain(conn: Connection, query: Select) -> list[str]:
+    """Return the plan of a query as one line per step."""
+    # Expand IN lists into one placeholder per value
+    compiled = query.compile(dialect=conn.dialect, compile_kwargs={"render_postcompile": True})
+    params = compiled.construct_params()
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+    
+    if conn.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+        return [row[-1] for row in rows]
+    
+    plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", params).scalar()
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+    lines = []
+    
+    def walk(node, depth=0):
+        lines.append("  " * depth + " ".join(
+            str(node[key]) for key in ("Node Type", "Relation Name", "Index Name") if key in node
+        ))
+        for child in node.get("Plans", []):
+            walk(child, depth + 1)
+    
+    walk(plan[0]["Plan"])
+    return lines
+
+
+def plan_problems(lines: list[str], index_order: bool) -> list[str]:
+    """List the reasons a plan is rejected, if any."""
+    problems = []
+    for line in lines:
+        step = line.strip()
+        for table in CHECKED_TABLES:
+            # SQLite: "SCAN products" without "USING ... INDEX"; PostgreSQL: "Seq Scan products"
+            if step in (f"SCAN {table}", f"Seq Scan {table}"):
+                problems.append(f"full scan of {table}")
+        if index_order and (step.startswith("USE TEMP B-TREE FOR ORDER BY") or step.startswith("Sort")):
+            problems.append("sorts the matching rows instead of reading in index order")
+    return problems
+
+
+def main(args) -> int:
+    # Build the schema through the migrations, not create_all
+    command.upgrade(Config("alembic.ini"), "head")
+    seed_catalog(args.products)
+    # PostgreSQL plans from statistics that autovacuum keeps current; SQLite
+    # has none unless ANALYZE is run by hand, so check the plans it uses without
+    if engine.dialect.name != "sqlite":
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+    
+    failures = 0
+    with engine.connect() as conn:
+        checks = route_queries(conn)
+        for check in checks:
+            lines = explain(conn, check.query)
+            problems = plan_problems(lines, check.index_order)
+            failures += bool(problems)
+            print(f"{'FAIL' if problems else 'ok  '} {check.name}" + (f": {', '.join(problems)}" if problems else ""))
+            if problems or args.verbose:
+                for line in lines:
+                    print(f"       {line}")
+    
+    print(f"\n{failures} of {len(checks)} checks failed" if failures else f"\nall {len(checks)} plans use indexes")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=200_000)
+    parser.add_argument("--verbose", action="store_true", help="print every plan")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,303 @@
+"""
+Benchmark Helpers
+
+Shared catalog seeding, load generation and reporting for the scripts
+in this package. Run every script from the ecommerce-api directory:
+    
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.bench_async_db
+
+Call `configure_database()` before importing anything from `app`, since
+the application reads DATABASE_URL once at import time.
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import socket
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Iterator, Optional
+
+
+BENCH_PASSWORD = "benchmark-password"
+
+WORDS = [
+    "wireless", "leather", "organic", "vintage", "smart", "portable", "ceramic",
+    "cotton", "steel", "wooden", "bluetooth", "ergonomic", "waterproof", "classic",
+    "premium", "compact", "digital", "handmade", "modern", "outdoor",
+]
+NOUNS = [
+    "headphones", "wallet", "backpack", "lamp", "keyboard", "mug", "jacket",
+    "speaker", "watch", "chair", "notebook", "bottle", "camera", "sneakers",
+    "blender", "tent", "charger", "desk", "mirror", "kettle",
+]
+
+
+def configure_database(name: str) -> str:
+    """
+    Point the application at a fresh benchmark database.
+    
+    Uses BENCH_DATABASE_URL when set (e.g. a local PostgreSQL),
+    otherwise a throwaway SQLite file in the temp directory. The app's
+    startup builds the schema with the migrations (AUTO_MIGRATE).
+    """
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        path = os.path.join(tempfile.gettempdir(), f"ecommerce-bench-{name}.db")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        url = f"sqlite:///{path}"
+    os.environ["DATABASE_URL"] = url
+    os.environ.setdefault("AUTO_MIGRATE", "true")
+    return url
+
+
+# Derived-table triggers that fire per inserted row; seed_catalog drops
+# them for the load and the installers rebuild the tables in one pass
+SQLITE_SEED_DROPS = [
+    "DROP TRIGGER IF EXISTS products_fts_insert",
+    "DROP TRIGGER IF EXISTS products_fts_delete",
+    "DROP TRIGGER IF EXISTS products_fts_update",
+    "DROP TABLE IF EXISTS products_fts",
+    "DROP TRIGGER IF EXISTS product_trigrams_insert",
+    "DROP TRIGGER IF EXISTS product_trigrams_delete",
+    "DROP TRIGGER IF EXISTS product_trigrams_update",
+    "DROP TABLE IF EXISTS product_trigrams",
+    "DROP TRIGGER IF EXISTS product_facets_insert",
+]
+PG_SEED_DROPS = [
+    "DROP TRIGGER IF EXISTS product_facets_sync ON products",
+]
+
+
+@contextmanager
+def deferred_catalog_triggers(engine) -> Iterator[None]:
+    """
+    Drop the search index and facet count triggers for a bulk load.
+    
+    Maintaining them row by row costs more than the inserts themselves.
+    Afterwards the installers recreate them and fill the search index
+    and facet counts from the loaded products.
+    """
+    from sqlalchemy import text
+    
+    from app.utils.facets import install_facet_counts
+    from app.utils.search import install_search_index
+    
+    drops = {"sqlite": SQLITE_SEED_DROPS, "postgresql": PG_SEED_DROPS}.get(engine.dialect.name, [])
+    with engine.begin() as conn:
+        for statement in drops:
+            conn.execute(text(statement))
+    try:
+        yield
+    finally:
+        with engine.begin() as conn:
+            install_search_index(conn)
+            install_facet_counts(conn)
+
+
+def seed_catalog(
+    n_products: int,
+    n_owners: int = 100,
+    n_categories: int = 50,
+    chunk_size: int = 10_000,
+    seed: int = 42,
+) -> list[str]:
+    """
+    Bulk insert owners and products with executemany batches.
+    
+    The schema must already exist (run the app lifespan first). The
+    search index and facet counts are built once after the load rather
+    than by their triggers per row (see deferred_catalog_triggers).
+    
+    Returns:
+        Owner emails, all sharing BENCH_PASSWORD
+    """
+    from sqlalchemy import insert
+    
+    from app.database import engine
+    from app.models.product import Product
+    from app.models.user import User
+    from app.utils.security import hash_password
+    
+    rng = random.Random(seed)
+    # Spread creation times one second apart, ending now
+    first_created = datetime.now(timezone.utc).replace(microsecond=0) - timedelta(seconds=n_products)
+    hashed = hash_password(BENCH_PASSWORD)
+    emails = [f"owner{i}@bench.example.com" for i in range(n_owners)]
+    
+    with engine.begin() as conn:
+        conn.execute(
+            insert(User),
+            [{"email": email, "hashed_password": hashed, "full_name": email.split("@")[0]}
+             for email in emails]
+        )
+    
+    with deferred_catalog_triggers(engine):
+        for start in range(0, n_products, chunk_size):
+            rows = []
+            for i in range(start, min(start + chunk_size, n_products)):
+                name = f"{rng.choice(WORDS)} {rng.choice(NOUNS)} {i}"
+                rows.append({
+                    "name": name,
+                    "description": " ".join(rng.choices(WORDS + NOUNS, k=30)),
+                    "price": round(rng.uniform(1, 1000), 2),
+                    "category": f"category-{rng.randrange(n_categories)}",
+                    "stock_quantity": rng.randrange(0, 500),
+                    "image_url": f"https://cdn.example.com/products/{i}.jpg",
+                    "is_active": rng.random() < 0.95,
+                    "owner_id": rng.randrange(n_owners) + 1,
+                    "created_at": first_created + timedelta(seconds=i),
+                })
+            with engine.begin() as conn:
+                conn.execute(insert(Product), rows)
+    
+    return emails
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies: dict[str, list[float]], errors: dict[str, int], elapsed: float) -> dict:
+    """Build a JSON-friendly report of throughput and per-route latency (ms)."""
+    total = sum(len(samples) for samples in latencies.values())
+    routes = {}
+    for label, samples in sorted(latencies.items()):
+        routes[label] = {
+            "count": len(samples),
+            "errors": errors.get(label, 0),
+            "p50_ms": round(percentile(samples, 50) * 1000, 3),
+            "p95_ms": round(percentile(samples, 95) * 1000, 3),
+            "p99_ms": round(percentile(samples, 99) * 1000, 3),
+            "max_ms": round(max(samples, default=0) * 1000, 3),
+        }
+    return {
+        "requests": total,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 1) if elapsed else 0.0,
+        "routes": routes,
+    }
+
+
+async def run_load(
+    client,
+    make_request: Callable[[object, int], Awaitable[tuple[str, object]]],
+    concurrency: int,
+    total_requests: int,
+) -> dict:
+    """
+    Drive `total_requests` requests through `concurrency` concurrent workers.
+    
+    Args:
+        client: httpx.AsyncClient shared by all workers
+        make_request: Coroutine taking (client, request_number) and returning
+            (route_label, response)
+        concurrency: Number of concurrent clients
+        total_requests: Requests to send in total
+    
+    Returns:
+        Report produced by summarize()
+    """
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+    counter = iter(range(total_requests))
+    
+    async def worker():
+        for number in counter:
+            started = time.perf_counter()
+            label, response = await make_request(client, number)
+            latencies[label].append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors[label] += 1
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+def asgi_client(app, headers: Optional[dict] = None):
+    """Create an httpx client that calls the ASGI app in-process."""
+    import httpx
+    
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://benchmark",
+        headers=headers,
+        timeout=None,
+    )
+
+
+def http_client(base_url: str, concurrency: int, headers: Optional[dict] = None):
+    """Create an httpx client for a real server, with one connection per client."""
+    import httpx
+    
+    return httpx.AsyncClient(
+        base_url=base_url,
+        headers=headers,
+        timeout=None,
+        limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+    )
+
+
+@contextmanager
+def serve_in_subprocess(app, host: str = "127.0.0.1", port: int = 8765) -> Iterator[str]:
+    """
+    Serve the app with uvicorn in a forked process and yield its base URL.
+    
+    Load generated in-process shares the event loop with the app, so a
+    handler that blocks the loop also stops the clients from sending:
+    the stall never shows up in measured latency. Running the server in
+    its own process makes loop stalls visible.
+    
+    Dispose of any open engine pools before entering, since pooled
+    connections must not be shared across the fork.
+    """
+    import uvicorn
+    
+    process = multiprocessing.get_context("fork").Process(
+        target=uvicorn.run,
+        args=(app,),
+        kwargs={"host": host, "port": port, "log_level": "warning", "timeout_keep_alive": 300},
+        # Not a daemon: the app starts its own worker processes
+        daemon=False,
+    )
+    process.start()
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                socket.create_connection((host, port), timeout=0.5).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline or not process.is_alive():
+                    raise RuntimeError("benchmark server did not start")
+                time.sleep(0.1)
+        yield f"http://{host}:{port}"
+    finally:
+        process.terminate()
+        process.join()
+
+
+async def login(client, email: str, password: str = BENCH_PASSWORD) -> dict:
+    """Log in through the API and return an Authorization header."""
+    response = await client.post("/auth/login", data={"username": email, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def print_report(report: dict) -> None:
+    """Print a report as indented JSON so runs can be diffed across commits."""
+    print(json.dumps(report, indent=2, sort_keys=True))
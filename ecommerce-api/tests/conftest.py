@@ -0,0 +1,92 @@
+"""
+Test Fixtures
+
+The suite runs the application in-process against a throwaway SQLite
+database, created by the migrations at startup (AUTO_MIGRATE). Set
+TEST_DATABASE_URL to run it against another database, e.g. a local
+PostgreSQL; its schema is upgraded to head and products are added to
+whatever is already there.
+
+The environment is set before anything from `app` is imported, since
+the application reads its settings once at import time.
+"""
+
+import os
+import tempfile
+import uuid
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL") or (
+    f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='ecommerce-tests-'), 'test.db')}"
+)
+os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+os.environ["AUTO_MIGRATE"] = "true"
+# Cheap hashes; the cost is not what these tests check
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["PASSWORD_HASH_WORKERS"] = "1"
+os.environ["SUGGEST_ENABLED"] = "false"
+# Tests refresh the displayed stock of sharded products themselves
+os.environ["STOCK_REFRESH_SECONDS"] = "0"
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import update  # noqa: E402
+
+from app.database import engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+
+TEST_PASSWORD = "test-password"
+
+
+@pytest.fixture(scope="session")
+def client():
+    """Client of the running application, shared by the whole session."""
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def make_user(client):
+    """Register a new user and return Authorization headers for it."""
+    def make_user(is_admin: bool = False) -> dict:
+        email = f"user-{uuid.uuid4().hex[:12]}@tests.example.com"
+        response = client.post("/auth/register", json={"email": email, "password": TEST_PASSWORD})
+        assert response.status_code == 201, response.text
+        if is_admin:
+            # Admin rights are carried by the token, so grant them before logging in
+            with engine.begin() as conn:
+                conn.execute(update(User).where(User.email == email).values(is_admin=True))
+        response = client.post("/auth/login", data={"username": email, "password": TEST_PASSWORD})
+        assert response.status_code == 200, response.text
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+    return make_user
+
+
+@pytest.fixture
+def owner(make_user) -> dict:
+    """Authorization headers of a fresh user."""
+    return make_user()
+
+
+@pytest.fixture
+def admin(make_user) -> dict:
+    """Authorization headers of a fresh admin user."""
+    return make_user(is_admin=True)
+
+
+@pytest.fixture
+def category() -> str:
+    """A category no other test uses, so list and facet results are this test's own."""
+    return f"test-{uuid.uuid4().hex[:12]}"
+
+
+@pytest.fixture
+def make_product(client, owner):
+    """Create a product owned by `owner` and return its JSON."""
+    def make_product(headers: dict = None, **fields) -> dict:
+        data = {"name": "Test product", "price": 10.0, "stock_quantity": 5, **fields}
+        response = client.post("/products/", json=data, headers=headers or owner)
+        assert response.status_code == 201, response.text
+        return response.json()
+    return make_product
@@ -0,0 +1,63 @@
+"""GET and POST /products/batch: request order, missing ids and the size limit."""
+
+import pytest
+
+from app.config import settings
+
+
+def fetch_batch(client, method: str, ids: list[int]):
+    if method == "GET":
+        return client.get("/products/batch", params={"ids": ",".join(map(str, ids))})
+    return client.post("/products/batch", json={"ids": ids})
+
+
+@pytest.fixture
+def missing_id(make_product) -> int:
+    """An id no product has."""
+    return make_product()["id"] + 1000
+
+
+@pytest.mark.parametrize("method", ["GET", "POST"])
+def test_found_missing_and_inactive_ids(client, make_product, owner, missing_id, method):
+    active, inactive = make_product(name="Active"), make_product(name="Inactive")
+    assert client.delete(f"/products/{inactive['id']}", headers=owner).status_code == 204
+    ids = [inactive["id"], missing_id, active["id"]]
+    
+    # The second request is answered from the product cache
+    for _ in range(2):
+        response = fetch_batch(client, method, ids)
+        assert response.status_code == 200, response.text
+        batch = response.json()
+        assert [(item["id"], item["is_active"]) for item in batch["items"]] == [
+            (inactive["id"], False), (active["id"], True)
+        ]
+        assert batch["items"][1] == client.get(f"/products/{active['id']}").json()
+        assert batch["missing"] == [missing_id]
+
+
+@pytest.mark.parametrize("method", ["GET", "POST"])
+def test_duplicate_ids_are_returned_once(client, make_product, missing_id, method):
+    first, second = make_product(), make_product()
+    
+    batch = fetch_batch(client, method, [second["id"], first["id"], second["id"], missing_id, missing_id]).json()
+    
+    assert [item["id"] for item in batch["items"]] == [second["id"], first["id"]]
+    assert batch["missing"] == [missing_id]
+
+
+@pytest.mark.parametrize("method", ["GET", "POST"])
+def test_batch_size_limit(client, make_product, monkeypatch, method):
+    monkeypatch.setattr(settings, "PRODUCT_BATCH_MAX_IDS", 3)
+    ids = [make_product()["id"] for _ in range(4)]
+    
+    # Duplicates do not count towards the limit
+    assert fetch_batch(client, method, ids[:3] + ids[:3]).status_code == 200
+    response = fetch_batch(client, method, ids)
+    assert response.status_code == 400
+    assert "At most 3" in response.json()["detail"]
+
+
+def test_malformed_ids_are_rejected(client):
+    assert client.get("/products/batch", params={"ids": "1,two"}).status_code == 400
+    assert client.get("/products/batch", params={"ids": ","}).status_code == 400
+    assert client.post("/products/batch", json={"ids": []}).status_code == 422
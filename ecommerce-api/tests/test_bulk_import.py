@@ -0,0 +1,108 @@
+"""POST /products/bulk: parsing, partial failures and the change log."""
+
+import json
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.config import settings
+from app.utils import bulk
+
+
+def upload_ndjson(client, headers: dict, *records) -> dict:
+    body = "\n".join(record if isinstance(record, str) else json.dumps(record) for record in records)
+    response = client.post("/products/bulk", content=body, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def imported(client, category: str) -> list[dict]:
+    """Products of the category, in the order they were created."""
+    response = client.get("/products/", params={"category": category, "limit": 100})
+    return response.json()["items"]
+
+
+def test_csv_quoted_fields_may_span_lines(client, owner, category):
+    body = (
+        "name,price,category,description\r\n"
+        f'"Lamp, brass",12.5,{category},"Two lines:\r\nsaid ""bright"""\r\n'
+        f"Plain,3,{category},\r\n"
+        f"Broken,-1,{category},\r\n"
+    )
+    response = client.post("/products/bulk", content=body, headers={**owner, "Content-Type": "text/csv"})
+    
+    # Records are numbered by the line they start on
+    assert response.json()["inserted"] == 2
+    assert [error["line"] for error in response.json()["errors"]] == [5]
+    assert [(product["name"], product["description"]) for product in imported(client, category)] == [
+        ("Lamp, brass", 'Two lines:\nsaid "bright"'),
+        ("Plain", None),
+    ]
+
+
+def test_ndjson_strings_keep_escaped_newlines(client, owner, category):
+    record = {"name": "Poster", "price": 8.0, "category": category, "description": "Top\nBottom"}
+    
+    assert upload_ndjson(client, owner, record)["inserted"] == 1
+    assert imported(client, category)[0]["description"] == "Top\nBottom"
+
+
+def test_bad_rows_in_a_batch_are_skipped(client, owner, category, monkeypatch):
+    monkeypatch.setattr(settings, "BULK_IMPORT_BATCH_SIZE", 3)
+    
+    report = upload_ndjson(
+        client, owner,
+        {"name": "One", "price": 1.0, "category": category},
+        {"name": "Two", "price": 2.0, "category": category},
+        {"name": "Negative", "price": -3.0, "category": category},
+        "{not json",
+        {"name": "Three", "price": 3.0, "category": category},
+        {"name": "Four", "price": 4.0, "category": category},
+    )
+    
+    assert (report["inserted"], report["failed"]) == (4, 2)
+    assert [error["line"] for error in report["errors"]] == [3, 4]
+    assert report["errors"][0]["error"].startswith("price:")
+    assert [product["name"] for product in imported(client, category)] == ["One", "Two", "Three", "Four"]
+
+
+def test_rejected_batch_is_rolled_back_alone(client, owner, category, monkeypatch):
+    monkeypatch.setattr(settings, "BULK_IMPORT_BATCH_SIZE", 2)
+    record_changes = bulk.record_changes
+    batches = []
+    
+    async def fail_second_batch(db, product_ids, **kwargs):
+        """Let the second batch's INSERT run, then fail its transaction."""
+        await record_changes(db, product_ids, **kwargs)
+        batches.append(product_ids)
+        if len(batches) == 2:
+            raise OperationalError("INSERT INTO product_changes", {}, Exception("disk I/O error"))
+    
+    monkeypatch.setattr(bulk, "record_changes", fail_second_batch)
+    report = upload_ndjson(
+        client, owner,
+        *({"name": f"Row {line}", "price": 1.0, "category": category} for line in range(1, 6))
+    )
+    
+    assert (report["inserted"], report["failed"]) == (3, 2)
+    assert [error["line"] for error in report["errors"]] == [3, 4]
+    assert "disk I/O error" in report["errors"][0]["error"]
+    assert [product["name"] for product in imported(client, category)] == ["Row 1", "Row 2", "Row 5"]
+
+
+@pytest.mark.parametrize("format", ["ndjson", "csv"])
+def test_every_imported_product_is_in_the_change_log(client, owner, category, format):
+    cursor = client.get("/products/changes").json()["next_cursor"]
+    names = ["First", "Second", "Third"]
+    if format == "csv":
+        body = "name,price,category\n" + "".join(f"{name},5,{category}\n" for name in names)
+    else:
+        body = "\n".join(json.dumps({"name": name, "price": 5.0, "category": category}) for name in names)
+    
+    response = client.post("/products/bulk", params={"format": format}, content=body, headers=owner)
+    assert response.json()["inserted"] == 3
+    
+    page = client.get("/products/changes", params={"since": cursor, "limit": 100}).json()
+    assert [(entry["product_id"], entry["product"]["name"]) for entry in page["items"]] == [
+        (product["id"], product["name"]) for product in imported(client, category)
+    ]
@@ -0,0 +1,57 @@
+"""GET /products/changes: what a syncing client sees after its cursor."""
+
+
+def read_feed(client, cursor: str, limit: int = 100) -> tuple[list[dict], str]:
+    """Read the feed to its end: the entries and the final cursor."""
+    entries = []
+    while True:
+        response = client.get("/products/changes", params={"since": cursor, "limit": limit})
+        assert response.status_code == 200, response.text
+        page = response.json()
+        entries += page["items"]
+        cursor = page["next_cursor"]
+        if not page["has_more"]:
+            return entries, cursor
+
+
+def test_feed_reports_writes_after_the_cursor(client, make_product, owner):
+    before = make_product()
+    cursor = client.get("/products/changes").json()["next_cursor"]
+    
+    created = make_product(name="Fresh product")
+    client.put(f"/products/{before['id']}", json={"price": 42.0}, headers=owner)
+    
+    entries, cursor = read_feed(client, cursor)
+    
+    assert [entry["product_id"] for entry in entries] == [created["id"], before["id"]]
+    assert entries[0]["product"]["name"] == "Fresh product"
+    assert entries[1]["product"]["price"] == 42.0
+    assert read_feed(client, cursor)[0] == []
+
+
+def test_deleted_product_reads_as_a_tombstone(client, make_product, owner):
+    product = make_product()
+    cursor = client.get("/products/changes").json()["next_cursor"]
+    
+    client.put(f"/products/{product['id']}", json={"price": 42.0}, headers=owner)
+    client.delete(f"/products/{product['id']}", headers=owner)
+    
+    entries, _ = read_feed(client, cursor)
+    
+    # Both writes fall in one page, so the product is reported once, deleted
+    assert [(entry["product_id"], entry["deleted"], entry["product"]) for entry in entries] == [
+        (product["id"], True, None)
+    ]
+
+
+def test_feed_pages_follow_has_more(client, make_product):
+    cursor = client.get("/products/changes").json()["next_cursor"]
+    created = [make_product() for _ in range(5)]
+    
+    entries, _ = read_feed(client, cursor, limit=2)
+    
+    assert [entry["product_id"] for entry in entries] == [product["id"] for product in created]
+
+
+def test_invalid_cursor_is_rejected(client):
+    assert client.get("/products/changes", params={"since": "not-a-cursor"}).status_code == 400
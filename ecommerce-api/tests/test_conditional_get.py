@@ -0,0 +1,95 @@
+"""ETags and 304 Not Modified: a revalidation must not load or serialize products."""
+
+from collections import Counter
+
+import pytest
+from pydantic import BaseModel
+from sqlalchemy import event
+
+from app.models.product import Product
+from app.utils.cache import product_cache
+
+
+@pytest.fixture
+def work(monkeypatch):
+    """Count ORM product loads and Pydantic validations and serializations."""
+    counts = Counter()
+    
+    def count_load(target, context):
+        counts["orm_loads"] += 1
+    
+    def counting(method, label):
+        def wrapper(*args, **kwargs):
+            counts[label] += 1
+            return method(*args, **kwargs)
+        return wrapper
+    
+    event.listen(Product, "load", count_load)
+    monkeypatch.setattr(
+        BaseModel, "model_validate", classmethod(counting(BaseModel.model_validate.__func__, "validations"))
+    )
+    monkeypatch.setattr(BaseModel, "model_dump_json", counting(BaseModel.model_dump_json, "serializations"))
+    yield counts
+    event.remove(Product, "load", count_load)
+
+
+def test_product_revalidation_does_no_work(client, make_product, work):
+    product = make_product()
+    path = f"/products/{product['id']}"
+    etag = client.get(path).headers["etag"]
+    
+    # Without a cache entry the 200 path would load and serialize the product
+    client.portal.call(product_cache.invalidate_product, product["id"])
+    work.clear()
+    response = client.get(path, headers={"If-None-Match": etag})
+    
+    assert response.status_code == 304 and response.content == b""
+    assert response.headers["etag"] == etag
+    assert not work, dict(work)
+
+
+def test_list_revalidation_does_no_work(client, make_product, category, work):
+    make_product(category=category)
+    params = {"category": category, "limit": 100}
+    etag = client.get("/products/", params=params).headers["etag"]
+    
+    work.clear()
+    response = client.get("/products/", params=params, headers={"If-None-Match": etag})
+    
+    assert response.status_code == 304
+    assert not work, dict(work)
+
+
+def test_write_changes_the_etag(client, make_product, owner, category):
+    product = make_product(category=category)
+    product_etag = client.get(f"/products/{product['id']}").headers["etag"]
+    list_etag = client.get("/products/", params={"category": category}).headers["etag"]
+    
+    client.put(f"/products/{product['id']}", json={"price": 99.0}, headers=owner)
+    
+    response = client.get(f"/products/{product['id']}", headers={"If-None-Match": product_etag})
+    assert response.status_code == 200 and response.json()["price"] == 99.0
+    response = client.get("/products/", params={"category": category}, headers={"If-None-Match": list_etag})
+    assert response.status_code == 200
+
+
+
+@pytest.mark.parametrize("path, params", [
+    ("/products/", {"category": None}),
+    ("/products/search", {"q": "enamel"}),
+    ("/products/facets", {"category": None}),
+    ("/products/categories/list", {}),
+])
+def test_list_etags_without_a_cache_backend(client, make_product, owner, category, monkeypatch, path, params):
+    monkeypatch.setattr(product_cache, "backend", None)
+    product = make_product(name="Enamel teapot", category=category)
+    params = {name: value or category for name, value in params.items()}
+    
+    etag = client.get(path, params=params).headers["etag"]
+    response = client.get(path, params=params, headers={"If-None-Match": etag})
+    assert response.status_code == 304 and response.headers["etag"] == etag
+    
+    update = {"name": "Enamel teapot XL", "category": f"{category}-renamed"}
+    client.put(f"/products/{product['id']}", json=update, headers=owner)
+    response = client.get(path, params=params, headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["etag"] != etag
@@ -0,0 +1,72 @@
+"""GET /products/export in every format."""
+
+import csv
+import io
+import json
+
+import pytest
+
+from app.schemas.product import ProductResponse
+
+
+@pytest.fixture
+def exported(client, make_product, owner, category) -> list[dict]:
+    """Products of a fresh category, one of them with sharded stock, as the API returns them."""
+    products = [make_product(category=category, name=f"Export {i}", stock_quantity=8) for i in range(3)]
+    response = client.put(f"/products/{products[1]['id']}/stock-shards", json={"shards": 4}, headers=owner)
+    assert response.status_code == 200
+    return [client.get(f"/products/{product['id']}").json() for product in products]
+
+
+def export(client, format: str, category: str):
+    response = client.get("/products/export", params={"format": format, "category": category})
+    assert response.status_code == 200, response.text
+    return response
+
+
+def test_ndjson(client, exported, category):
+    lines = export(client, "ndjson", category).text.splitlines()
+    
+    rows = [json.loads(line) for line in lines]
+    assert all(set(row) == set(ProductResponse.model_fields) for row in rows)
+    assert [(row["id"], row["name"], row["stock_quantity"]) for row in rows] == [
+        (product["id"], product["name"], product["stock_quantity"]) for product in exported
+    ]
+
+
+def test_csv(client, exported, category):
+    rows = list(csv.DictReader(io.StringIO(export(client, "csv", category).text)))
+    
+    assert all(set(row) == set(ProductResponse.model_fields) for row in rows)
+    assert [(int(row["id"]), row["name"]) for row in rows] == [
+        (product["id"], product["name"]) for product in exported
+    ]
+
+
+def test_parquet(client, exported, category):
+    parquet = pytest.importorskip("pyarrow.parquet")
+    
+    table = parquet.read_table(io.BytesIO(export(client, "parquet", category).content))
+    
+    assert set(table.column_names) == set(ProductResponse.model_fields)
+    assert table.column("id").to_pylist() == [product["id"] for product in exported]
+    assert table.column("stock_quantity").to_pylist() == [product["stock_quantity"] for product in exported]
+
+
+def test_deactivated_products_are_only_exported_to_their_owner_or_an_admin(
+    client, make_product, owner, admin, make_user, category
+):
+    products = [make_product(category=category), make_product(category=category, headers=make_user())]
+    for product in products:
+        assert client.delete(f"/products/{product['id']}", headers=admin).status_code == 204
+    params = {"category": category, "is_active": "false"}
+    
+    assert client.get("/products/export", params=params).status_code == 401
+    
+    def exported_ids(headers):
+        response = client.get("/products/export", params=params, headers=headers)
+        assert response.status_code == 200, response.text
+        return [json.loads(line)["id"] for line in response.text.splitlines()]
+    
+    assert exported_ids(owner) == [products[0]["id"]]
+    assert exported_ids(admin) == [product["id"] for product in products]
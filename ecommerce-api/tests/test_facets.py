@@ -0,0 +1,78 @@
+"""GET /products/facets agrees with counting the products table after every kind of write."""
+
+import json
+from bisect import bisect_right
+
+import pytest
+from sqlalchemy import text
+
+from app.database import engine
+from app.utils.cache import product_cache
+from app.utils.facets import PRICE_BUCKETS
+
+
+@pytest.fixture(autouse=True)
+def uncached(monkeypatch):
+    """Answer every facets request from the database."""
+    monkeypatch.setattr(product_cache, "backend", None)
+
+
+def counted(category: str) -> dict:
+    """The facets of the whole catalog and of `category`, from a GROUP BY over products."""
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT category, price, count(*) FROM products WHERE is_active GROUP BY category, price"
+        )).all()
+    
+    categories: dict = {}
+    buckets = dict.fromkeys(PRICE_BUCKETS, 0)
+    for name, price, count in rows:
+        categories[name] = categories.get(name, 0) + count
+        if name == category:
+            buckets[PRICE_BUCKETS[bisect_right(PRICE_BUCKETS, price) - 1]] += count
+    return {
+        "total": sum(categories.values()),
+        "categories": categories,
+        "buckets": buckets,
+        "category_total": categories.get(category, 0),
+    }
+
+
+def served(client, category: str) -> dict:
+    """The same numbers as GET /products/facets reports them."""
+    catalog = client.get("/products/facets").json()
+    filtered = client.get("/products/facets", params={"category": category}).json()
+    return {
+        "total": catalog["total"],
+        "categories": {facet["category"]: facet["count"] for facet in catalog["categories"]},
+        "buckets": {bucket["min_price"]: bucket["count"] for bucket in filtered["price_buckets"]},
+        "category_total": filtered["total"],
+    }
+
+
+def test_facets_match_the_products_after_every_write(client, make_product, owner, category):
+    def check():
+        assert served(client, category) == counted(category)
+    
+    products = [make_product(category=category, price=price) for price in (5.0, 12.0, 12.5, 300.0)]
+    make_product(price=60.0)
+    check()
+    
+    response = client.put(f"/products/{products[0]['id']}", json={"price": 99.99}, headers=owner)
+    assert response.status_code == 200
+    check()
+    
+    response = client.put(f"/products/{products[1]['id']}", json={"category": None}, headers=owner)
+    assert response.status_code == 200
+    check()
+    
+    assert client.delete(f"/products/{products[2]['id']}", headers=owner).status_code == 204
+    check()
+    
+    upload = "\n".join(
+        json.dumps({"name": f"Imported {price}", "price": price, "stock_quantity": 1, "category": category})
+        for price in (0.5, 10.0, 2500.0, 7000.0)
+    )
+    response = client.post("/products/bulk", content=upload, headers=owner)
+    assert response.json()["inserted"] == 4
+    check()
@@ -0,0 +1,55 @@
+"""GET /products/search?fuzzy=true: typo tolerance and a trigram index that follows writes."""
+
+import pytest
+from sqlalchemy import text
+
+from app.database import engine
+from app.utils.cache import product_cache
+from app.utils.search import name_trigrams
+
+
+@pytest.fixture(autouse=True)
+def uncached(monkeypatch):
+    """Answer every search from the database."""
+    monkeypatch.setattr(product_cache, "backend", None)
+
+
+def fuzzy_ids(client, q: str) -> list[int]:
+    response = client.get("/products/search", params={"q": q, "fuzzy": "true", "limit": 50})
+    assert response.status_code == 200, response.text
+    return [result["id"] for result in response.json()]
+
+
+def indexed_trigrams(product_id: int) -> set[str]:
+    """Trigrams the index holds for a product (SQLite's product_trigrams table)."""
+    with engine.connect() as conn:
+        return set(conn.execute(
+            text("SELECT trigram FROM product_trigrams WHERE product_id = :id"), {"id": product_id}
+        ).scalars())
+
+
+@pytest.mark.parametrize("typo", ["Quillwort", "Quilwort", "Quilwart", "Quillwortt"])
+def test_one_letter_typo_finds_the_product(client, make_product, typo):
+    product = make_product(name="Quillwort lantern")
+    
+    assert product["id"] in fuzzy_ids(client, typo)
+
+
+def test_renamed_product_is_found_by_its_new_name_only(client, make_product, owner):
+    product = make_product(name="Brambleford teapot")
+    response = client.put(f"/products/{product['id']}", json={"name": "Thistlewick teapot"}, headers=owner)
+    assert response.status_code == 200
+    
+    assert product["id"] not in fuzzy_ids(client, "Bramblefrod")
+    assert product["id"] in fuzzy_ids(client, "Thistlewik")
+    if engine.dialect.name == "sqlite":
+        assert indexed_trigrams(product["id"]) == name_trigrams("Thistlewick teapot")
+
+
+def test_deleted_product_is_not_found(client, make_product, owner):
+    product = make_product(name="Marrowgate kettle")
+    assert client.delete(f"/products/{product['id']}", headers=owner).status_code == 204
+    
+    assert product["id"] not in fuzzy_ids(client, "Marrowgate kettle")
+    if engine.dialect.name == "sqlite":
+        assert indexed_trigrams(product["id"]) == set()
@@ -0,0 +1,124 @@
+"""Migrations applied step by step to databases of their own."""
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import (
+    Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, MetaData, String, Table, Text,
+    create_engine, func, inspect, text
+)
+
+from app.utils.migrations import MIGRATIONS_DIR
+from app.utils.search import install_search_index
+
+
+@pytest.fixture
+def migrate(tmp_path):
+    """Run an Alembic command ("upgrade", "stamp", ...) on a fresh SQLite file."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS_DIR))
+    
+    def migrate(name: str, revision: str) -> None:
+        with engine.begin() as conn:
+            config.attributes["connection"] = conn
+            getattr(command, name)(config, revision)
+    
+    migrate.engine = engine
+    migrate.config = config
+    yield migrate
+    engine.dispose()
+
+
+def test_existing_users_get_a_token_version(migrate):
+    migrate("upgrade", "0001_initial_schema")
+    with migrate.engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (email, hashed_password) VALUES ('old@example.com', 'x')"))
+    
+    migrate("upgrade", "0001a_users_token_version")
+    with migrate.engine.connect() as conn:
+        assert conn.execute(text("SELECT token_version FROM users")).scalar_one() == 0
+    
+    migrate("downgrade", "0001_initial_schema")
+    assert "token_version" not in {column["name"] for column in inspect(migrate.engine).get_columns("users")}
+
+
+def baseline_metadata(later_additions: bool) -> MetaData:
+    """
+    The tables as the application's create_all() made them before it had
+    migrations; with later_additions, as the last such release made them.
+    """
+    metadata = MetaData()
+    users = Table(
+        "users", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("email", String(255), unique=True, index=True, nullable=False),
+        Column("hashed_password", String(255), nullable=False),
+        Column("full_name", String(255), nullable=True),
+        Column("is_active", Boolean, default=True),
+        Column("is_admin", Boolean, default=False),
+        Column("created_at", DateTime(timezone=True), server_default=func.now()),
+        Column("updated_at", DateTime(timezone=True)),
+    )
+    products = Table(
+        "products", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("name", String(255), nullable=False, index=True),
+        Column("description", Text, nullable=True),
+        Column("price", Float, nullable=False),
+        Column("category", String(100), nullable=True, index=True),
+        Column("stock_quantity", Integer, default=0),
+        Column("image_url", String(500), nullable=True),
+        Column("is_active", Boolean, default=True),
+        Column("owner_id", Integer, ForeignKey("users.id"), nullable=False),
+        Column("created_at", DateTime(timezone=True), server_default=func.now()),
+        Column("updated_at", DateTime(timezone=True)),
+    )
+    if later_additions:
+        users.append_column(Column("token_version", Integer, nullable=False, default=0, server_default="0"))
+        Index("ix_products_created_at_id", products.c.created_at, products.c.id)
+        Index("ix_products_price_id", products.c.price, products.c.id)
+    return metadata
+
+
+def schema(engine) -> dict:
+    """Tables with their columns and indexes, and the triggers."""
+    inspector = inspect(engine)
+    tables = {
+        name: (
+            sorted(column["name"] for column in inspector.get_columns(name)),
+            sorted(index["name"] for index in inspector.get_indexes(name)),
+        )
+        for name in inspector.get_table_names()
+    }
+    with engine.connect() as conn:
+        triggers = conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger' ORDER BY name"))
+        return {"tables": tables, "triggers": list(triggers.scalars())}
+
+
+@pytest.mark.parametrize("later_additions", [False, True])
+def test_stamped_pre_migration_database_upgrades_to_head(migrate, tmp_path, later_additions):
+    baseline_metadata(later_additions).create_all(migrate.engine)
+    with migrate.engine.begin() as conn:
+        if later_additions:
+            install_search_index(conn)
+        conn.execute(text("INSERT INTO users (id, email, hashed_password) VALUES (1, 'old@example.com', 'x')"))
+        conn.execute(text(
+            "INSERT INTO products (name, price, owner_id, is_active) VALUES ('Copper kettle', 30.0, 1, 1)"
+        ))
+    
+    migrate("stamp", "0001_initial_schema")
+    migrate("upgrade", "head")
+    
+    with migrate.engine.connect() as conn:
+        assert conn.execute(text("SELECT token_version FROM users")).scalar_one() == 0
+        assert conn.execute(text("SELECT rowid FROM products_fts WHERE products_fts MATCH 'kettle'")).all()
+        assert conn.execute(text("SELECT count(*) FROM product_trigrams")).scalar_one() > 0
+        assert conn.execute(text("SELECT sum(product_count) FROM product_facets")).scalar_one() == 1
+    
+    fresh = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    with fresh.begin() as conn:
+        migrate.config.attributes["connection"] = conn
+        command.upgrade(migrate.config, "head")
+    assert schema(migrate.engine) == schema(fresh)
+    fresh.dispose()
@@ -0,0 +1,53 @@
+"""Keyset pagination of GET /products/."""
+
+import pytest
+
+
+def walk(client, params: dict) -> list[dict]:
+    """Follow next_cursor from the first page to the last."""
+    items, params = [], dict(params)
+    while True:
+        response = client.get("/products/", params=params)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        items += page["items"]
+        if not page["next_cursor"]:
+            return items
+        params["cursor"] = page["next_cursor"]
+
+
+@pytest.mark.parametrize("sort", ["created_at", "price"])
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_cursor_walks_every_product_once_in_order(client, make_product, category, sort, order):
+    # Repeated prices make the id tiebreak part of the cursor
+    created = [make_product(category=category, price=float(10 + i % 3)) for i in range(8)]
+    
+    items = walk(client, {"category": category, "limit": 3, "sort": sort, "order": order})
+    
+    keys = [(item[sort], item["id"]) for item in items]
+    assert keys == sorted(keys, reverse=order == "desc")
+    assert sorted(item["id"] for item in items) == sorted(product["id"] for product in created)
+
+
+def test_cursor_pages_exclude_deleted_products(client, make_product, owner, category):
+    products = [make_product(category=category) for _ in range(5)]
+    assert client.delete(f"/products/{products[2]['id']}", headers=owner).status_code == 204
+    
+    items = walk(client, {"category": category, "limit": 2})
+    
+    assert [item["id"] for item in items] == [p["id"] for p in products if p is not products[2]]
+
+
+def test_total_counts_the_filtered_products(client, make_product, category):
+    for _ in range(4):
+        make_product(category=category)
+    
+    page = client.get("/products/", params={"category": category, "limit": 3}).json()
+    
+    assert (page["total"], page["pages"], len(page["items"])) == (4, 2, 3)
+
+
+def test_invalid_cursor_is_rejected(client):
+    response = client.get("/products/", params={"cursor": "not-a-cursor"})
+    
+    assert response.status_code == 400
@@ -0,0 +1,78 @@
+"""The password hashing pool recovers from a dead worker."""
+
+import asyncio
+import os
+import signal
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+from fastapi import HTTPException
+
+from app.utils.passwords import PasswordHasher
+
+
+class StubExecutor:
+    """Executor whose jobs finish when the test says so."""
+    
+    def __init__(self):
+        self.futures: list[Future] = []
+        self.shut_down = False
+    
+    def submit(self, function, *args) -> Future:
+        self.futures.append(Future())
+        return self.futures[-1]
+    
+    def shutdown(self, wait: bool = True, **kwargs) -> None:
+        self.shut_down = True
+
+
+def test_dead_worker_replaces_the_pool():
+    hasher = PasswordHasher(rounds=4, workers=1)
+    
+    async def scenario():
+        await hasher.hash("first")
+        broken = hasher._executor
+        for process in list(broken._processes.values()):
+            os.kill(process.pid, signal.SIGKILL)
+        
+        with pytest.raises(HTTPException) as refused:
+            for _ in range(50):
+                # The pool notices the dead worker shortly after it died
+                await hasher.hash("during")
+                await asyncio.sleep(0.05)
+        assert refused.value.status_code == 503
+        assert hasher._executor is None
+        
+        assert await hasher.verify_and_update("after", await hasher.hash("after")) == (True, None)
+        assert hasher._executor is not broken
+    
+    try:
+        asyncio.run(scenario())
+    finally:
+        hasher.shutdown()
+
+
+def test_late_failure_keeps_the_replacement_pool():
+    hasher = PasswordHasher(rounds=4, workers=1)
+    broken, replacement = StubExecutor(), StubExecutor()
+    
+    async def scenario():
+        hasher._executor = broken
+        first, second = (asyncio.create_task(hasher.hash(password)) for password in ("a", "b"))
+        await asyncio.sleep(0)
+        
+        broken.futures[0].set_exception(BrokenProcessPool())
+        with pytest.raises(HTTPException):
+            await first
+        assert hasher._executor is None and broken.shut_down
+        
+        # A new request started a new pool before the second job failed
+        hasher._executor = replacement
+        broken.futures[1].set_exception(BrokenProcessPool())
+        with pytest.raises(HTTPException):
+            await second
+        assert hasher._executor is replacement and not replacement.shut_down
+        assert hasher.pending == 0
+    
+    asyncio.run(scenario())
@@ -0,0 +1,60 @@
+"""Product cache entries never outlive a write that raced their load."""
+
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import update
+
+from app.database import async_engine
+from app.models.product import Product
+from app.utils.cache import MemoryCache, ProductCache, RedisCache, product_cache
+
+
+def memory_backend():
+    return MemoryCache()
+
+
+def redis_backend():
+    fakeredis = pytest.importorskip("fakeredis")
+    return RedisCache(fakeredis.aioredis.FakeRedis(decode_responses=True))
+
+
+@pytest.mark.parametrize("backend", [memory_backend, redis_backend])
+def test_entries_loaded_before_a_write_are_not_stored(backend):
+    cache = ProductCache(backend(), ttl=60)
+    key = cache.product_key(1)
+    
+    async def scenario():
+        generation = await cache.generation()
+        await cache.invalidate_product(1)
+        await cache.set_products({key: "stale"}, generation)
+        stale = await cache.backend.get(key)
+        
+        await cache.set_products({key: "fresh"}, await cache.generation())
+        return stale, await cache.backend.get(key)
+    
+    assert asyncio.run(scenario()) == (None, "fresh")
+
+
+def test_product_load_racing_a_write_is_not_cached(client, make_product, monkeypatch):
+    product = make_product(name="Before")
+    path = f"/products/{product['id']}"
+    client.portal.call(product_cache.invalidate_product, product["id"])
+    set_products = product_cache.set_products
+    
+    async def write_then_set(entries, generation):
+        """A write that commits and invalidates after the product was read."""
+        async with async_engine.begin() as conn:
+            await conn.execute(
+                update(Product).where(Product.id == product["id"])
+                .values(name="After", updated_at=datetime.now(timezone.utc))
+            )
+        await product_cache.invalidate_product(product["id"])
+        await set_products(entries, generation)
+    
+    monkeypatch.setattr(product_cache, "set_products", write_then_set)
+    assert client.get(path).json()["name"] == "Before"
+    monkeypatch.undo()
+    
+    assert client.get(path).json()["name"] == "After"
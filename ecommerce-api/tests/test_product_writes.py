@@ -0,0 +1,79 @@
+"""Product create, update and delete, and who may write a product."""
+
+import pytest
+
+
+def test_create_returns_the_stored_product(client, make_product):
+    product = make_product(name="Desk lamp", price=24.5)
+    
+    assert product["is_active"] is True and product["created_at"] and product["owner_id"]
+    assert client.get(f"/products/{product['id']}").json() == product
+
+
+def test_owner_updates_only_the_given_fields(client, make_product, owner):
+    product = make_product(name="Desk lamp", price=24.5)
+    
+    response = client.put(f"/products/{product['id']}", json={"price": 19.0}, headers=owner)
+    
+    assert response.status_code == 200
+    updated = response.json()
+    assert (updated["name"], updated["price"]) == ("Desk lamp", 19.0)
+    assert updated["updated_at"] and updated["created_at"] == product["created_at"]
+    assert client.get(f"/products/{product['id']}").json()["price"] == 19.0
+
+
+def test_empty_update_writes_nothing(client, make_product, owner, make_user):
+    product = make_product()
+    cursor = client.get("/products/changes").json()["next_cursor"]
+    list_etag = client.get("/products/").headers["etag"]
+    
+    response = client.put(f"/products/{product['id']}", json={}, headers=owner)
+    
+    assert response.status_code == 200 and response.json() == product
+    assert client.get("/products/changes", params={"since": cursor}).json()["items"] == []
+    assert client.get("/products/").headers["etag"] == list_etag
+    assert client.put(f"/products/{product['id']}", json={}, headers=make_user()).status_code == 403
+    assert client.put("/products/999999999", json={}, headers=owner).status_code == 404
+
+
+def test_delete_is_a_soft_delete(client, make_product, owner):
+    product = make_product()
+    
+    assert client.delete(f"/products/{product['id']}", headers=owner).status_code == 204
+    
+    assert client.get(f"/products/{product['id']}").json()["is_active"] is False
+
+
+@pytest.mark.parametrize("method", ["put", "delete"])
+def test_other_users_are_forbidden(client, make_product, make_user, method):
+    product = make_product(price=24.5)
+    
+    response = client.request(method, f"/products/{product['id']}", json={"price": 1.0}, headers=make_user())
+    
+    assert response.status_code == 403
+    current = client.get(f"/products/{product['id']}").json()
+    assert (current["price"], current["is_active"]) == (24.5, True)
+
+
+@pytest.mark.parametrize("method", ["put", "delete"])
+def test_missing_product_is_not_found(client, owner, method):
+    response = client.request(method, "/products/999999999", json={"price": 1.0}, headers=owner)
+    
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize("method", ["put", "delete"])
+def test_admin_may_write_any_product(client, make_product, admin, method):
+    product = make_product()
+    
+    response = client.request(method, f"/products/{product['id']}", json={"price": 1.0}, headers=admin)
+    
+    assert response.status_code in (200, 204)
+
+
+def test_writes_require_authentication(client, make_product):
+    product = make_product()
+    
+    assert client.post("/products/", json={"name": "x", "price": 1.0}).status_code == 401
+    assert client.put(f"/products/{product['id']}", json={"price": 1.0}).status_code == 401
+    assert client.delete(f"/products/{product['id']}").status_code == 401
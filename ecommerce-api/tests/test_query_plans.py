@@ -0,0 +1,23 @@
+"""Every route query reads through an index (see benchmarks/check_query_plans.py)."""
+
+from sqlalchemy import text
+
+from app.database import engine
+from benchmarks.check_query_plans import explain, plan_problems, route_queries
+
+
+def test_route_queries_use_indexes(client, make_product, category):
+    # The checks look up a product, a category and a user to build their queries
+    make_product(name="wireless kettle", category=category)
+    if engine.dialect.name != "sqlite":
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+    
+    failures = {}
+    with engine.connect() as conn:
+        for check in route_queries(conn):
+            lines = explain(conn, check.query)
+            problems = plan_problems(lines, check.index_order)
+            if problems:
+                failures[check.name] = problems + lines
+    assert not failures, failures
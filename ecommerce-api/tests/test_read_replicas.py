@@ -0,0 +1,118 @@
+"""Read replica routing: lagging copies, dead replicas and read-your-writes pinning."""
+
+import sqlite3
+import time
+
+import pytest
+from sqlalchemy import exc, text
+
+from app.database import READ_PIN_COOKIE, ReadReplicas, engine, read_replicas
+from app.utils.cache import product_cache
+
+pytestmark = pytest.mark.skipif(engine.dialect.name != "sqlite", reason="replicas are SQLite copies of the database")
+
+UNREACHABLE = "sqlite+aiosqlite:////nonexistent-directory/replica.db"
+
+
+@pytest.fixture
+def use_replicas(client, tmp_path, monkeypatch):
+    """
+    Route the app's reads over the given replicas for one test.
+    
+    "copy" stands for a copy of the database taken now, which then lags
+    behind every later write; "down" for a replica that cannot be
+    reached. Returns the ReadReplicas the app uses.
+    """
+    # Cached entries would answer reads without asking any replica
+    monkeypatch.setattr(product_cache, "backend", None)
+    replicas = []
+    
+    def use_replicas(*kinds: str, retry_seconds: float = 30.0) -> ReadReplicas:
+        urls = []
+        for number, kind in enumerate(kinds):
+            if kind == "down":
+                urls.append(UNREACHABLE)
+                continue
+            path = tmp_path / f"replica-{number}.db"
+            with sqlite3.connect(engine.url.database) as primary, sqlite3.connect(path) as copy:
+                primary.backup(copy)
+            urls.append(f"sqlite+aiosqlite:///{path}")
+        
+        replica_set = ReadReplicas(urls, "round_robin", retry_seconds)
+        replicas.append(replica_set)
+        for name, value in vars(replica_set).items():
+            monkeypatch.setattr(read_replicas, name, value)
+        return read_replicas
+    
+    yield use_replicas
+    for replica_set in replicas:
+        client.portal.call(replica_set.dispose)
+    client.cookies.clear()
+
+
+def test_unpinned_reads_lag_and_pinned_reads_see_the_write(client, make_product, use_replicas):
+    replicas = use_replicas("copy")
+    product = make_product(name="Fresh off the primary")
+    path = f"/products/{product['id']}"
+    assert READ_PIN_COOKIE in client.cookies
+    
+    # The write pinned this client's reads to the primary
+    assert client.get(path).status_code == 200
+    assert replicas.sessions == [0] and replicas.primary_reads == 1
+    
+    # Without the cookie, reads go to the copy, which predates the write
+    client.cookies.clear()
+    assert client.get(path).status_code == 404
+    assert replicas.sessions == [1] and replicas.primary_reads == 1
+
+
+def test_dead_replica_is_skipped_then_retried(client, make_product, use_replicas):
+    product = make_product()
+    replicas = use_replicas("down", "copy", retry_seconds=0.5)
+    client.cookies.clear()
+    
+    for _ in range(4):
+        assert client.get(f"/products/{product['id']}").status_code == 200
+    assert replicas.failures == [1, 0]
+    assert replicas.sessions == [0, 4] and replicas.primary_reads == 0
+    
+    time.sleep(0.6)
+    assert client.get(f"/products/{product['id']}").status_code == 200
+    assert replicas.failures == [2, 0] and replicas.sessions == [0, 5]
+
+
+def test_every_replica_down_reads_from_the_primary(client, make_product, use_replicas):
+    product = make_product()
+    replicas = use_replicas("down")
+    client.cookies.clear()
+    
+    assert client.get(f"/products/{product['id']}").status_code == 200
+    assert replicas.failures == [1] and replicas.primary_reads == 1
+
+
+def test_broken_connection_marks_the_replica_down(client, use_replicas):
+    replicas = use_replicas("copy")
+    
+    async def read_until_the_connection_breaks():
+        async with replicas.session() as db:
+            await db.execute(text("SELECT 1"))
+            raise exc.DBAPIError("SELECT 1", {}, ConnectionError("gone"), connection_invalidated=True)
+    
+    with pytest.raises(exc.DBAPIError):
+        client.portal.call(read_until_the_connection_breaks)
+    assert replicas.failures == [1] and replicas.candidates() == []
+
+
+def test_pin_cookie_is_only_set_by_a_commit(client, make_product, owner, make_user, use_replicas):
+    use_replicas("copy")
+    product = make_product()
+    client.cookies.clear()
+    
+    assert READ_PIN_COOKIE not in client.get("/products/").headers.get("set-cookie", "")
+    refused = client.put(f"/products/{product['id']}", json={"price": 1.0}, headers=make_user())
+    assert refused.status_code == 403
+    assert READ_PIN_COOKIE not in refused.headers.get("set-cookie", "")
+    
+    updated = client.put(f"/products/{product['id']}", json={"price": 2.0}, headers=owner)
+    assert updated.status_code == 200
+    assert READ_PIN_COOKIE in updated.headers["set-cookie"]
@@ -0,0 +1,83 @@
+"""Stock reservations: all-or-nothing, and never more than the stock."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.database import async_engine
+from app.utils.cache import product_cache
+from app.utils.inventory import refresh_stock_totals
+
+
+def reserve(client, headers: dict, *items: tuple[int, int]):
+    return client.post(
+        "/products/reservations",
+        json={"items": [{"product_id": product_id, "quantity": quantity} for product_id, quantity in items]},
+        headers=headers,
+    )
+
+
+def test_reservation_takes_the_stock(client, make_product, owner):
+    product = make_product(stock_quantity=5)
+    
+    response = reserve(client, owner, (product["id"], 2), (product["id"], 1))
+    
+    assert response.status_code == 200
+    assert response.json()["items"] == [{"product_id": product["id"], "quantity": 3}]
+    assert client.get(f"/products/{product['id']}").json()["stock_quantity"] == 2
+
+
+def test_short_product_fails_the_whole_reservation(client, make_product, owner):
+    plenty = make_product(stock_quantity=10)
+    short = make_product(stock_quantity=1)
+    
+    response = reserve(client, owner, (plenty["id"], 3), (short["id"], 2))
+    
+    assert response.status_code == 409
+    assert client.get(f"/products/{plenty['id']}").json()["stock_quantity"] == 10
+    assert client.get(f"/products/{short['id']}").json()["stock_quantity"] == 1
+
+
+def test_unknown_and_deleted_products(client, make_product, owner):
+    product = make_product()
+    client.delete(f"/products/{product['id']}", headers=owner)
+    
+    assert reserve(client, owner, (999999999, 1)).status_code == 404
+    assert reserve(client, owner, (product["id"], 1)).status_code == 409
+
+
+@pytest.mark.parametrize("shards", [0, 4])
+def test_concurrent_buyers_never_oversell(client, make_product, owner, shards):
+    product = make_product(stock_quantity=5)
+    if shards:
+        response = client.put(f"/products/{product['id']}/stock-shards", json={"shards": shards}, headers=owner)
+        assert response.status_code == 200
+    
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        statuses = list(pool.map(lambda _: reserve(client, owner, (product["id"], 1)).status_code, range(20)))
+    
+    assert statuses.count(200) == 5
+    assert statuses.count(409) == 15
+    assert reserve(client, owner, (product["id"], 1)).status_code == 409
+
+
+def test_sharded_reservation_leaves_the_product_row_alone(client, make_product, owner):
+    product = make_product(stock_quantity=8)
+    client.put(f"/products/{product['id']}/stock-shards", json={"shards": 4}, headers=owner)
+    before = client.get(f"/products/{product['id']}").json()
+    
+    assert reserve(client, owner, (product["id"], 3)).status_code == 200
+    
+    assert client.get(f"/products/{product['id']}").json() == before
+    
+    async def refresh():
+        """One round of maintain_stock_totals."""
+        async with async_engine.begin() as conn:
+            changed = await refresh_stock_totals(conn)
+        if changed:
+            await product_cache.invalidate_product(*changed)
+        return changed
+    
+    assert product["id"] in client.portal.call(refresh)
+    assert client.get(f"/products/{product['id']}").json()["stock_quantity"] == 5
+    assert product["id"] not in client.portal.call(refresh)
@@ -0,0 +1,22 @@
+"""New workers start within budget, without first-use modules (see benchmarks/bench_startup.py)."""
+
+import os
+import statistics
+from pathlib import Path
+
+from benchmarks.bench_startup import start_process
+
+# Generous by default: the suite runs on slow CI machines too
+STARTUP_BUDGET_MS = float(os.environ.get("STARTUP_BUDGET_MS", "3000"))
+
+
+def test_startup_within_budget(client, monkeypatch):
+    # The child processes import `app` from the project directory and
+    # inherit this session's (already migrated) database
+    monkeypatch.chdir(Path(__file__).resolve().parent.parent)
+    
+    runs = [start_process()[0] for _ in range(3)]
+    
+    total = statistics.median(run["report"]["total_ms"] for run in runs)
+    assert total <= STARTUP_BUDGET_MS, runs[0]["report"]
+    assert not [name for run in runs for name in run["loaded"]]
@@ -0,0 +1,96 @@
+"""The autocomplete index (app.utils.suggest), tested directly: the app's own is off in tests."""
+
+import asyncio
+
+from app.utils.suggest import IndexedProduct, PrefixArray, SuggestIndex, normalize
+
+
+def prefix_array(*products: tuple[int, str, int]) -> PrefixArray:
+    """Array of (id, name, stock) products, all uncategorized."""
+    return PrefixArray(sorted((normalize(name), name, product_id, stock, -1) for product_id, name, stock in products))
+
+
+def loaded_index(*products: IndexedProduct) -> SuggestIndex:
+    index = SuggestIndex()
+    
+    async def fetch():
+        return list(products)
+    
+    asyncio.run(index.load(fetch))
+    return index
+
+
+def names(index: SuggestIndex, prefix: str) -> list[str]:
+    return [name for _, name, _ in index.search(prefix)[0]]
+
+
+def test_top_returns_the_best_stocked_live_matches():
+    array = prefix_array((1, "Lamp", 3), (2, "Ladder", 9), (3, "Lantern", 5), (4, "Mug", 50))
+    
+    assert [array.ids[index] for _, index in array.top("la", 2)] == [2, 3]
+    array.set_stock(array.find(2), -1)
+    assert array.find(2) == -1
+    assert [(stock, array.ids[index]) for stock, index in array.top("la", 10)] == [(5, 3), (3, 1)]
+    assert [entry[2] for entry in array.live_entries()] == [1, 3, 4]
+
+
+def test_find_handles_sparse_ids():
+    array = prefix_array((2**40, "Far", 1), (7, "Near", 1))
+    
+    assert array.ids[array.find(2**40)] == 2**40
+    assert array.ids[array.find(7)] == 7
+    assert array.find(8) == -1 and array.find(2**41) == -1
+    assert PrefixArray([]).find(1) == -1
+
+
+def test_upsert_rename_and_deactivate():
+    index = loaded_index(
+        IndexedProduct(1, "Desk lamp", "lighting", 4, True),
+        IndexedProduct(2, "Desk chair", "office", 8, True),
+    )
+    assert names(index, "desk") == ["Desk chair", "Desk lamp"]
+    
+    # Stock change in place, then a new product in the overlay
+    index.upsert(IndexedProduct(1, "Desk lamp", "lighting", 20, True))
+    index.upsert(IndexedProduct(3, "Desk fan", "lighting", 10, True))
+    assert names(index, "desk") == ["Desk lamp", "Desk fan", "Desk chair"]
+    assert index.search("light")[1] == [("lighting", 2)]
+    
+    # A rename tombstones the old entry
+    index.upsert(IndexedProduct(2, "Office chair", "office", 8, True))
+    assert names(index, "desk") == ["Desk lamp", "Desk fan"]
+    assert names(index, "office") == ["Office chair"]
+    
+    index.upsert(IndexedProduct(1, "Desk lamp", "lighting", 20, False))
+    assert names(index, "desk") == ["Desk fan"]
+    assert index.search("light")[1] == [("lighting", 1)]
+
+
+def test_writes_during_a_rebuild_are_replayed():
+    index = loaded_index(IndexedProduct(1, "Teapot", None, 1, True))
+    
+    async def reload():
+        async def fetch():
+            # Committed after the reload read the products, so the new array lacks them
+            index.upsert(IndexedProduct(2, "Teacup", None, 6, True))
+            index.upsert(IndexedProduct(1, "Teapot", None, 1, False))
+            return [IndexedProduct(1, "Teapot", None, 1, True)]
+        
+        await index.load(fetch)
+    
+    asyncio.run(reload())
+    
+    assert names(index, "tea") == ["Teacup"]
+    assert index._journal is None
+
+
+def test_merge_moves_the_overlay_into_the_array():
+    index = loaded_index(IndexedProduct(1, "Kettle", None, 2, True))
+    index.upsert(IndexedProduct(2, "Kettlebell", None, 7, True))
+    index.upsert(IndexedProduct(1, "Stovetop kettle", None, 2, True))
+    
+    asyncio.run(index.merge())
+    
+    assert index.overlay == {} and len(index.array) == 2
+    assert names(index, "kettle") == ["Kettlebell"]
+    assert names(index, "stove") == ["Stovetop kettle"]